@@ -0,0 +1,137 @@
+"""
+Amostradores NUTS disponíveis para o modelo final e benchmark entre eles.
+
+pm.sample(nuts_sampler=...) aceita o NUTS do PyMC (PyTensor, padrão), nutpie
+e, via JAX, NumPyro e BlackJAX. Os três últimos são dependências opcionais;
+amostrador_disponivel diz se o pacote está instalado e argumentos_amostragem
+traduz as opções do treino (profundidade máxima da árvore, cadeias) para o
+nome que cada backend espera.
+
+O benchmark roda treinar_modelo_bayesiano_final.py uma vez por backend, cada
+uma em um subprocesso com --metricas-amostragem (só a amostragem, sem gravar
+artefatos), e reporta tempo de parede, ESS-bulk mínimo por segundo,
+divergências e pico de memória (ru_maxrss do subprocesso):
+    python amostradores.py                          # todos os backends instalados
+    python amostradores.py pymc nutpie --draws 1000 --tune 1000
+"""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+
+AMOSTRADORES = ("pymc", "nutpie", "numpyro", "blackjax")
+
+# Pacotes necessários para cada backend além do PyMC
+PACOTES = {
+    "pymc": (),
+    "nutpie": ("nutpie",),
+    "numpyro": ("jax", "numpyro"),
+    "blackjax": ("jax", "blackjax"),
+}
+
+SCRIPT_TREINO = "treinar_modelo_bayesiano_final.py"
+
+
+def amostrador_disponivel(nome):
+    return all(importlib.util.find_spec(pacote) is not None for pacote in PACOTES[nome])
+
+
+def argumentos_amostragem(nome, max_treedepth=12, chains=4, cores=4):
+    """Argumentos extras de pm.sample para o backend `nome`"""
+    if nome == "pymc":
+        return {"cores": cores, "max_treedepth": max_treedepth}
+    if nome == "nutpie":
+        return {"nuts_sampler": nome, "nuts_sampler_kwargs": {"maxdepth": max_treedepth}}
+    if nome in ("numpyro", "blackjax"):
+        # Sem GPU, as cadeias em paralelo (jax.pmap) precisam de um
+        # dispositivo de CPU cada; vale só se o JAX ainda não foi importado
+        os.environ.setdefault("XLA_FLAGS", f"--xla_force_host_platform_device_count={chains}")
+        profundidade = "max_tree_depth" if nome == "numpyro" else "max_num_doublings"
+        return {"nuts_sampler": nome, "nuts_sampler_kwargs": {"nuts_kwargs": {profundidade: max_treedepth}}}
+    raise ValueError(f"Amostrador '{nome}' desconhecido; opções: {', '.join(AMOSTRADORES)}")
+
+
+def metricas_amostragem(idata, tempo):
+    """Tempo, ESS-bulk (mínimo entre os parâmetros), ESS/s e divergências"""
+    import arviz as az
+
+    ess = az.ess(idata, method="bulk")
+    ess_min = float(min(ess[nome].min() for nome in ess.data_vars))
+    return {
+        "tempo_s": float(tempo),
+        "ess_bulk_min": ess_min,
+        "ess_bulk_por_s": ess_min / tempo,
+        "divergencias": int(np.asarray(idata.sample_stats["diverging"]).sum()),
+    }
+
+
+def _executar(nome, draws, tune, chains):
+    """Métricas de um treino em subprocesso; pico de memória via wait4"""
+    with tempfile.TemporaryDirectory() as tmp:
+        saida = os.path.join(tmp, "metricas.json")
+        comando = [
+            sys.executable, SCRIPT_TREINO,
+            "--amostrador", nome,
+            "--draws", str(draws),
+            "--tune", str(tune),
+            "--chains", str(chains),
+            "--metricas-amostragem", saida,
+        ]
+        processo = subprocess.Popen(comando, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        erros = processo.stderr.read()
+        # wait4 devolve o uso de recursos do próprio filho (Linux: ru_maxrss em KB,
+        # o maior entre ele e os processos que ele esperou, ex.: workers do PyMC)
+        _, status, uso = os.wait4(processo.pid, 0)
+        processo.returncode = os.waitstatus_to_exitcode(status)
+        if processo.returncode != 0:
+            linhas = erros.decode(errors="replace").strip().splitlines()
+            raise RuntimeError(linhas[-1] if linhas else f"código de saída {processo.returncode}")
+        with open(saida, "r", encoding="utf-8") as f:
+            metricas = json.load(f)
+    metricas["memoria_pico_mb"] = uso.ru_maxrss / 1024
+    return metricas
+
+
+def _benchmark(amostradores, draws, tune, chains):
+    print(f"{'amostrador':<10} {'tempo (s)':>10} {'ESS-bulk':>9} {'ESS/s':>8} {'diverg.':>8} {'memória (MB)':>13}")
+    resultados = {}
+    for nome in amostradores:
+        if not amostrador_disponivel(nome):
+            print(f"{nome:<10} não instalado ({', '.join(PACOTES[nome])})")
+            continue
+        try:
+            metricas = _executar(nome, draws, tune, chains)
+        except RuntimeError as erro:
+            print(f"{nome:<10} falhou: {erro}")
+            continue
+        resultados[nome] = metricas
+        print(f"{nome:<10} {metricas['tempo_s']:>10.1f} {metricas['ess_bulk_min']:>9.0f} "
+              f"{metricas['ess_bulk_por_s']:>8.1f} {metricas['divergencias']:>8} "
+              f"{metricas['memoria_pico_mb']:>13.0f}")
+    return resultados
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark dos amostradores NUTS no modelo final")
+    parser.add_argument("amostradores", nargs="*", help=f"entre {', '.join(AMOSTRADORES)} (padrão: todos)")
+    parser.add_argument("--draws", type=int, default=2000)
+    parser.add_argument("--tune", type=int, default=2000)
+    parser.add_argument("--chains", type=int, default=4)
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    args = parser.parse_args()
+    desconhecidos = [nome for nome in args.amostradores if nome not in AMOSTRADORES]
+    if desconhecidos:
+        parser.error(f"amostradores desconhecidos: {', '.join(desconhecidos)}")
+
+    resultados = _benchmark(args.amostradores or AMOSTRADORES, args.draws, args.tune, args.chains)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
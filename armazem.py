@@ -0,0 +1,135 @@
+"""
+Armazém em seções para os resultados bayesianos (substitui o .pkl monolítico).
+
+Estrutura do diretório:
+
+    index.json              {"versao": 1, "secoes": {"info_geral": "info_geral.json", ...}}
+    <secao>.json            conteúdo da seção (JSON puro)
+    arrays/<secao>.<caminho>.npy
+
+Cada chave de primeiro nível vira uma seção, lida só no primeiro acesso
+(armazem['modelos']). Arrays NumPy e listas numéricas longas (ex.: amostras
+da posteriori) vão para arquivos .npy e são abertos com mmap_mode='r': só as
+páginas efetivamente lidas saem do disco, e voltam como arrays somente
+leitura. Nada é despickleado na leitura (np.load com allow_pickle=False).
+
+Conversão do .pkl antigo (único ponto que ainda usa pickle, fora do app):
+    python armazem.py data/bayes/resultados_bayesianos_completos.pkl data/bayes/resultados_bayesianos
+"""
+
+import json
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+
+VERSAO_FORMATO = 1
+INDICE = "index.json"
+DIR_ARRAYS = "arrays"
+
+# Listas numéricas a partir deste tamanho são gravadas como .npy
+LIMITE_ARRAY = 1000
+
+# Marcador, dentro do JSON da seção, de um valor gravado em .npy
+CHAVE_ARRAY = "__npy__"
+
+
+def _lista_numerica(valor):
+    return (
+        isinstance(valor, list)
+        and len(valor) >= LIMITE_ARRAY
+        and all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in valor)
+    )
+
+
+def _separar_arrays(valor, caminho, arrays):
+    """Cópia de valor com arrays trocados por marcadores; arrays[nome] = array"""
+    if isinstance(valor, dict):
+        return {str(k): _separar_arrays(v, f"{caminho}.{k}", arrays) for k, v in valor.items()}
+    if isinstance(valor, np.ndarray) or _lista_numerica(valor):
+        array = np.asarray(valor)
+        if array.dtype == object:
+            raise ValueError(f"{caminho}: arrays de objetos não são suportados")
+        nome = f"{caminho}.npy"
+        arrays[nome] = array
+        return {CHAVE_ARRAY: nome}
+    if isinstance(valor, (list, tuple)):
+        return [_separar_arrays(v, f"{caminho}.{i}", arrays) for i, v in enumerate(valor)]
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+def salvar_secoes(resultados, diretorio):
+    """Grava um dicionário de resultados no formato em seções"""
+    os.makedirs(os.path.join(diretorio, DIR_ARRAYS), exist_ok=True)
+    secoes = {}
+    for secao, conteudo in resultados.items():
+        arrays = {}
+        conteudo = _separar_arrays(conteudo, secao, arrays)
+        for nome, array in arrays.items():
+            np.save(os.path.join(diretorio, DIR_ARRAYS, nome), array, allow_pickle=False)
+        secoes[secao] = f"{secao}.json"
+        with open(os.path.join(diretorio, secoes[secao]), "w", encoding="utf-8") as f:
+            json.dump(conteudo, f, ensure_ascii=False, indent=2)
+    # Índice por último: um diretório sem índice é uma gravação incompleta
+    with open(os.path.join(diretorio, INDICE), "w", encoding="utf-8") as f:
+        json.dump({"versao": VERSAO_FORMATO, "secoes": secoes}, f, ensure_ascii=False, indent=2)
+
+
+class ArmazemSecoes(Mapping):
+    """Leitura preguiçosa das seções: cada uma é lida no primeiro acesso"""
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, INDICE), "r", encoding="utf-8") as f:
+            indice = json.load(f)
+        if indice.get("versao") != VERSAO_FORMATO:
+            raise ValueError(f"Formato {indice.get('versao')} não suportado (esperado {VERSAO_FORMATO})")
+        self._arquivos = indice["secoes"]
+        self._carregadas = {}
+
+    def __getitem__(self, secao):
+        if secao not in self._carregadas:
+            if secao not in self._arquivos:
+                raise KeyError(secao)
+            with open(os.path.join(self.diretorio, self._arquivos[secao]), "r", encoding="utf-8") as f:
+                self._carregadas[secao] = self._restaurar_arrays(json.load(f))
+        return self._carregadas[secao]
+
+    def __iter__(self):
+        return iter(self._arquivos)
+
+    def __len__(self):
+        return len(self._arquivos)
+
+    @property
+    def carregadas(self):
+        """Seções já lidas do disco"""
+        return list(self._carregadas)
+
+    def _restaurar_arrays(self, valor):
+        if isinstance(valor, dict):
+            if set(valor) == {CHAVE_ARRAY}:
+                caminho = os.path.join(self.diretorio, DIR_ARRAYS, valor[CHAVE_ARRAY])
+                return np.load(caminho, mmap_mode="r", allow_pickle=False)
+            return {k: self._restaurar_arrays(v) for k, v in valor.items()}
+        if isinstance(valor, list):
+            return [self._restaurar_arrays(v) for v in valor]
+        return valor
+
+
+if __name__ == "__main__":
+    import argparse
+    import pickle
+
+    parser = argparse.ArgumentParser(description="Converte um .pkl de resultados para o formato em seções")
+    parser.add_argument("origem", help="arquivo .pkl (dicionário de seções)")
+    parser.add_argument("destino", help="diretório de saída")
+    args = parser.parse_args()
+
+    with open(args.origem, "rb") as f:
+        resultados = pickle.load(f)
+    salvar_secoes(resultados, args.destino)
+    print(f"{len(resultados)} seções gravadas em {args.destino}: {', '.join(resultados)}")
@@ -0,0 +1,183 @@
+"""
+Arquivo compacto de amostras (posteriori e preditiva) para o dashboard.
+
+O dashboard não precisa de float64: variáveis contínuas são gravadas em
+float32 e contagens (ex.: y_obs, previsões) no menor inteiro que comporta o
+intervalo observado. Os arrays vão para um .npz comprimido com zstd quando o
+pacote zstandard está instalado, ou com zlib (np.savez_compressed) caso
+contrário; carregar_amostras reconhece os dois pelo cabeçalho do arquivo.
+
+exportar_amostras devolve um relatório com o tamanho do arquivo, o tamanho
+equivalente em float64 e, por variável, o maior erro de quantil (1% a 99%)
+entre as amostras gravadas e as originais.
+
+Para os gráficos da posteriori bastam ~1000 amostras por parâmetro:
+desbastar aplica o mesmo passo regular em cada cadeia (subamostra fixa,
+reprodutível), e ess_desbaste compara o ESS antes e depois.
+
+Uso:
+    relatorio = exportar_amostras({'y_pred': y_samples}, 'data/bayes/<versao>/amostras_2025.npz')
+    imprimir_relatorio(relatorio)
+    amostras = carregar_amostras('data/bayes/<versao>/amostras_2025.npz')
+
+Amostras desbastadas da posteriori de uma versão já treinada (a partir de idata/):
+    python arquivo_amostras.py data/bayes/modelofinal_2
+"""
+
+import io
+import os
+
+import numpy as np
+
+from hdi import quantis
+from previsao import NIVEIS_QUANTIS
+
+# zstandard é opcional: sem ele a compressão é a zlib do np.savez_compressed
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+NIVEL_ZSTD = 10
+
+# Amostras da posteriori exportadas por parâmetro para os gráficos
+N_DESBASTE = 1000
+
+# Início de um frame zstd; um .npz (zip) começa com "PK"
+_MAGICO_ZSTD = b"\x28\xb5\x2f\xfd"
+
+
+def quantizar(valores):
+    """float -> float32; inteiros e booleanos -> menor inteiro que comporta os valores"""
+    valores = np.asarray(valores)
+    if valores.dtype.kind == "f":
+        return valores.astype("float32")
+    if valores.dtype.kind in "iub":
+        if valores.size == 0:
+            return valores.astype("int8")
+        menor, maior = int(valores.min()), int(valores.max())
+        return valores.astype(np.result_type(np.min_scalar_type(menor), np.min_scalar_type(maior)))
+    raise ValueError(f"dtype {valores.dtype} não suportado")
+
+
+def erro_quantis(original, gravado, niveis=NIVEIS_QUANTIS):
+    """Maior erro absoluto e relativo dos quantis ao longo das amostras (eixo 0)"""
+    original = np.asarray(original, dtype="float64")
+    exatos = quantis(original, niveis)
+    aproximados = quantis(np.asarray(gravado, dtype="float64"), niveis)
+    erro = np.abs(aproximados - exatos)
+    escala = np.maximum(np.abs(exatos), np.finfo("float64").tiny)
+    return float(erro.max(initial=0.0)), float((erro / escala).max(initial=0.0))
+
+
+def exportar_amostras(amostras, caminho, niveis=NIVEIS_QUANTIS):
+    """
+    Grava {nome: amostras (amostras, ...)} quantizadas e comprimidas em caminho.
+
+    Retorna o relatório (tamanhos e erro máximo de quantil por variável).
+    """
+    gravados = {nome: quantizar(valores) for nome, valores in amostras.items()}
+
+    buffer = io.BytesIO()
+    if ZSTD_AVAILABLE:
+        np.savez(buffer, **gravados)
+        conteudo = zstandard.ZstdCompressor(level=NIVEL_ZSTD).compress(buffer.getvalue())
+        compressao = "zstd"
+    else:
+        np.savez_compressed(buffer, **gravados)
+        conteudo = buffer.getvalue()
+        compressao = "zlib"
+    with open(caminho, "wb") as f:
+        f.write(conteudo)
+
+    variaveis = {}
+    for nome, valores in amostras.items():
+        erro_abs, erro_rel = erro_quantis(valores, gravados[nome], niveis)
+        variaveis[nome] = {
+            "dtype": gravados[nome].dtype.name,
+            "formato": list(gravados[nome].shape),
+            "erro_max_quantil": erro_abs,
+            "erro_rel_max_quantil": erro_rel,
+        }
+    return {
+        "arquivo": caminho,
+        "compressao": compressao,
+        "bytes": os.path.getsize(caminho),
+        "bytes_float64": int(sum(np.asarray(v).size * 8 for v in amostras.values())),
+        "variaveis": variaveis,
+    }
+
+
+def carregar_amostras(caminho):
+    """{nome: array} de um arquivo gravado por exportar_amostras"""
+    with open(caminho, "rb") as f:
+        conteudo = f.read()
+    if conteudo[:4] == _MAGICO_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise ImportError(f"{caminho} está comprimido com zstd; instale o pacote zstandard")
+        conteudo = zstandard.ZstdDecompressor().decompress(conteudo)
+    with np.load(io.BytesIO(conteudo), allow_pickle=False) as arquivo:
+        return {nome: arquivo[nome] for nome in arquivo.files}
+
+
+def desbastar(amostras, n_cadeias, n_alvo=N_DESBASTE):
+    """
+    Subamostra regular de (cadeias·draws, ...) com no máximo n_alvo amostras.
+
+    O mesmo passo vale para todas as cadeias, que contribuem igualmente; as
+    amostras descartadas são vizinhas das mantidas (as mais autocorrelacionadas),
+    então o ESS cai pouco enquanto n_alvo estiver acima dele.
+    """
+    amostras = np.asarray(amostras)
+    passo = max(1, -(-amostras.shape[0] // n_alvo))
+    por_cadeia = amostras.reshape((n_cadeias, -1) + amostras.shape[1:])
+    return por_cadeia[:, ::passo].reshape((-1,) + amostras.shape[1:])
+
+
+def ess_desbaste(amostras, desbastadas, n_cadeias):
+    """{nome: (ESS bulk mínimo completo, ESS bulk mínimo desbastado)}"""
+    import arviz as az
+
+    def ess_minimo(valores):
+        valores = np.asarray(valores, dtype="float64")
+        por_cadeia = valores.reshape((n_cadeias, -1) + valores.shape[1:])
+        return float(az.ess(az.convert_to_dataset(por_cadeia), method="bulk")["x"].min())
+
+    return {nome: (ess_minimo(amostras[nome]), ess_minimo(desbastadas[nome])) for nome in desbastadas}
+
+
+def imprimir_relatorio(relatorio):
+    print(
+        f"{relatorio['arquivo']}: {relatorio['bytes'] / 1024:.1f} KB ({relatorio['compressao']}), "
+        f"{relatorio['bytes_float64'] / 1024:.1f} KB em float64"
+    )
+    for nome, info in relatorio["variaveis"].items():
+        print(
+            f"  {nome:<14} {info['dtype']:<8} erro máx. de quantil "
+            f"{info['erro_max_quantil']:.3g} ({info['erro_rel_max_quantil']:.2e} relativo)"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from posteriori_mmap import PosterioriMmap
+    from previsao import VARIAVEIS, amostras_posteriori
+    from registro_modelos import RegistroModelos
+
+    parser = argparse.ArgumentParser(description="Exporta amostras desbastadas da posteriori de uma versão")
+    parser.add_argument("diretorio", help="diretório da versão (com idata/)")
+    parser.add_argument("--amostras", type=int, default=N_DESBASTE, help="amostras por parâmetro")
+    args = parser.parse_args()
+
+    posteriori = PosterioriMmap(os.path.join(args.diretorio, "idata"))
+    n_cadeias = posteriori.array("alpha0").shape[0]
+    completas = amostras_posteriori(posteriori, VARIAVEIS + ["sigma_mes"])
+    desbastadas = {nome: desbastar(v, n_cadeias, args.amostras) for nome, v in completas.items()}
+
+    imprimir_relatorio(exportar_amostras(desbastadas, os.path.join(args.diretorio, "amostras_posteriori.npz")))
+    for nome, (ess_total, ess_desbastado) in ess_desbaste(completas, desbastadas, n_cadeias).items():
+        print(f"  {nome:<14} ESS {ess_total:,.0f} -> {ess_desbastado:,.0f}")
+    RegistroModelos().registrar(args.diretorio)
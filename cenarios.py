@@ -0,0 +1,322 @@
+"""
+Cenários de covariáveis (what-if) para o modelo final.
+
+A previsão padrão usa as covariáveis na média do treino (X_pred = 0 em
+z-score). Aqui cada cenário é um conjunto de valores brutos das covariáveis
+(ex.: meta de apreensões de arm_branc_apr), padronizado com
+covariate_metadata.means/stds do model_config.json.
+
+A NegBin é amostrada como mistura Gamma-Poisson, y ~ Poisson(μ · G) com
+G ~ Gamma(α, 1/α), a mesma distribuição de PrevisorNegBin.prever. A parte do
+preditor que não depende das covariáveis (intercepto, mês, ano e G) é sorteada
+uma única vez, assim como um normal padrão z por amostra e período para o
+ruído Poisson. Todos os cenários compartilham esses números aleatórios, de
+modo que as diferenças entre cenários refletem só as covariáveis e o mesmo
+cenário sempre devolve o mesmo resultado. O efeito das covariáveis de todos
+os cenários é um único produto matricial (cenários × períodos × amostras),
+processado em blocos para limitar a memória. As amostras ficam no último eixo
+(contíguo): exponencial, quantil de Cornish-Fisher e ordenação percorrem
+memória sequencial, e as contagens são ordenadas como int32.
+
+Aproximação: a Poisson de cada cenário é o quantil de Cornish-Fisher em z,
+floor(λ + √λ·z + (z² + 2)/6), em vez do quantil exato (scipy.stats.poisson.ppf
+é ~1000x mais lento). Para λ a partir de dezenas difere do exato em no máximo
+1 ocorrência (e em menos de 0,5% das amostras); nas contagens mensais da
+PMDF (~10^4) a diferença é desprezível.
+
+Uso:
+    motor = MotorCenarios(previsor, config['covariate_metadata'], horizonte(2025, 1, 12))
+    grade = grade_cenarios(arm_branc_apr=np.linspace(100, 600, 2000))
+    resultado = motor.avaliar(grade, limiar=15000)
+
+Linha de comando (modelo do registro, mesmo padrão de prever_2025.py):
+    python cenarios.py --faixa arm_branc_apr 100 600 11 --limiar 15000
+    python cenarios.py --verificar   # compara com PrevisorNegBin.prever e mede o tempo
+"""
+
+import itertools
+import numpy as np
+import pandas as pd
+
+from hdi import hdi_ordenadas
+from previsao import resumir
+
+
+def grade_cenarios(**faixas):
+    """Produto cartesiano dos valores de cada covariável (um cenário por linha)"""
+    nomes = list(faixas)
+    combinacoes = itertools.product(*(np.atleast_1d(faixas[n]) for n in nomes))
+    return pd.DataFrame(list(combinacoes), columns=nomes)
+
+
+class MotorCenarios:
+    """Avalia milhares de cenários de covariáveis contra a posteriori em lote"""
+
+    def __init__(self, previsor, covariate_metadata, periodos, n_amostras=1000, seed=123):
+        if previsor.n_covariaveis == 0:
+            raise ValueError("O modelo não tem covariáveis")
+        self.colunas = list(covariate_metadata['covariate_cols'])
+        if len(self.colunas) != previsor.n_covariaveis:
+            raise ValueError(
+                f"covariate_metadata tem {len(self.colunas)} covariáveis; "
+                f"o modelo tem {previsor.n_covariaveis}"
+            )
+        self.medias = np.array([covariate_metadata['means'][c] for c in self.colunas])
+        self.desvios = np.array([covariate_metadata['stds'][c] for c in self.colunas])
+        self.periodos = list(periodos)
+
+        rng = np.random.default_rng(seed)
+        # Subamostra da posteriori: limita o custo por cenário
+        linhas = np.arange(previsor.n_amostras)
+        if n_amostras < previsor.n_amostras:
+            linhas = np.sort(rng.choice(previsor.n_amostras, n_amostras, replace=False))
+
+        mes_idx, ano_idx = previsor.indices_periodos(self.periodos)
+        # Parte comum a todos os cenários: log μ sem covariáveis e mistura Gamma
+        # da NegBin (y ~ Poisson(μ · G), G ~ Gamma(α, 1/α))
+        base = previsor.log_mu(mes_idx, ano_idx, seed=rng)[linhas]
+        alpha = previsor.alpha_nb[linhas, None]
+        base = base + np.log(rng.gamma(alpha, 1 / alpha, size=base.shape))
+        # Normal comum do ruído Poisson (quantil de Cornish-Fisher, ver acima).
+        # Tudo em (períodos × amostras) e beta em (covariáveis × amostras)
+        ruido = rng.standard_normal(base.shape)
+        self._base = np.ascontiguousarray(base.T)
+        self._beta = np.ascontiguousarray(previsor.beta[linhas].T)
+        self._ruido = np.ascontiguousarray(ruido.T)
+        self._ruido_assimetria = (self._ruido ** 2 + 2) / 6
+
+    @property
+    def n_amostras(self):
+        return self._base.shape[1]
+
+    def padronizar(self, cenarios):
+        """
+        Valores brutos -> z-score, no formato (cenários × períodos × covariáveis).
+
+        Aceita DataFrame com as colunas das covariáveis (valor constante no
+        horizonte), array (cenários × covariáveis) ou
+        (cenários × períodos × covariáveis).
+        """
+        if isinstance(cenarios, pd.DataFrame):
+            faltando = [c for c in self.colunas if c not in cenarios.columns]
+            if faltando:
+                raise ValueError(f"Cenários sem as covariáveis {faltando}")
+            cenarios = cenarios[self.colunas].to_numpy(dtype='float64')
+        valores = np.asarray(cenarios, dtype='float64')
+        if valores.ndim == 1:
+            valores = valores.reshape(-1, len(self.colunas))
+        if valores.ndim == 2:
+            valores = np.broadcast_to(valores[:, None, :],
+                                      (len(valores), len(self.periodos), valores.shape[1]))
+        if valores.shape[1:] != (len(self.periodos), len(self.colunas)):
+            raise ValueError(
+                f"Cenários com formato {valores.shape}; esperado "
+                f"(n, {len(self.periodos)}, {len(self.colunas)})"
+            )
+        return (valores - self.medias) / self.desvios
+
+    def avaliar(self, cenarios, limiar=None, prob=0.95, bloco=128):
+        """
+        Mediana, HDI e P(Y > limiar) da preditiva de cada cenário e período.
+
+        Retorna um dicionário de arrays (cenários × períodos): mediana,
+        hdi_low, hdi_high e, com limiar, prob_exceder e prob_algum_mes
+        (cenários), a probabilidade de ao menos um período passar do limiar.
+        """
+        z = self.padronizar(cenarios)
+        n_cenarios, n_periodos = z.shape[:2]
+        saida = {nome: np.empty((n_cenarios, n_periodos))
+                 for nome in ('mediana', 'hdi_low', 'hdi_high')}
+        if limiar is not None:
+            saida['prob_exceder'] = np.empty((n_cenarios, n_periodos))
+            saida['prob_algum_mes'] = np.empty(n_cenarios)
+
+        meio = (self.n_amostras - 1) // 2, self.n_amostras // 2
+        for inicio in range(0, n_cenarios, bloco):
+            fatia = slice(inicio, inicio + bloco)
+            # (cenários × períodos × covariáveis) · (covariáveis × amostras),
+            # com as operações seguintes no mesmo buffer
+            lam = z[fatia] @ self._beta
+            lam += self._base
+            np.exp(lam, out=lam)
+            desvio = np.sqrt(lam)
+            desvio *= self._ruido
+            lam += desvio
+            lam += self._ruido_assimetria
+            # Após o corte em 0, truncar para int32 é o floor do quantil
+            np.maximum(lam, 0, out=lam)
+            y = lam.astype('int32')
+
+            if limiar is not None:
+                acima = y > limiar
+                saida['prob_exceder'][fatia] = np.count_nonzero(acima, axis=2) / self.n_amostras
+                saida['prob_algum_mes'][fatia] = np.count_nonzero(acima.any(axis=1), axis=1) / self.n_amostras
+            y.sort(axis=2)
+            saida['mediana'][fatia] = (y[..., meio[0]] + y[..., meio[1]]) / 2
+            intervalo = hdi_ordenadas(y, prob, axis=2)
+            saida['hdi_low'][fatia] = intervalo[..., 0]
+            saida['hdi_high'][fatia] = intervalo[..., 1]
+        return saida
+
+
+def comparar_com_prever(previsor, covariate_metadata, periodos, valores, prob=0.95, seed=123,
+                        repeticoes=4):
+    """
+    Mediana e HDI de um cenário pelo motor e por PrevisorNegBin.prever.
+
+    Usa todas as amostras da posteriori, cada uma repetida `repeticoes`
+    vezes (menos ruído de Monte Carlo nos limites do HDI), o mesmo X
+    padronizado e a mesma seed. Os dois sorteiam números aleatórios
+    diferentes, então a concordância é estatística: diferenca_ep é a
+    diferença das medianas em erros padrão (1,2533·dp/√n) e desvio_hdi, a
+    maior diferença entre os limites do HDI como fração da largura do HDI
+    de prever.
+    """
+    previsor = previsor.fatia(np.tile(np.arange(previsor.n_amostras), repeticoes))
+    motor = MotorCenarios(previsor, covariate_metadata, periodos, n_amostras=previsor.n_amostras, seed=seed)
+    valores = np.asarray(valores, dtype='float64').reshape(1, -1)
+    resultado = motor.avaliar(valores, prob=prob)
+
+    mes_idx, ano_idx = previsor.indices_periodos(periodos)
+    y = previsor.prever(mes_idx, ano_idx, motor.padronizar(valores)[0], seed=seed)
+    referencia = resumir(y, prob)
+
+    erro_padrao = 1.2533 * y.std(axis=0) / np.sqrt(len(y))
+    largura = referencia['hdi_high'] - referencia['hdi_low']
+    periodos = np.asarray(periodos, dtype='int64').reshape(-1, 2)
+    return pd.DataFrame({
+        'ano': periodos[:, 0],
+        'mes_num': periodos[:, 1],
+        'mediana_motor': resultado['mediana'][0],
+        'mediana_prever': referencia['mediana'],
+        'diferenca_ep': (resultado['mediana'][0] - referencia['mediana']) / erro_padrao,
+        'hdi_low_motor': resultado['hdi_low'][0],
+        'hdi_low_prever': referencia['hdi_low'],
+        'hdi_high_motor': resultado['hdi_high'][0],
+        'hdi_high_prever': referencia['hdi_high'],
+        'desvio_hdi': np.maximum(
+            np.abs(resultado['hdi_low'][0] - referencia['hdi_low']),
+            np.abs(resultado['hdi_high'][0] - referencia['hdi_high']),
+        ) / largura,
+    })
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+    import pickle
+    import time
+
+    from posteriori_mmap import PosterioriMmap
+    from previsao import PrevisorNegBin, horizonte
+    from registro_modelos import RegistroModelos
+
+    # Tolerâncias de --verificar: diferenças maiores indicam viés, não ruído
+    # de Monte Carlo
+    MAX_DIFERENCA_EP = 4.0
+    MAX_DESVIO_HDI = 0.1
+    # e tempo máximo de avaliar uma grade de N_CENARIOS_TEMPO cenários
+    N_CENARIOS_TEMPO = 2000
+    MAX_SEGUNDOS_CENARIOS = 1.0
+
+    parser = argparse.ArgumentParser(description="Cenários de covariáveis do modelo final")
+    parser.add_argument("--faixa", nargs=4, action="append", metavar=("COVARIAVEL", "INICIO", "FIM", "N"),
+                        help="valores brutos np.linspace(INICIO, FIM, N); padrão: média ± 2 desvios em 5 pontos")
+    parser.add_argument("--limiar", type=float, help="calcula P(Y > limiar) por mês e em algum mês")
+    parser.add_argument("--inicio", help="primeiro mês (AAAA-MM); padrão: janeiro após o treino")
+    parser.add_argument("--meses", type=int, default=12, help="número de meses do horizonte")
+    parser.add_argument("--amostras", type=int, default=1000, help="amostras da posteriori por cenário")
+    parser.add_argument("--prob", type=float, default=0.95, help="probabilidade do HDI")
+    parser.add_argument("--seed", type=int, default=123)
+    parser.add_argument("--modelo", default="latest", help='versão do registro: "latest", "pinned" ou um nome')
+    parser.add_argument("--verificar", action="store_true",
+                        help="compara cada cenário com PrevisorNegBin.prever (mesmo X e seed) "
+                             "e mede o tempo de uma grade de 2000 cenários")
+    parser.add_argument("--saida", help="grava o resultado em CSV")
+    args = parser.parse_args()
+
+    registro = RegistroModelos()
+    versao = registro.resolver(args.modelo)
+    DATA_DIR = registro.diretorio(versao)
+    with open(f"{DATA_DIR}/model_config.json", "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if os.path.exists(f"{DATA_DIR}/idata/index.json"):
+        idata = PosterioriMmap(f"{DATA_DIR}/idata")
+    elif os.path.exists(f"{DATA_DIR}/idata_modelofinal.pkl"):
+        with open(f"{DATA_DIR}/idata_modelofinal.pkl", "rb") as f:
+            idata = pickle.load(f)
+    else:
+        parser.error(f"a versão '{versao}' não tem amostras da posteriori (idata/ ou idata_modelofinal.pkl)")
+    anos = registro.anos_treino(versao)
+    if anos is None:
+        parser.error(f"a versão '{versao}' não informa os anos de treino "
+                     "(anos_treino no model_config.json ou predicoes_in_sample.json)")
+    try:
+        previsor = PrevisorNegBin.de_inferencedata(idata, anos=anos)
+    except ValueError as erro:
+        parser.error(f"versão '{versao}': {erro}")
+    metadata = config["covariate_metadata"]
+
+    if args.inicio:
+        ano_inicio, mes_inicio = (int(v) for v in args.inicio.split("-"))
+    else:
+        ano_inicio, mes_inicio = previsor.anos[-1] + 1, 1
+    periodos = horizonte(ano_inicio, mes_inicio, args.meses)
+
+    faixas = {}
+    for nome, inicio, fim, n in args.faixa or []:
+        if nome not in metadata["covariate_cols"]:
+            parser.error(f"covariável '{nome}' não está no modelo ({', '.join(metadata['covariate_cols'])})")
+        faixas[nome] = np.linspace(float(inicio), float(fim), int(n))
+    # Covariáveis sem --faixa: média ± 2 desvios (ou só a média, se outra foi dada)
+    for nome in metadata["covariate_cols"]:
+        media, desvio = metadata["means"][nome], metadata["stds"][nome]
+        faixas.setdefault(nome, [media] if args.faixa else np.linspace(media - 2 * desvio, media + 2 * desvio, 5))
+    grade = grade_cenarios(**{nome: faixas[nome] for nome in metadata["covariate_cols"]})
+
+    if args.verificar:
+        falhas = 0
+        for _, cenario in grade.iterrows():
+            comparacao = comparar_com_prever(previsor, metadata, periodos, cenario.to_numpy(),
+                                             prob=args.prob, seed=args.seed)
+            pior_ep = comparacao["diferenca_ep"].abs().max()
+            pior_hdi = comparacao["desvio_hdi"].max()
+            ok = pior_ep <= MAX_DIFERENCA_EP and pior_hdi <= MAX_DESVIO_HDI
+            falhas += not ok
+            descricao = ", ".join(f"{nome}={valor:g}" for nome, valor in cenario.items())
+            print(f"{descricao}: mediana até {pior_ep:.2f} EP, HDI até {pior_hdi:.1%} da largura "
+                  f"{'ok' if ok else 'FALHOU'}")
+
+        # Tempo: primeira covariável em N_CENARIOS_TEMPO valores, demais na média
+        nome = metadata["covariate_cols"][0]
+        media, desvio = metadata["means"][nome], metadata["stds"][nome]
+        grade_tempo = grade_cenarios(**{nome: np.linspace(media - 2 * desvio, media + 2 * desvio, N_CENARIOS_TEMPO)},
+                                     **{outra: [metadata["means"][outra]] for outra in metadata["covariate_cols"][1:]})
+        motor = MotorCenarios(previsor, metadata, periodos, n_amostras=args.amostras, seed=args.seed)
+        inicio = time.perf_counter()
+        motor.avaliar(grade_tempo, limiar=args.limiar, prob=args.prob)
+        segundos = time.perf_counter() - inicio
+        ok = segundos <= MAX_SEGUNDOS_CENARIOS
+        falhas += not ok
+        print(f"{N_CENARIOS_TEMPO} cenários × {len(periodos)} meses × {motor.n_amostras} amostras: "
+              f"{segundos:.2f} s (máx. {MAX_SEGUNDOS_CENARIOS:g} s) {'ok' if ok else 'FALHOU'}")
+        raise SystemExit(1 if falhas else 0)
+
+    motor = MotorCenarios(previsor, metadata, periodos, n_amostras=args.amostras, seed=args.seed)
+    resultado = motor.avaliar(grade, limiar=args.limiar, prob=args.prob)
+
+    # Uma linha por cenário e mês
+    n_cenarios, n_periodos = resultado["mediana"].shape
+    tabela = grade.loc[grade.index.repeat(n_periodos)].reset_index(drop=True)
+    periodos = np.tile(np.asarray(periodos, dtype="int64"), (n_cenarios, 1))
+    tabela["ano"], tabela["mes_num"] = periodos[:, 0], periodos[:, 1]
+    for nome in ("mediana", "hdi_low", "hdi_high", "prob_exceder"):
+        if nome in resultado:
+            tabela[nome] = resultado[nome].ravel()
+    if args.limiar is not None:
+        tabela["prob_algum_mes"] = np.repeat(resultado["prob_algum_mes"], n_periodos)
+
+    if args.saida:
+        tabela.to_csv(args.saida, index=False)
+    print(tabela.to_string(index=False))
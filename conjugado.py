@@ -0,0 +1,229 @@
+"""
+Modelo Poisson-Gamma conjugado (Modelo A do bayes.ipynb e priori de sensibilidade).
+
+Com priori Gamma(α, β) (β é a taxa) e observações y_1..y_n ~ Poisson(λ), a
+posteriori é exatamente
+
+    λ | y ~ Gamma(α + Σy, β + n)
+
+e a preditiva de uma observação nova é Binomial Negativa com
+r = α + Σy e p = (β + n) / (β + n + 1). Médias, quantis, intervalos (central
+ou HDI) e a preditiva saem em forma fechada, sem MCMC.
+
+O resumo tem os mesmos campos que o dashboard lê de
+data/bayes/resultados_bayesianos (parametros.lambda_rate, validacao,
+predicoes). Para gráficos e comparações no ArviZ (az.summary, az.waic),
+para_inferencedata gera amostras i.i.d. da posteriori exata.
+
+Uso:
+    alpha, beta = power_prior(historico, peso=0.7)
+    modelo = PoissonGamma(alpha, beta, y_obs)
+    modelo.resumo()
+"""
+
+import numpy as np
+from scipy import optimize, stats
+
+try:
+    import arviz as az
+    ARVIZ_AVAILABLE = True
+except ImportError:
+    ARVIZ_AVAILABLE = False
+
+
+# Prioris da análise de sensibilidade: (α, β)
+PRIORI_JEFFREYS = (0.5, 0.001)
+PRIORI_VAGA = (1.0, 0.001)
+
+# Massa deixada nas caudas ao varrer o suporte da preditiva (HDI discreto)
+_CAUDA_SUPORTE = 1e-12
+
+
+def power_prior(historico, peso=0.7, alpha0=1.0):
+    """Parâmetros (α, β) da power prior Gamma(α0 + peso·Σy_hist, peso·n_hist)"""
+    historico = np.asarray(historico, dtype='float64')
+    return alpha0 + peso * historico.sum(), peso * len(historico)
+
+
+def _hdi_continuo(dist, prob):
+    """Menor intervalo com massa prob de uma distribuição contínua unimodal"""
+    largura = lambda inferior: dist.ppf(inferior + prob) - dist.ppf(inferior)
+    ajuste = optimize.minimize_scalar(
+        largura, bounds=(0.0, 1.0 - prob), method='bounded',
+        options={'xatol': 1e-10},
+    )
+    inferior = ajuste.x
+    return float(dist.ppf(inferior)), float(dist.ppf(inferior + prob))
+
+
+def _hdi_discreto(dist, prob):
+    """Menor conjunto de valores com massa >= prob (contínuo por unimodalidade)"""
+    suporte = np.arange(dist.ppf(_CAUDA_SUPORTE), dist.ppf(1 - _CAUDA_SUPORTE) + 1)
+    pmf = dist.pmf(suporte)
+    ordem = np.argsort(pmf)[::-1]
+    n = np.searchsorted(np.cumsum(pmf[ordem]), prob) + 1
+    escolhidos = suporte[ordem[:n]]
+    return float(escolhidos.min()), float(escolhidos.max())
+
+
+class PoissonGamma:
+    """Posteriori exata Gamma(α + Σy, β + n) da taxa de um processo Poisson"""
+
+    def __init__(self, alpha_prior, beta_prior, y=()):
+        if alpha_prior <= 0 or beta_prior <= 0:
+            raise ValueError("alpha_prior e beta_prior devem ser positivos")
+        self.alpha_prior = float(alpha_prior)
+        self.beta_prior = float(beta_prior)
+        self.y = np.asarray(y, dtype='float64')
+        if (self.y < 0).any():
+            raise ValueError("Contagens negativas em y")
+        self.alpha = self.alpha_prior + self.y.sum()
+        self.beta = self.beta_prior + len(self.y)
+
+    def atualizar(self, y_novos):
+        """Novo modelo com as observações acrescentadas (mesma priori)"""
+        return PoissonGamma(self.alpha_prior, self.beta_prior,
+                            np.concatenate([self.y, np.asarray(y_novos, dtype='float64')]))
+
+    # =========================================================================
+    # POSTERIORI DE λ
+    # =========================================================================
+
+    @property
+    def posteriori(self):
+        """Distribuição congelada (scipy) da posteriori de λ"""
+        return stats.gamma(a=self.alpha, scale=1 / self.beta)
+
+    @property
+    def media(self):
+        return self.alpha / self.beta
+
+    @property
+    def mediana(self):
+        return float(self.posteriori.median())
+
+    @property
+    def std(self):
+        return np.sqrt(self.alpha) / self.beta
+
+    def quantis(self, q):
+        return self.posteriori.ppf(q)
+
+    def intervalo(self, prob=0.95, tipo='central'):
+        """Intervalo de credibilidade de λ: 'central' (caudas iguais) ou 'hdi'"""
+        if tipo == 'central':
+            cauda = (1 - prob) / 2
+            return tuple(float(v) for v in self.posteriori.ppf([cauda, 1 - cauda]))
+        if tipo == 'hdi':
+            # Com α <= 1 a densidade é decrescente e o HDI começa em zero
+            if self.alpha <= 1:
+                return 0.0, float(self.posteriori.ppf(prob))
+            return _hdi_continuo(self.posteriori, prob)
+        raise ValueError(f"Tipo de intervalo '{tipo}' não suportado. Use 'central' ou 'hdi'")
+
+    # =========================================================================
+    # PREDITIVA POSTERIORI
+    # =========================================================================
+
+    @property
+    def preditiva(self):
+        """Binomial Negativa (scipy) de uma observação nova"""
+        return stats.nbinom(n=self.alpha, p=self.beta / (self.beta + 1))
+
+    def intervalo_preditivo(self, prob=0.95, tipo='central'):
+        """Intervalo preditivo de uma observação nova: 'central' ou 'hdi'"""
+        if tipo == 'central':
+            cauda = (1 - prob) / 2
+            return tuple(float(v) for v in self.preditiva.ppf([cauda, 1 - cauda]))
+        if tipo == 'hdi':
+            return _hdi_discreto(self.preditiva, prob)
+        raise ValueError(f"Tipo de intervalo '{tipo}' não suportado. Use 'central' ou 'hdi'")
+
+    def prob_exceder(self, limiar):
+        """P(y_novo > limiar) pela preditiva"""
+        return float(self.preditiva.sf(limiar))
+
+    # =========================================================================
+    # RESUMOS NO FORMATO DE data/bayes/resultados_bayesianos
+    # =========================================================================
+
+    def resumo_parametro(self):
+        """media, mediana, std e intervalo central de 95% de λ"""
+        inferior, superior = self.intervalo(0.95)
+        return {
+            'media': float(self.media),
+            'mediana': self.mediana,
+            'std': float(self.std),
+            'hdi_2_5': inferior,
+            'hdi_97_5': superior,
+        }
+
+    def predicoes(self, n=None):
+        """Média e intervalo de 95% da preditiva para n pontos (padrão: len(y))"""
+        n = len(self.y) if n is None else n
+        inferior, superior = self.intervalo_preditivo(0.95)
+        return {
+            'y_pred_mean': [float(self.preditiva.mean())] * n,
+            'y_pred_lower': [inferior] * n,
+            'y_pred_upper': [superior] * n,
+        }
+
+    def validacao(self, y=None):
+        """RMSE e cobertura do intervalo preditivo de 95% sobre y (padrão: dados do ajuste)"""
+        y = self.y if y is None else np.asarray(y, dtype='float64')
+        inferior, superior = self.intervalo_preditivo(0.95)
+        dentro = (y >= inferior) & (y <= superior)
+        return {
+            'rmse': float(np.sqrt(np.mean((y - self.preditiva.mean()) ** 2))),
+            'cobertura_ic95': float(dentro.mean()),
+            'pontos_dentro_ic': int(dentro.sum()),
+            'total_pontos': int(len(y)),
+        }
+
+    def sensibilidade(self):
+        """Entrada de analise_sensibilidade: media, std e largura do IC 95%"""
+        inferior, superior = self.intervalo(0.95)
+        return {
+            'media': float(self.media),
+            'std': float(self.std),
+            'ic_width': superior - inferior,
+        }
+
+    def resumo(self):
+        """Campos de resultados['modelos']['poisson'] calculados em forma fechada"""
+        return {
+            'parametros': {'lambda_rate': self.resumo_parametro()},
+            # Posteriori exata: não há cadeias a diagnosticar
+            'diagnosticos': {'rhat_ok': True, 'ess_ok': True, 'convergencia': 'Exata (conjugada)'},
+            'validacao': self.validacao(),
+            'predicoes': self.predicoes(),
+        }
+
+    # =========================================================================
+    # AMOSTRAS (GRÁFICOS E ARVIZ)
+    # =========================================================================
+
+    def amostrar(self, n, seed=None):
+        """n amostras i.i.d. da posteriori de λ"""
+        return self.posteriori.rvs(size=n, random_state=np.random.default_rng(seed))
+
+    def para_inferencedata(self, draws=5000, chains=4, seed=42):
+        """
+        InferenceData com amostras exatas de λ, preditiva e log-verossimilhança.
+
+        Substitui o trace do pm.sample nas células que usam az.summary,
+        az.plot_trace e az.waic.
+        """
+        if not ARVIZ_AVAILABLE:
+            raise ImportError("arviz não está instalado")
+        rng = np.random.default_rng(seed)
+        lam = self.posteriori.rvs(size=(chains, draws), random_state=rng)
+        y_pred = rng.poisson(lam[..., None], size=(chains, draws, len(self.y)))
+        log_lik = stats.poisson.logpmf(self.y, lam[..., None])
+        return az.from_dict(
+            posterior={'lambda_rate': lam},
+            posterior_predictive={'ocorrencias': y_pred},
+            log_likelihood={'ocorrencias': log_lik},
+            observed_data={'ocorrencias': self.y},
+            dims={'ocorrencias': ['obs']},
+        )
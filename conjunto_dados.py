@@ -0,0 +1,191 @@
+"""
+Dataset da PMDF compartilhado entre sessões e páginas.
+
+Um único ConjuntoDados por processo (servido por functions.conjunto_dados via
+st.cache_resource) guarda o dataframe preparado, já ordenado por ano/mês e com
+a coluna tempo; os totais (total_furtos, total_roubos, ...) já vêm calculados
+por dados.preparar_dados (ver indicadores.py).
+
+As páginas recebem visões filtradas e memoizadas em vez de copiar e alterar o
+dataframe a cada rerun; agregações e correlações saem do cubo (cubo.py) e das
+estatísticas suficientes (estatisticas_suficientes.py), construídos uma vez
+por versão dos dados. Com o Copy-on-Write do pandas as visões são somente
+leitura na prática: uma escrita acidental em uma sessão gera uma cópia local
+e não altera o objeto compartilhado.
+
+Cubo e estatísticas do CSV padrão são persistidos ao lado do cache Parquet
+(<csv>.cubo.pkl, <csv>.estatisticas.pkl) com o fingerprint do CSV. Um
+processo novo os recarrega em vez de reagregar o histórico, e
+ingestao.anexar_meses incorpora só o delta (incorporar_agregados).
+"""
+
+import os
+import pickle
+import threading
+import numpy as np
+import pandas as pd
+
+from cubo import CuboAgregado, incorporar_celulas
+from dados import (
+    CSV_PATH, carregar_dados, fingerprint_arquivo, fingerprint_cache_atual, fingerprint_confere
+)
+from estatisticas_suficientes import EstatisticasSuficientes, incorporar_somas
+from memo import MemoLRU
+
+# As visões e os resultados do cubo são compartilhados entre sessões e só
+# ficam protegidos de escritas com Copy-on-Write (sempre ativo no pandas >= 3)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+
+def caminho_agregado(nome, caminho_csv=CSV_PATH):
+    return f"{os.path.splitext(caminho_csv)[0]}.{nome}.pkl"
+
+
+def salvar_agregado(nome, estado, fingerprint, caminho_csv=CSV_PATH):
+    """Grava o estado de um agregado com o fingerprint do CSV que o originou"""
+    caminho = caminho_agregado(nome, caminho_csv)
+    tmp = f"{caminho}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump({'fingerprint': fingerprint, 'estado': estado}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, caminho)
+
+
+def _ler_agregado(nome, caminho_csv):
+    try:
+        with open(caminho_agregado(nome, caminho_csv), 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def carregar_agregado(nome, caminho_csv=CSV_PATH):
+    """Estado persistido de um agregado, se corresponder ao CSV atual; senão None"""
+    salvo = _ler_agregado(nome, caminho_csv)
+    if salvo is None or not fingerprint_confere(salvo['fingerprint'], caminho_csv):
+        return None
+    return salvo['estado']
+
+
+def incorporar_agregados(delta, anterior, fingerprint, caminho_csv=CSV_PATH):
+    """
+    Soma o delta preparado aos agregados persistidos da versão `anterior`.
+
+    Agregados ausentes ou de outra versão ficam como estão: serão
+    reconstruídos (e persistidos) no próximo carregamento do ConjuntoDados.
+    """
+    for nome, incorporar in (('cubo', incorporar_celulas), ('estatisticas', incorporar_somas)):
+        salvo = _ler_agregado(nome, caminho_csv)
+        if salvo is None or salvo['fingerprint'].get('sha256') != anterior.get('sha256'):
+            continue
+        salvar_agregado(nome, incorporar(salvo['estado'], delta), fingerprint, caminho_csv)
+
+
+def _chave(valores):
+    """Normaliza um filtro (lista, tupla ou None) para uso como chave"""
+    if not valores:
+        return None
+    return tuple(sorted(str(v) for v in valores))
+
+
+class ConjuntoDados:
+    """Dataframe preparado, somente leitura, com visões filtradas por ano/município"""
+
+    def __init__(self, df=None):
+        # Agregados persistidos só valem para o CSV padrão; o fingerprint é
+        # tomado antes da leitura, de modo que um CSV alterado no meio do
+        # caminho só invalida os agregados gravados
+        self._fingerprint = None
+        if df is None:
+            self._fingerprint = fingerprint_cache_atual() or fingerprint_arquivo(CSV_PATH)
+            df = carregar_dados()
+
+        base = df.sort_values(['ano', 'mes'], kind='stable').reset_index(drop=True)
+        base['tempo'] = np.arange(len(base))
+
+        self._base = base
+        self._visoes = MemoLRU()
+        self._cubo = None
+        self._estatisticas = None
+        self._lock = threading.Lock()
+
+    @property
+    def df(self):
+        """Dataframe completo (não alterar)"""
+        return self._base
+
+    @property
+    def anos(self):
+        return self._base['ano'].unique().tolist()
+
+    @property
+    def municipios(self):
+        return self._base['municipio'].unique().tolist()
+
+    @property
+    def cubo(self):
+        """Cubo de agregados (indicador × ano × mês), construído no primeiro uso"""
+        if self._cubo is None:
+            with self._lock:
+                if self._cubo is None:
+                    estado = self._carregar('cubo')
+                    if estado is not None:
+                        self._cubo = CuboAgregado.de_estado(estado, self._base)
+                    else:
+                        self._cubo = CuboAgregado(self._base)
+                        self._salvar('cubo', self._cubo)
+        return self._cubo
+
+    @property
+    def estatisticas(self):
+        """Estatísticas suficientes para médias e correlações, construídas no primeiro uso"""
+        if self._estatisticas is None:
+            with self._lock:
+                if self._estatisticas is None:
+                    estado = self._carregar('estatisticas')
+                    if estado is not None:
+                        self._estatisticas = EstatisticasSuficientes.de_estado(estado)
+                    else:
+                        self._estatisticas = EstatisticasSuficientes(self._base)
+                        self._salvar('estatisticas', self._estatisticas)
+        return self._estatisticas
+
+    def _carregar(self, nome):
+        return carregar_agregado(nome) if self._fingerprint else None
+
+    def _salvar(self, nome, agregado):
+        if not self._fingerprint:
+            return
+        try:
+            salvar_agregado(nome, agregado.estado(), self._fingerprint)
+        except OSError:
+            # Diretório somente leitura: segue sem persistir
+            pass
+
+    def visao(self, anos=None, municipios=None):
+        """
+        Retorna as linhas dos anos/municípios selecionados.
+
+        Listas vazias ou None significam "sem filtro". As combinações de
+        filtros usadas mais recentemente (memo.MAX_ENTRADAS) ficam guardadas
+        e são reaproveitadas por todas as sessões.
+        """
+        chave = (_chave(anos), _chave(municipios))
+        return self._visoes.obter(chave, lambda: self._filtrar(*chave))
+
+    def _filtrar(self, anos, municipios):
+        base = self._base
+        if anos is None and municipios is None:
+            return base
+
+        mascara = np.ones(len(base), dtype=bool)
+        if anos is not None:
+            mascara &= base['ano'].isin(anos).to_numpy()
+        if municipios is not None:
+            mascara &= base['municipio'].astype(str).isin(municipios).to_numpy()
+
+        # Seleções contíguas (ex.: um único ano) viram fatias sem cópia dos dados
+        posicoes = np.flatnonzero(mascara)
+        if len(posicoes) and posicoes[-1] - posicoes[0] + 1 == len(posicoes):
+            return base.iloc[posicoes[0]:posicoes[-1] + 1].reset_index(drop=True)
+        return base[mascara].reset_index(drop=True)
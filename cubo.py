@@ -0,0 +1,216 @@
+"""
+Cubo de agregados da PMDF (indicador × ano × mês).
+
+As páginas fazem as mesmas agregações (por ano, por ano/mês, por mês) a cada
+rerun. O cubo guarda, para cada célula município/ano/mês e cada indicador
+numérico, as estatísticas combináveis (contagem, soma, soma dos quadrados,
+mínimo e máximo). Qualquer consulta por ano, mês, ano/mês ou total é um
+rollup dessas células; média e desvio padrão saem das somas.
+
+A mediana não é combinável: é calculada sobre as linhas originais. As
+consultas mais recentes (memo.MAX_ENTRADAS) ficam memoizadas, então reruns
+com os mesmos filtros não recalculam nada.
+
+As células são persistíveis (estado / de_estado) e combináveis: meses novos
+entram com incorporar_celulas, que agrega só o delta e o junta às células
+existentes (contagens e somas somadas, mínimos e máximos comparados).
+
+Uso:
+    cubo = CuboAgregado(df)
+    cubo.consultar('ocor_atend', por=['ano'])                 # soma por ano
+    cubo.consultar('ocor_atend', por=['mes'], estatisticas=['mean', 'std'])
+    cubo.tabela('ocor_atend', linhas='ano', colunas='mes')    # pivot ano × mês
+"""
+
+import numpy as np
+import pandas as pd
+
+from memo import MemoLRU
+
+
+# Dimensões das células; municipio permite filtrar sem perder o rollup
+DIMENSOES = ['municipio', 'ano', 'mes']
+
+ESTATISTICAS = ['sum', 'mean', 'median', 'std', 'min', 'max', 'count']
+
+# Colunas numéricas que não são indicadores
+_IGNORAR = ['tempo']
+
+
+def _lista(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        return [valor]
+    return list(valor)
+
+
+def _chave_filtro(valores):
+    if not valores:
+        return None
+    return tuple(sorted(str(v) for v in valores))
+
+
+def _agregar_celulas(linhas, indicadores):
+    """Estatísticas combináveis por célula (município/ano/mês)"""
+    valores = linhas[indicadores].astype('float64')
+    chaves = [linhas[d] for d in DIMENSOES]
+    grupos = valores.groupby(chaves, observed=True, sort=True)
+    return {
+        'count': grupos.count(),
+        'sum': grupos.sum(),
+        'sumsq': (valores ** 2).groupby(chaves, observed=True, sort=True).sum(),
+        'min': grupos.min(),
+        'max': grupos.max(),
+    }
+
+
+def incorporar_celulas(estado, delta):
+    """Estado do cubo (ver CuboAgregado.estado) com as linhas de delta incluídas"""
+    novas = _agregar_celulas(delta, estado['indicadores'])
+    celulas = {}
+    for nome, tabela in estado['celulas'].items():
+        juntas = pd.concat([tabela, novas[nome]])
+        # Células repetidas (mesmo município/ano/mês em outra UF) são combinadas
+        combinar = 'sum' if nome in ('count', 'sum', 'sumsq') else nome
+        celulas[nome] = juntas.groupby(level=DIMENSOES, observed=True, sort=True).agg(combinar)
+    return {**estado, 'celulas': celulas}
+
+
+class CuboAgregado:
+    """Estatísticas pré-agregadas por município/ano/mês com consultas memoizadas"""
+
+    def __init__(self, df, indicadores=None):
+        if indicadores is None:
+            indicadores = [
+                c for c in df.select_dtypes('number').columns
+                if c not in DIMENSOES and c not in _IGNORAR
+            ]
+        self.indicadores = list(indicadores)
+        # Indicadores inteiros voltam a ser inteiros em soma/mínimo/máximo sem NaN
+        self._inteiros = {c for c in self.indicadores if pd.api.types.is_integer_dtype(df[c])}
+        self._linhas = df[DIMENSOES + self.indicadores]
+        self._celulas = _agregar_celulas(self._linhas, self.indicadores)
+        self._memo = MemoLRU()
+
+    def estado(self):
+        """Células e metadados, sem as linhas originais (para persistir)"""
+        return {
+            'indicadores': self.indicadores,
+            'inteiros': sorted(self._inteiros),
+            'celulas': self._celulas,
+        }
+
+    @classmethod
+    def de_estado(cls, estado, df):
+        """Cubo com células já agregadas; df fornece as linhas para a mediana"""
+        cubo = cls.__new__(cls)
+        cubo.indicadores = list(estado['indicadores'])
+        cubo._inteiros = set(estado['inteiros'])
+        cubo._linhas = df[DIMENSOES + cubo.indicadores]
+        cubo._celulas = estado['celulas']
+        cubo._memo = MemoLRU()
+        return cubo
+
+    def consultar(self, indicadores, por=('ano',), estatisticas=('sum',), anos=None, municipios=None):
+        """
+        Agrega os indicadores pelas dimensões em `por` (subconjunto de ano/mes/municipio).
+
+        Com uma única estatística as colunas têm o nome dos indicadores; com um
+        único indicador e várias estatísticas, o nome das estatísticas; nos
+        demais casos as colunas são (indicador, estatística). O resultado é uma
+        cópia rasa do valor memoizado e pode ser alterado pela página.
+        """
+        indicadores = _lista(indicadores)
+        estatisticas = _lista(estatisticas)
+        por = _lista(por) or []
+        invalidas = [e for e in estatisticas if e not in ESTATISTICAS]
+        if invalidas:
+            raise ValueError(f"Estatísticas não suportadas: {invalidas}. Use {ESTATISTICAS}")
+
+        chave = (tuple(indicadores), tuple(por), tuple(estatisticas),
+                 _chave_filtro(anos), _chave_filtro(municipios))
+        resultado = self._memo.obter(
+            chave, lambda: self._calcular(indicadores, por, estatisticas, anos, municipios)
+        )
+        # Copy-on-Write: alterações de quem chamou não chegam ao memo
+        return resultado.copy(deep=False)
+
+    def tabela(self, indicador, linhas='ano', colunas='mes', estatistica='sum', anos=None, municipios=None):
+        """Tabela cruzada (pivot) de um indicador, ex.: ano × mês"""
+        agregado = self.consultar(indicador, por=[linhas, colunas], estatisticas=[estatistica],
+                                  anos=anos, municipios=municipios)
+        return agregado.set_index([linhas, colunas])[indicador].unstack(colunas)
+
+    def _filtrar(self, tabela, anos, municipios, nivel=True):
+        """Restringe células (nivel=True) ou linhas originais aos filtros"""
+        mascara = np.ones(len(tabela), dtype=bool)
+        for dim, valores in (('ano', anos), ('municipio', municipios)):
+            if not valores:
+                continue
+            serie = tabela.index.get_level_values(dim) if nivel else tabela[dim]
+            mascara &= pd.Index(serie).astype(str).isin([str(v) for v in valores])
+        return tabela[mascara]
+
+    def _calcular(self, indicadores, por, estatisticas, anos, municipios):
+        celulas = {
+            nome: self._filtrar(tabela[indicadores], anos, municipios)
+            for nome, tabela in self._celulas.items()
+        }
+
+        def rollup(nome, funcao):
+            tabela = celulas[nome]
+            if not por:
+                return tabela.agg(funcao).to_frame().T
+            return tabela.groupby(level=por, observed=True, sort=True).agg(funcao)
+
+        n = rollup('count', 'sum')
+        soma = rollup('sum', 'sum')
+        partes = {}
+        for estatistica in estatisticas:
+            if estatistica == 'count':
+                partes[estatistica] = n.astype('int64')
+            elif estatistica == 'sum':
+                partes[estatistica] = soma
+            elif estatistica == 'mean':
+                partes[estatistica] = soma / n.where(n > 0)
+            elif estatistica == 'std':
+                soma_q = rollup('sumsq', 'sum')
+                variancia = (soma_q - soma ** 2 / n.where(n > 0)) / (n - 1).where(n > 1)
+                partes[estatistica] = np.sqrt(variancia.clip(lower=0))
+            elif estatistica in ('min', 'max'):
+                partes[estatistica] = rollup(estatistica, estatistica)
+            elif estatistica == 'median':
+                partes[estatistica] = self._mediana(indicadores, por, anos, municipios, n.index)
+
+        for estatistica in ('sum', 'min', 'max'):
+            if estatistica in partes:
+                partes[estatistica] = self._restaurar_inteiros(partes[estatistica])
+
+        if len(estatisticas) == 1:
+            resultado = partes[estatisticas[0]]
+        elif len(indicadores) == 1:
+            resultado = pd.DataFrame({e: partes[e][indicadores[0]] for e in estatisticas})
+        else:
+            resultado = pd.concat(partes, axis=1).swaplevel(axis=1)
+            resultado = resultado[[(i, e) for i in indicadores for e in estatisticas]]
+
+        if not por:
+            return resultado.reset_index(drop=True)
+        return resultado.reset_index()
+
+    def _restaurar_inteiros(self, tabela):
+        tipos = {
+            c: 'int64' for c in tabela.columns
+            if c in self._inteiros and tabela[c].notna().all()
+        }
+        return tabela.astype(tipos) if tipos else tabela
+
+    def _mediana(self, indicadores, por, anos, municipios, indice):
+        """Mediana sobre as linhas originais (não combinável a partir das células)"""
+        linhas = self._filtrar(self._linhas, anos, municipios, nivel=False)
+        valores = linhas[indicadores].astype('float64')
+        if not por:
+            return valores.median().to_frame().T.set_axis(indice)
+        mediana = valores.groupby([linhas[d] for d in por], observed=True, sort=True).median()
+        return mediana.reindex(indice)
@@ -0,0 +1,263 @@
+"""
+Carregamento e preparação dos dados da PMDF.
+
+Módulo sem dependência do Streamlit: é usado pelas páginas (via
+functions.load_data) e pelos scripts de treinamento. Os tipos das colunas
+seguem o esquema declarado em esquema.py.
+
+O dataframe preparado é persistido em Parquet ao lado do CSV. O cache é
+identificado pelo tamanho, mtime e hash SHA-256 do CSV de origem, de modo
+que processos novos (cold start, réplicas extras) fazem uma única leitura
+colunar em vez de re-parsear o CSV.
+
+Meses anexados (ingestao.anexar_meses) não regravam o cache: cada delta vira
+um arquivo <cache>.delta-<ns>.parquet cujo fingerprint aponta (campo
+'anterior') para o SHA-256 da parte anterior. A leitura segue essa cadeia a
+partir do arquivo principal; deltas fora dela (de um cache já regravado) são
+ignorados. Acima de _MAX_DELTAS o cache é compactado em um único arquivo.
+"""
+
+import os
+import json
+import time
+import hashlib
+import pandas as pd
+
+from esquema import ler_csv, aplicar_esquema, normalizar_categorias
+from indicadores import calcular_indicadores
+
+# pyarrow é opcional: sem ele o cache colunar é simplesmente desativado
+try:
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+CSV_PATH = 'data/PMDF_ocorrencias_2022-2024.csv'
+
+# Incrementar sempre que preparar_dados mudar, para invalidar caches antigos
+VERSAO_PREPARO = 3
+
+# Chave usada nos metadados do Parquet
+_CHAVE_METADADOS = b'pmdf_fingerprint'
+
+# Deltas encadeados ao cache antes de compactá-lo em um único arquivo
+_MAX_DELTAS = 12
+
+MES_NUM = {
+    'JANEIRO': 1, 'FEVEREIRO': 2, 'MARÇO': 3,
+    'ABRIL': 4, 'MAIO': 5, 'JUNHO': 6,
+    'JULHO': 7, 'AGOSTO': 8, 'SETEMBRO': 9,
+    'OUTUBRO': 10, 'NOVEMBRO': 11, 'DEZEMBRO': 12
+}
+
+MESES_PT = {
+    'JANEIRO': 'Janeiro', 'FEVEREIRO': 'Fevereiro', 'MARÇO': 'Março',
+    'ABRIL': 'Abril', 'MAIO': 'Maio', 'JUNHO': 'Junho',
+    'JULHO': 'Julho', 'AGOSTO': 'Agosto', 'SETEMBRO': 'Setembro',
+    'OUTUBRO': 'Outubro', 'NOVEMBRO': 'Novembro', 'DEZEMBRO': 'Dezembro'
+}
+
+MESES_ORDEM = list(MES_NUM.keys())
+
+
+def versao_dados(caminho_csv=CSV_PATH):
+    """Identificador barato da versão do CSV (tamanho e mtime), para chaves de cache"""
+    try:
+        info = os.stat(caminho_csv)
+    except OSError:
+        return None
+    return (info.st_size, info.st_mtime_ns)
+
+
+def caminho_cache(caminho_csv=CSV_PATH):
+    """Caminho do cache Parquet correspondente a um CSV"""
+    return os.path.splitext(caminho_csv)[0] + '.parquet'
+
+
+def preparar_dados(df):
+    """Cria as colunas derivadas (data, mes_nome, mes ordenado, indicadores) a partir do CSV bruto"""
+    # Criar coluna de data a partir de ano e número do mês (sem concatenar strings)
+    df['data'] = pd.to_datetime(pd.DataFrame({
+        'year': df['ano'].astype(int),
+        'month': df['mes'].map(MES_NUM).astype(int),
+        'day': 1
+    }))
+    # Ordenar por data
+    df = df.sort_values('data', kind='stable').reset_index(drop=True)
+    # Traduzir meses para português
+    df['mes_nome'] = df['mes'].map(MESES_PT)
+
+    df['ano'] = df['ano'].astype(str)
+
+    # Ordem correta dos meses
+    df['mes'] = pd.Categorical(df['mes'], categories=MESES_ORDEM, ordered=True)
+
+    # Totais declarados em indicadores.py, calculados uma vez e guardados no cache
+    return calcular_indicadores(df)
+
+
+def concatenar_preparados(*frames):
+    """Concatena dataframes já preparados, mantendo os tipos do esquema e a ordem por data"""
+    df = pd.concat(frames, ignore_index=True)
+    df = aplicar_esquema(df, ignorar=('ano',))
+    df['mes_nome'] = df['mes_nome'].astype('category')
+    df = normalizar_categorias(df)
+    df['mes'] = pd.Categorical(df['mes'], categories=MESES_ORDEM, ordered=True)
+    return df.sort_values('data', kind='stable').reset_index(drop=True)
+
+
+def fingerprint_arquivo(caminho, calcular_hash=True):
+    """Retorna tamanho, mtime e (opcionalmente) o SHA-256 de um arquivo"""
+    info = os.stat(caminho)
+    fingerprint = {
+        'tamanho': info.st_size,
+        'mtime_ns': info.st_mtime_ns,
+        'versao_preparo': VERSAO_PREPARO,
+    }
+    if calcular_hash:
+        h = hashlib.sha256()
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloco)
+        fingerprint['sha256'] = h.hexdigest()
+    return fingerprint
+
+
+def _fingerprint_cache(caminho_cache_parquet):
+    """Lê apenas o rodapé do Parquet para recuperar o fingerprint salvo"""
+    metadados = pq.read_schema(caminho_cache_parquet).metadata or {}
+    bruto = metadados.get(_CHAVE_METADADOS)
+    return json.loads(bruto) if bruto else None
+
+
+def fingerprint_confere(salvo, caminho_csv=CSV_PATH):
+    """
+    Verifica se um fingerprint salvo corresponde ao CSV atual.
+
+    Tamanho e mtime iguais bastam; se apenas o mtime mudou (ex.: cópia ou
+    checkout), o hash é recalculado e decide.
+    """
+    if not salvo or salvo.get('versao_preparo') != VERSAO_PREPARO:
+        return False
+
+    atual = fingerprint_arquivo(caminho_csv, calcular_hash=False)
+    if atual['tamanho'] != salvo.get('tamanho'):
+        return False
+    if atual['mtime_ns'] == salvo.get('mtime_ns'):
+        return True
+    return fingerprint_arquivo(caminho_csv)['sha256'] == salvo.get('sha256')
+
+
+def _deltas_cache(caminho_cache_parquet):
+    """Arquivos de delta do cache, em ordem de gravação"""
+    pasta = os.path.dirname(caminho_cache_parquet) or '.'
+    prefixo = os.path.basename(os.path.splitext(caminho_cache_parquet)[0]) + '.delta-'
+    return sorted(
+        os.path.join(pasta, nome) for nome in os.listdir(pasta)
+        if nome.startswith(prefixo) and nome.endswith('.parquet')
+    )
+
+
+def _partes_cache(caminho_cache_parquet):
+    """[(arquivo, fingerprint)] do arquivo principal seguido da cadeia de deltas"""
+    partes = [(caminho_cache_parquet, _fingerprint_cache(caminho_cache_parquet))]
+    for caminho in _deltas_cache(caminho_cache_parquet):
+        salvo = _fingerprint_cache(caminho)
+        if salvo and partes[-1][1] and salvo.get('anterior') == partes[-1][1].get('sha256'):
+            partes.append((caminho, salvo))
+    return partes
+
+
+def _partes_validas(caminho_csv, caminho_cache_parquet):
+    """Partes do cache se ele corresponde ao CSV atual, senão None"""
+    if not PYARROW_AVAILABLE or not os.path.exists(caminho_cache_parquet):
+        return None
+    try:
+        partes = _partes_cache(caminho_cache_parquet)
+    except Exception:
+        return None
+    return partes if fingerprint_confere(partes[-1][1], caminho_csv) else None
+
+
+def cache_valido(caminho_csv=CSV_PATH, caminho_cache_parquet=None):
+    """Verifica se o cache Parquet corresponde ao CSV atual"""
+    caminho_cache_parquet = caminho_cache_parquet or caminho_cache(caminho_csv)
+    return _partes_validas(caminho_csv, caminho_cache_parquet) is not None
+
+
+def fingerprint_cache_atual(caminho_csv=CSV_PATH):
+    """Fingerprint do CSV registrado no cache válido (sem reler o CSV), ou None"""
+    partes = _partes_validas(caminho_csv, caminho_cache(caminho_csv))
+    return partes[-1][1] if partes else None
+
+
+def _gravar_parquet(df, fingerprint, caminho):
+    import pyarrow as pa
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[_CHAVE_METADADOS] = json.dumps(fingerprint).encode('utf-8')
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    # Escrita atômica: várias réplicas podem tentar gravar ao mesmo tempo
+    tmp = f"{caminho}.{os.getpid()}.tmp"
+    pq.write_table(tabela, tmp)
+    os.replace(tmp, caminho)
+
+
+def escrever_cache(df, fingerprint, caminho_cache_parquet):
+    """Grava o dataframe preparado em Parquet com o fingerprint nos metadados"""
+    _gravar_parquet(df, fingerprint, caminho_cache_parquet)
+    # Deltas do cache anterior saíram da cadeia (o 'anterior' deles não confere)
+    for caminho in _deltas_cache(caminho_cache_parquet):
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+def anexar_cache(delta, fingerprint, anterior, caminho_cache_parquet):
+    """
+    Encadeia um delta preparado ao cache cujo último fingerprint é `anterior`.
+
+    `fingerprint` é o do CSV já com as linhas novas. Com mais de _MAX_DELTAS
+    deltas o cache é regravado em um arquivo só (leitura colunar, sem CSV).
+    """
+    if len(_deltas_cache(caminho_cache_parquet)) >= _MAX_DELTAS:
+        partes = [pd.read_parquet(caminho) for caminho, _ in _partes_cache(caminho_cache_parquet)]
+        escrever_cache(concatenar_preparados(*partes, delta), fingerprint, caminho_cache_parquet)
+        return
+    caminho = f"{os.path.splitext(caminho_cache_parquet)[0]}.delta-{time.time_ns()}.parquet"
+    _gravar_parquet(delta, {**fingerprint, 'anterior': anterior['sha256']}, caminho)
+
+
+def carregar_dados(caminho_csv=CSV_PATH, usar_cache=True, colunas=None):
+    """
+    Carrega o dataframe preparado da PMDF.
+
+    Usa o cache Parquet quando ele é válido para o CSV atual; caso contrário
+    lê o CSV, prepara os dados e regrava o cache. `colunas` restringe a
+    leitura do cache às colunas pedidas.
+    """
+    cache = caminho_cache(caminho_csv)
+    partes = _partes_validas(caminho_csv, cache) if usar_cache else None
+    if partes:
+        frames = [pd.read_parquet(caminho, columns=colunas) for caminho, _ in partes]
+        if len(frames) == 1:
+            return frames[0]
+        if colunas is not None:
+            return pd.concat(frames, ignore_index=True)
+        return concatenar_preparados(*frames)
+
+    fingerprint = fingerprint_arquivo(caminho_csv)
+    df = preparar_dados(ler_csv(caminho_csv))
+
+    if usar_cache and PYARROW_AVAILABLE:
+        try:
+            escrever_cache(df, fingerprint, cache)
+        except OSError:
+            # Diretório somente leitura: segue sem cache
+            pass
+    return df if colunas is None else df[colunas]
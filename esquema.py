@@ -0,0 +1,91 @@
+"""
+Esquema de tipos compacto para as 40 colunas do CSV da PMDF.
+
+Por padrão o pandas lê os indicadores como int64/float64 e as chaves de
+texto como strings. Aqui os tipos são declarados uma única vez e usados por
+dados.carregar_dados, main.load_data e pelos scripts de treinamento:
+
+- chaves de texto (uf, municipio, mes, mes_ano) como category;
+- contagens como int32;
+- contagens com NaN estrutural (indicadores não divulgados em 2022) como Int32;
+- drog_kg_apr como float32.
+"""
+
+import pandas as pd
+
+
+COLUNAS_CATEGORICAS = ['uf', 'municipio', 'mes', 'mes_ano']
+
+# Indicadores que a PMDF não divulgou em 2022 (NaN estrutural)
+COLUNAS_CONTAGEM_COM_NA = [
+    'hom_tent', 'hom', 'fem', 'fem_tent', 'hom_culp', 'infant', 'furt_trans'
+]
+
+COLUNAS_FLOAT32 = ['drog_kg_apr']
+
+COLUNAS_CONTAGEM = [
+    'ocor_atend', 'flagrantes', 'paai', 'tco_pmdf', 'tco_outros',
+    'mai_detidos', 'mai_presos_flag', 'men_apre', 'med_pol', 'visit_provid',
+    'mar_penha', 'vias_fato', 'pert_sosseg',
+    'acid_tran_cvit', 'acid_tran_vit_fat', 'acid_tran_svit',
+    'furt_cel', 'furt_veic', 'furt_com', 'furt_res',
+    'roub_trans', 'roub_veic', 'roub_col', 'roub_res',
+    'arm_fogo_apre', 'arm_branc_apr', 'drog_un_apr'
+]
+
+ESQUEMA = {
+    **{col: 'category' for col in COLUNAS_CATEGORICAS},
+    'ano': 'int16',
+    **{col: 'int32' for col in COLUNAS_CONTAGEM},
+    **{col: 'Int32' for col in COLUNAS_CONTAGEM_COM_NA},
+    **{col: 'float32' for col in COLUNAS_FLOAT32},
+}
+
+
+def ler_csv(caminho):
+    """Lê o CSV da PMDF já com os tipos compactos do esquema"""
+    return pd.read_csv(caminho, dtype=ESQUEMA)
+
+
+def aplicar_esquema(df, ignorar=()):
+    """Converte as colunas presentes em df (exceto as de `ignorar`) para os tipos do esquema"""
+    tipos = {
+        col: tipo for col, tipo in ESQUEMA.items()
+        if col in df.columns and col not in ignorar
+    }
+    return df.astype(tipos)
+
+
+def normalizar_categorias(df):
+    """
+    Recria as categorias em ordem lexical, como na leitura do CSV completo.
+
+    Concatenações e leituras de várias partes acumulam as categorias na ordem
+    em que aparecem; sem isso, frames com os mesmos valores teriam tipos distintos.
+    """
+    for col in df.select_dtypes('category').columns:
+        if not df[col].cat.ordered:
+            df[col] = df[col].astype(str).astype('category')
+    return df
+
+
+def relatorio_memoria(df_antes, df_depois):
+    """
+    Compara o uso de memória (bytes) por coluna entre duas versões do dataframe.
+
+    Retorna um DataFrame com tipo e bytes antes/depois, a economia por coluna
+    e uma linha final 'TOTAL'.
+    """
+    antes = df_antes.memory_usage(deep=True, index=False)
+    depois = df_depois.memory_usage(deep=True, index=False)
+    relatorio = pd.DataFrame({
+        'tipo_antes': df_antes.dtypes.astype(str),
+        'tipo_depois': df_depois.dtypes.reindex(df_antes.columns).astype(str),
+        'bytes_antes': antes,
+        'bytes_depois': depois.reindex(antes.index),
+    })
+    relatorio.loc['TOTAL'] = ['', '', antes.sum(), depois.sum()]
+    relatorio['economia_%'] = (
+        100 * (1 - relatorio['bytes_depois'] / relatorio['bytes_antes'])
+    ).round(1)
+    return relatorio
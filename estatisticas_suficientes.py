@@ -0,0 +1,171 @@
+"""
+Estatísticas suficientes por município/ano/mês para médias, variâncias e
+correlações.
+
+Para cada célula e cada par de indicadores (i, j) são guardados, considerando
+apenas as linhas em que os dois estão presentes (deleção aos pares, como em
+DataFrame.corr):
+
+- n[i, j]: número de linhas;
+- s[i, j]: soma de x_i;
+- q[i, j]: soma de x_i²;
+- c[i, j]: soma de x_i·x_j.
+
+Qualquer filtro de anos/municípios é apenas a soma das células selecionadas,
+de modo que correlações de Pearson e p-valores saem em tempo constante em
+relação ao número de linhas do histórico. Pelo mesmo motivo, meses novos
+entram somando as células do delta (incorporar_somas), sem reler o histórico.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from memo import MemoLRU
+
+
+DIMENSOES = ['municipio', 'ano', 'mes']
+
+# Colunas numéricas que não são indicadores
+_IGNORAR = ['tempo']
+
+
+def _chave_filtro(valores):
+    if not valores:
+        return None
+    return tuple(sorted(str(v) for v in valores))
+
+
+def _somas_celula(x):
+    """n, s, q, c (k × k) de um bloco de linhas com NaN nos faltantes"""
+    presente = ~np.isnan(x)
+    m = presente.astype('float64')
+    x0 = np.where(presente, x, 0.0)
+    return (
+        m.T @ m,
+        x0.T @ m,
+        (x0 ** 2).T @ m,
+        x0.T @ x0,
+    )
+
+
+def _agregar_somas(df, indicadores):
+    """Chaves das células e array (células, 4, k, k) com n, s, q, c"""
+    x = df[indicadores].to_numpy(dtype='float64', na_value=np.nan)
+    grupos = df.groupby([df[d] for d in DIMENSOES], observed=True, sort=True).indices
+    chaves = pd.DataFrame(list(grupos.keys()), columns=DIMENSOES)
+    somas = np.stack([np.stack(_somas_celula(x[linhas])) for linhas in grupos.values()])
+    return chaves, somas
+
+
+def incorporar_somas(estado, delta):
+    """Estado (ver EstatisticasSuficientes.estado) com as linhas de delta incluídas"""
+    chaves_delta, somas_delta = _agregar_somas(delta, estado['indicadores'])
+    chaves = pd.concat([estado['chaves'], chaves_delta], ignore_index=True).astype(str)
+    # Células repetidas (mesmo município/ano/mês em outra UF) são somadas
+    grupo = chaves.groupby(DIMENSOES, sort=False).ngroup().to_numpy()
+    somas = np.zeros((grupo.max() + 1,) + somas_delta.shape[1:])
+    np.add.at(somas, grupo, np.concatenate([estado['somas'], somas_delta]))
+    primeiras = np.unique(grupo, return_index=True)[1]
+    return {**estado, 'chaves': chaves.iloc[primeiras].reset_index(drop=True), 'somas': somas}
+
+
+class EstatisticasSuficientes:
+    """Somas aos pares por célula, combináveis para qualquer subconjunto de anos/municípios"""
+
+    def __init__(self, df, indicadores=None):
+        if indicadores is None:
+            indicadores = [
+                c for c in df.select_dtypes('number').columns
+                if c not in DIMENSOES and c not in _IGNORAR
+            ]
+        self.indicadores = list(indicadores)
+        self._posicao = {c: i for i, c in enumerate(self.indicadores)}
+        self._chaves, self._somas = _agregar_somas(df, self.indicadores)
+        self._memo = MemoLRU()
+
+    def estado(self):
+        """Chaves e somas das células (para persistir)"""
+        return {'indicadores': self.indicadores, 'chaves': self._chaves, 'somas': self._somas}
+
+    @classmethod
+    def de_estado(cls, estado):
+        estatisticas = cls.__new__(cls)
+        estatisticas.indicadores = list(estado['indicadores'])
+        estatisticas._posicao = {c: i for i, c in enumerate(estatisticas.indicadores)}
+        estatisticas._chaves, estatisticas._somas = estado['chaves'], estado['somas']
+        estatisticas._memo = MemoLRU()
+        return estatisticas
+
+    def _total(self, anos=None, municipios=None):
+        """n, s, q, c somados sobre as células dos filtros (memoizado)"""
+        chave = (_chave_filtro(anos), _chave_filtro(municipios))
+        return self._memo.obter(chave, lambda: self._somar(*chave))
+
+    def _somar(self, anos, municipios):
+        mascara = np.ones(len(self._chaves), dtype=bool)
+        for dim, valores in (('ano', anos), ('municipio', municipios)):
+            if valores is not None:
+                mascara &= self._chaves[dim].astype(str).isin(valores).to_numpy()
+        return self._somas[mascara].sum(axis=0)
+
+    def _indices(self, indicadores):
+        return [self._posicao[c] for c in indicadores]
+
+    def contagem(self, indicador, anos=None, municipios=None):
+        i = self._posicao[indicador]
+        return int(self._total(anos, municipios)[0, i, i])
+
+    def media(self, indicadores, anos=None, municipios=None):
+        """Média de cada indicador (ignorando NaN)"""
+        n, s, _, _ = self._total(anos, municipios)
+        idx = self._indices(indicadores)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            valores = np.diag(s)[idx] / np.diag(n)[idx]
+        return pd.Series(valores, index=indicadores)
+
+    def variancia(self, indicadores, anos=None, municipios=None):
+        """Variância amostral (ddof=1) de cada indicador (ignorando NaN)"""
+        n, s, q, _ = self._total(anos, municipios)
+        idx = self._indices(indicadores)
+        n, s, q = np.diag(n)[idx], np.diag(s)[idx], np.diag(q)[idx]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            valores = (q - s ** 2 / n) / (n - 1)
+        valores[n < 2] = np.nan
+        return pd.Series(np.clip(valores, 0, None), index=indicadores)
+
+    def _pearson(self, indicadores, anos, municipios):
+        """Matrizes r e n aos pares para os indicadores"""
+        n, s, q, c = self._total(anos, municipios)
+        idx = np.ix_(self._indices(indicadores), self._indices(indicadores))
+        n, s, q, c = n[idx], s[idx], q[idx], c[idx]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = n * c - s * s.T
+            var = (n * q - s ** 2) * (n * q - s ** 2).T
+            r = cov / np.sqrt(var)
+        r = np.clip(r, -1, 1)
+        r[n < 2] = np.nan
+        return r, n
+
+    def correlacao(self, indicadores, anos=None, municipios=None):
+        """Matriz de correlação de Pearson aos pares (equivalente a DataFrame.corr())"""
+        r, _ = self._pearson(indicadores, anos, municipios)
+        # A diagonal é 1 por definição (evita 0.9999999 por arredondamento)
+        diagonal = np.diag(r).copy()
+        np.fill_diagonal(r, np.where(np.isnan(diagonal), np.nan, 1.0))
+        return pd.DataFrame(r, index=indicadores, columns=indicadores)
+
+    def pearson(self, x, y, anos=None, municipios=None):
+        """
+        Correlação de Pearson entre dois indicadores, com p-valor bilateral.
+
+        Retorna (r, p, n), com n o número de linhas em que ambos estão presentes.
+        """
+        r, n = self._pearson([x, y], anos, municipios)
+        r, n = float(r[0, 1]), int(n[0, 1])
+        if n < 3 or np.isnan(r):
+            return r, np.nan, n
+        if abs(r) == 1:
+            return r, 0.0, n
+        t = r * np.sqrt((n - 2) / (1 - r ** 2))
+        return r, float(2 * stats.t.sf(abs(t), n - 2)), n
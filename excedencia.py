@@ -0,0 +1,92 @@
+"""
+Índice de probabilidades de excedência da preditiva.
+
+As amostras conjuntas da preditiva (amostras × períodos) são guardadas
+ordenadas por período, junto com o máximo de cada amostra sobre o horizonte.
+Assim, para qualquer limiar t:
+
+- P(Y_mês > t) = fração das amostras do mês acima de t;
+- P(algum mês > t) = fração das amostras cujo máximo passa de t;
+
+ambas saem de uma busca binária (np.searchsorted), sem percorrer as amostras
+a cada consulta (ex.: a cada movimento do slider da página 3).
+
+Uso:
+    indice = IndiceExcedencia.de_amostras(y_samples, rotulos=mes_nomes)
+    indice.salvar('data/bayes/modelofinal_2/excedencia_2025.npz')
+    indice.prob_exceder(15000)      # um valor por mês
+    indice.prob_algum(15000)
+"""
+
+import numpy as np
+
+
+class IndiceExcedencia:
+    """Amostras ordenadas por período para consultas P(Y > t) por busca binária"""
+
+    def __init__(self, ordenadas, maximos, rotulos=None):
+        self._ordenadas = ordenadas
+        self._maximos = maximos
+        n_periodos = ordenadas.shape[0]
+        self.rotulos = list(range(n_periodos)) if rotulos is None else list(rotulos)
+        if len(self.rotulos) != n_periodos:
+            raise ValueError(f"{len(self.rotulos)} rótulos para {n_periodos} períodos")
+
+    @classmethod
+    def de_amostras(cls, amostras, rotulos=None):
+        """Índice a partir das amostras conjuntas (amostras × períodos)"""
+        amostras = np.asarray(amostras)
+        if amostras.ndim != 2:
+            raise ValueError("amostras deve ter formato (amostras × períodos)")
+        # Uma linha contígua por período: cada busca binária lê só a sua linha
+        ordenadas = np.ascontiguousarray(np.sort(amostras, axis=0).T)
+        return cls(ordenadas, np.sort(amostras.max(axis=1)), rotulos)
+
+    @property
+    def n_amostras(self):
+        return self._ordenadas.shape[1]
+
+    @property
+    def n_periodos(self):
+        return self._ordenadas.shape[0]
+
+    @staticmethod
+    def _fracao_acima(ordenadas, limiar):
+        return 1 - np.searchsorted(ordenadas, limiar, side='right') / len(ordenadas)
+
+    def prob_exceder(self, limiar, periodo=None):
+        """
+        P(Y > limiar) de cada período (array) ou de um período (índice ou rótulo).
+
+        limiar pode ser um escalar ou um array de limiares.
+        """
+        if periodo is not None:
+            i = self.rotulos.index(periodo) if periodo in self.rotulos else int(periodo)
+            return self._fracao_acima(self._ordenadas[i], limiar)
+        return np.array([self._fracao_acima(linha, limiar) for linha in self._ordenadas])
+
+    def prob_algum(self, limiar):
+        """P(ao menos um período > limiar), pelas amostras conjuntas"""
+        return self._fracao_acima(self._maximos, limiar)
+
+    def quantil(self, q, periodo):
+        """Quantil q da preditiva de um período (ex.: limites do slider)"""
+        i = self.rotulos.index(periodo) if periodo in self.rotulos else int(periodo)
+        linha = self._ordenadas[i]
+        return linha[min(int(q * len(linha)), len(linha) - 1)]
+
+    def faixa(self, q_inferior=0.01, q_superior=0.99):
+        """Faixa de limiares que cobre os quantis de todos os períodos"""
+        return (
+            min(self.quantil(q_inferior, i) for i in range(self.n_periodos)),
+            max(self.quantil(q_superior, i) for i in range(self.n_periodos)),
+        )
+
+    def salvar(self, caminho):
+        np.savez(caminho, ordenadas=self._ordenadas, maximos=self._maximos,
+                 rotulos=np.array([str(r) for r in self.rotulos]))
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho) as arquivo:
+            return cls(arquivo['ordenadas'], arquivo['maximos'], arquivo['rotulos'].tolist())
@@ -9,44 +9,46 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime
 import warnings
+import json
+import os
+import threading
+from collections import Counter
+
+from armazem import ArmazemSecoes, INDICE
+from arquivo_amostras import carregar_amostras
+from dados import MESES_ORDEM, carregar_dados, versao_dados
+from conjunto_dados import ConjuntoDados
+from excedencia import IndiceExcedencia
+from particoes import garantir_particoes, listar_particoes, ler_particoes
+from registro_modelos import RegistroModelos
+
+# Contadores de acesso aos caches de artefatos do modelo (por processo).
+# O corpo das funções cacheadas só roda numa falha (miss); os wrappers contam
+# todas as chamadas, então acertos = chamadas - falhas
+_chamadas_cache = Counter()
+_falhas_cache = Counter()
+_trava_contadores = threading.Lock()
+
+def _contar(contador, nome):
+    with _trava_contadores:
+        contador[nome] += 1
+
+def estatisticas_cache():
+    """Acertos e falhas de cada cache de artefatos desde o início do processo"""
+    with _trava_contadores:
+        return {
+            nome: {"acertos": _chamadas_cache[nome] - _falhas_cache[nome], "falhas": _falhas_cache[nome]}
+            for nome in sorted(_chamadas_cache)
+        }
 
 # Função para carregar dados
+# `versao` (tamanho/mtime do CSV) entra na chave do cache: meses anexados
+# via ingestao.anexar_meses invalidam o cache sem reiniciar o app
 @st.cache_data
-def load_data():
+def _load_data(versao):
     try:
-        df = pd.read_csv('data/PMDF_ocorrencias_2022-2024.csv')
-        
-        # Criar mapeamento de mês para número
-        mes_num = {
-            'JANEIRO': 1, 'FEVEREIRO': 2, 'MARÇO': 3,
-            'ABRIL': 4, 'MAIO': 5, 'JUNHO': 6,
-            'JULHO': 7, 'AGOSTO': 8, 'SETEMBRO': 9,
-            'OUTUBRO': 10, 'NOVEMBRO': 11, 'DEZEMBRO': 12
-        }
-        # Criar coluna de data
-        df['data'] = pd.to_datetime(
-            df['ano'].astype(str) + '-' + df['mes'].map(mes_num).astype(int).astype(str).str.zfill(2) + '-01'
-        )
-        # Ordenar por data
-        df = df.sort_values('data').reset_index(drop=True)
-        # Traduzir meses para português
-        meses_pt = {
-            'JANEIRO': 'Janeiro', 'FEVEREIRO': 'Fevereiro', 'MARÇO': 'Março',
-            'ABRIL': 'Abril', 'MAIO': 'Maio', 'JUNHO': 'Junho',
-            'JULHO': 'Julho', 'AGOSTO': 'Agosto', 'SETEMBRO': 'Setembro',
-            'OUTUBRO': 'Outubro', 'NOVEMBRO': 'Novembro', 'DEZEMBRO': 'Dezembro'
-        }
-        df['mes_nome'] = df['mes'].map(meses_pt)
-
-        # Preparar os dados
-        df['ano'] = df['ano'].astype(str)
-
-        # Criar ordem correta dos meses
-        meses_ordem = ['JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO', 
-                    'JULHO', 'AGOSTO', 'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO']
-        df['mes'] = pd.Categorical(df['mes'], categories=meses_ordem, ordered=True)
-                
-        return df
+        # Lê o cache Parquet quando válido; senão parseia o CSV e regrava o cache
+        return carregar_dados()
         
     except FileNotFoundError:
         st.error("Arquivo CSV não encontrado!")
@@ -57,6 +59,194 @@ def load_data():
         st.info("Verifique se o arquivo CSV está formatado corretamente.")
         return None
 
-df = load_data()
+def load_data():
+    return _load_data(versao_dados())
+
+# Dataset compartilhado por todas as sessões e páginas (uma instância por processo)
+# max_entries=1: ao anexar meses, a versão anterior é descartada
+@st.cache_resource(max_entries=1)
+def _conjunto_dados(versao):
+    return ConjuntoDados()
+
+def conjunto_dados():
+    return _conjunto_dados(versao_dados())
+
+# Partições disponíveis (uf/municipio/ano), sem ler os dados
+@st.cache_data
+def _listar_particoes_disponiveis(versao):
+    garantir_particoes()
+    return listar_particoes()
+
+def listar_particoes_disponiveis():
+    return _listar_particoes_disponiveis(versao_dados())
+
+# Linhas dos anos/municípios selecionados, lidas só das partições
+# correspondentes (filtros empurrados para o pyarrow). cache_resource: cada
+# combinação de filtros é lida uma vez por versão dos dados e compartilhada
+# entre sessões, então o resultado não deve ser alterado no lugar
+@st.cache_resource(max_entries=16)
+def _visao_particionada(anos, municipios, versao):
+    garantir_particoes()
+    df = ler_particoes(anos=anos, municipios=municipios)
+    return df.sort_values(['ano', 'mes'], kind='stable').reset_index(drop=True)
+
+def _chave_filtro(valores):
+    return tuple(sorted(str(v) for v in valores)) if valores else None
+
+def visao_particionada(anos=None, municipios=None):
+    return _visao_particionada(_chave_filtro(anos), _chave_filtro(municipios), versao_dados())
+
+# Índice de excedência da preditiva (amostras ordenadas por mês), gerado por
+# prever_2025.py; None quando o arquivo ainda não existe
+@st.cache_resource(max_entries=4)
+def _indice_excedencia(caminho, versao):
+    _contar(_falhas_cache, "indice_excedencia")
+    if versao is None:
+        return None
+    return IndiceExcedencia.carregar(caminho)
+
+def indice_excedencia(caminho):
+    _contar(_chamadas_cache, "indice_excedencia")
+    return _indice_excedencia(caminho, versao_dados(caminho))
+
+# Artefatos JSON opcionais do pipeline bayesiano (ex.: grade de quantis);
+# None quando o arquivo ainda não foi gerado
+@st.cache_data(max_entries=8)
+def _artefato_json(caminho, versao):
+    if versao is None:
+        return None
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def artefato_json(caminho):
+    return _artefato_json(caminho, versao_dados(caminho))
+
+# Resultados bayesianos em seções (armazem.py), lidas sob demanda; a versão
+# do index.json entra na chave, então regravar o armazém invalida o cache
+@st.cache_resource(max_entries=1)
+def _armazem_resultados(diretorio, versao):
+    return ArmazemSecoes(diretorio)
+
+def armazem_resultados(diretorio):
+    return _armazem_resultados(diretorio, versao_dados(os.path.join(diretorio, INDICE)))
+
+# Versões registradas do modelo bayesiano (registro_modelos.py) e a versão
+# fixada; a chave inclui tamanho/mtime de cada manifest.json e do registro.json
+@st.cache_data
+def _manifestos_modelo(versao):
+    registro = RegistroModelos()
+    versoes = registro.versoes()
+    return versoes, (registro.resolver("pinned") if versoes else None)
+
+def manifestos_modelo():
+    caminhos = RegistroModelos().caminhos_manifestos()
+    return _manifestos_modelo(tuple((c, versao_dados(c)) for c in caminhos))
+
+# Artefato JSON de uma versão do modelo, lido uma vez por conteúdo (SHA-256 do
+# manifesto e tamanho/mtime do arquivo) e compartilhado entre sessões; None se
+# a versão não o tiver
+@st.cache_data(max_entries=32)
+def _artefato_modelo(caminho, sha256, versao):
+    _contar(_falhas_cache, "artefato_modelo")
+    if versao is None:
+        return None
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def artefato_modelo(manifesto, nome):
+    info = manifesto["artefatos"].get(nome)
+    if info is None:
+        return None
+    _contar(_chamadas_cache, "artefato_modelo")
+    caminho = RegistroModelos().caminho(manifesto["versao"], nome)
+    return _artefato_modelo(caminho, info["sha256"], versao_dados(caminho))
+
+# Amostras compactas de uma versão do modelo (arquivo_amostras.py), ex.:
+# amostras_2025.npz; chave como em artefato_modelo. cache_resource: os arrays
+# são compartilhados entre sessões e por isso ficam somente leitura
+@st.cache_resource(max_entries=4)
+def _amostras_modelo(caminho, sha256, versao):
+    _contar(_falhas_cache, "amostras_modelo")
+    if versao is None:
+        return None
+    try:
+        amostras = carregar_amostras(caminho)
+    except ImportError as e:
+        # Arquivo comprimido com zstd em um host sem o pacote zstandard: a
+        # página mostra o aviso de amostras indisponíveis em vez de falhar
+        st.warning(f"Amostras de `{os.path.basename(caminho)}` indisponíveis: {e}")
+        return None
+    for valores in amostras.values():
+        valores.flags.writeable = False
+    return amostras
+
+def amostras_modelo(manifesto, nome):
+    info = manifesto["artefatos"].get(nome)
+    if info is None:
+        return None
+    _contar(_chamadas_cache, "amostras_modelo")
+    caminho = RegistroModelos().caminho(manifesto["versao"], nome)
+    return _amostras_modelo(caminho, info["sha256"], versao_dados(caminho))
+
+# Artefatos principais da página 3 já preparados (DataFrames ordenados, rótulos
+# e resíduos), uma vez por versão dos arquivos. cache_resource: os mesmos
+# objetos são compartilhados por todas as sessões, sem cópia a cada rerun, e
+# por isso não devem ser alterados no lugar. Editar ou regravar qualquer um
+# dos arquivos muda o tamanho/mtime na chave e invalida a entrada
+ARTEFATOS_PAGINA_MODELO = (
+    "model_config.json",
+    "posterior_summary.json",
+    "predicoes_2025.json",
+    "predicoes_in_sample.json",
+)
+
+def _ler_json(caminho):
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@st.cache_resource(max_entries=4)
+def _artefatos_modelo(diretorio, versoes):
+    _contar(_falhas_cache, "artefatos_modelo")
+    if None in versoes:
+        return None
+    model_config, posterior_summary, pred_2025, pred_in = (
+        _ler_json(os.path.join(diretorio, nome)) for nome in ARTEFATOS_PAGINA_MODELO
+    )
+
+    df_2025 = pd.DataFrame(pred_2025)
+    df_2025["mes"] = pd.Categorical(df_2025["mes"], categories=MESES_ORDEM, ordered=True)
+    df_2025 = df_2025.sort_values("mes")
+
+    # Rótulo criado ANTES de converter o mês para Categorical
+    df_in = pd.DataFrame(pred_in)
+    df_in["label_mes_ano"] = df_in["mes"] + " / " + df_in["ano"].astype(str)
+    df_in["mes"] = pd.Categorical(df_in["mes"], categories=MESES_ORDEM, ordered=True)
+    df_in = df_in.sort_values(["ano", "mes"])
+    df_in["residuo"] = df_in["ocor_atend"] - df_in["y_pred_mediana"]
+    df_in["residuo_padronizado"] = (df_in["residuo"] - df_in["residuo"].mean()) / df_in["residuo"].std()
+
+    # Série observada que o modelo ajustou (uma linha por ano/mês em df_in):
+    # heatmap ano × mês e média histórica de cada mês
+    heatmap = df_in.pivot_table(index="ano", columns="mes", values="ocor_atend",
+                                aggfunc="sum", observed=True)
+    heatmap.columns = heatmap.columns.astype(str)
+    heatmap.index = heatmap.index.astype(int)
+    media_mensal = df_in.groupby("mes", observed=True)["ocor_atend"].mean().reset_index()
+    media_mensal["mes_str"] = media_mensal["mes"].astype(str)
 
+    return {
+        "model_config": model_config,
+        "posterior_summary": posterior_summary,
+        "pred_2025": pred_2025,
+        "df_2025": df_2025,
+        "df_in": df_in,
+        "df_post": pd.DataFrame(posterior_summary),
+        "heatmap": heatmap[[m for m in MESES_ORDEM if m in heatmap.columns]],
+        "media_mensal": media_mensal,
+    }
 
+def artefatos_modelo(diretorio):
+    """Artefatos preparados da versão em diretorio; None se algum arquivo faltar"""
+    _contar(_chamadas_cache, "artefatos_modelo")
+    versoes = tuple(versao_dados(os.path.join(diretorio, nome)) for nome in ARTEFATOS_PAGINA_MODELO)
+    return _artefatos_modelo(diretorio, versoes)
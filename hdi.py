@@ -0,0 +1,392 @@
+"""
+HDIs e quantis em lote para matrizes largas de amostras (amostras × séries).
+
+Mesmo critério de az.hdi: com n amostras ordenadas e k = floor(prob·n), o HDI
+é a janela [x(i), x(i+k)] de menor largura. Para prob >= 0.5 só as n - k
+menores e as n - k maiores amostras podem ser extremos da janela; então, em
+vez de ordenar cada série inteira, np.partition separa as duas caudas e só
+elas são ordenadas (ordenação parcial). Vários níveis saem da mesma partição.
+
+As séries são processadas em blocos de colunas de até `memoria_mb`; cada bloco
+é copiado transposto para (séries × amostras) contíguo, de modo que a partição
+e a janela deslizante percorrem memória sequencial. Blocos pequenos (padrão de
+4 MB) cabem no cache e limitam a memória extra a um bloco.
+
+Quando nem a matriz de amostras cabe na memória (ex.: PPC com muitas
+observações), AcumuladorPreditiva recebe as amostras em blocos (por cadeia ou
+por grupo de draws), guarda só um histograma por série e descarta os blocos.
+
+Benchmark contra az.hdi:
+    python hdi.py --colunas 10000 100000 1000000
+"""
+
+import numpy as np
+
+
+# Acima disso, ordenar o bloco é mais rápido que particionar em cada ordem
+_MAX_ORDENS_PARTICAO = 4
+
+# Classes por série do histograma de AcumuladorPreditiva
+MAX_CLASSES = 4096
+
+
+def _blocos(n_amostras, n_colunas, itemsize, memoria_mb):
+    """Fatias de colunas cujo bloco transposto cabe em memoria_mb"""
+    por_bloco = max(1, int(memoria_mb * 2 ** 20 // (n_amostras * itemsize)))
+    for inicio in range(0, n_colunas, por_bloco):
+        yield slice(inicio, min(inicio + por_bloco, n_colunas))
+
+
+def _como_matriz(amostras, axis):
+    """(amostras × colunas) 2D e o formato das colunas para o resultado"""
+    amostras = np.moveaxis(np.asarray(amostras), axis, 0)
+    formato = amostras.shape[1:]
+    return amostras.reshape(amostras.shape[0], -1), formato
+
+
+def hdi_ordenadas(ordenadas, prob=0.95, axis=0):
+    """HDI ao longo de axis de amostras já ordenadas nele; retorna (..., 2)"""
+    n = ordenadas.shape[axis]
+    dentro = int(np.floor(prob * n))
+
+    def janela(inicio, fim):
+        indices = [slice(None)] * ordenadas.ndim
+        indices[axis] = slice(inicio, fim)
+        return ordenadas[tuple(indices)]
+
+    larguras = janela(dentro, None) - janela(None, n - dentro)
+    inicio = np.expand_dims(np.argmin(larguras, axis=axis), axis)
+    inferior = np.take_along_axis(ordenadas, inicio, axis=axis).squeeze(axis)
+    superior = np.take_along_axis(ordenadas, inicio + dentro, axis=axis).squeeze(axis)
+    return np.stack([inferior, superior], axis=-1)
+
+
+def _hdi_bloco(bloco, probs):
+    """HDIs (níveis × séries × 2) de um bloco (séries × amostras), alterado no lugar"""
+    n = bloco.shape[1]
+    dentros = [int(np.floor(p * n)) for p in probs]
+    menor_dentro = min(dentros)
+    cauda = n - menor_dentro
+
+    if cauda > menor_dentro:
+        # prob < 0.5: as caudas se sobrepõem, ordena tudo
+        bloco.sort(axis=1)
+        inferiores, superiores, base = bloco, bloco, 0
+    else:
+        # Duas partições de um único kth cada (mais rápidas que uma com dois kth):
+        # maiores amostras em [menor_dentro:], menores em [:cauda]
+        bloco.partition(menor_dentro, axis=1)
+        bloco[:, :menor_dentro].partition(cauda - 1, axis=1)
+        inferiores = np.sort(bloco[:, :cauda], axis=1)
+        superiores = np.sort(bloco[:, menor_dentro:], axis=1)
+        base = menor_dentro
+
+    linhas = np.arange(bloco.shape[0])
+    resultado = np.empty((len(probs), bloco.shape[0], 2), dtype=np.result_type(bloco, np.float64))
+    for j, dentro in enumerate(dentros):
+        janelas = n - dentro
+        larguras = superiores[:, dentro - base:dentro - base + janelas] - inferiores[:, :janelas]
+        inicio = np.argmin(larguras, axis=1)
+        resultado[j, :, 0] = inferiores[linhas, inicio]
+        resultado[j, :, 1] = superiores[linhas, inicio + dentro - base]
+    return resultado
+
+
+def hdi(amostras, probs=0.95, axis=0, memoria_mb=4):
+    """
+    HDI de cada série ao longo de axis (padrão: colunas de amostras × séries).
+
+    Com um nível retorna (..., 2); com uma lista de níveis, (níveis, ..., 2),
+    todos calculados na mesma passada. Amostras não podem conter NaN.
+    """
+    escalar = np.ndim(probs) == 0
+    probs = [float(probs)] if escalar else [float(p) for p in probs]
+    if any(not 0 < p < 1 for p in probs):
+        raise ValueError("Níveis de HDI devem estar entre 0 e 1")
+
+    matriz, formato = _como_matriz(amostras, axis)
+    n_amostras, n_colunas = matriz.shape
+    resultado = np.empty((len(probs), n_colunas, 2), dtype=np.result_type(matriz, np.float64))
+    for fatia in _blocos(n_amostras, n_colunas, matriz.itemsize, memoria_mb):
+        resultado[:, fatia] = _hdi_bloco(np.array(matriz[:, fatia].T, order='C'), probs)
+
+    resultado = resultado.reshape((len(probs),) + formato + (2,))
+    return resultado[0] if escalar else resultado
+
+
+def quantis(amostras, niveis, axis=0, memoria_mb=4):
+    """
+    Quantis (níveis × ...) de cada série, com a interpolação linear de np.quantile.
+
+    Com poucos níveis usa np.partition só nas estatísticas de ordem
+    necessárias; com muitos (ex.: grade de 1% a 99%) ordena cada bloco.
+    """
+    niveis = np.atleast_1d(np.asarray(niveis, dtype='float64'))
+    matriz, formato = _como_matriz(amostras, axis)
+    n_amostras, n_colunas = matriz.shape
+
+    posicoes = niveis * (n_amostras - 1)
+    abaixo = np.floor(posicoes).astype('int64')
+    acima = np.minimum(abaixo + 1, n_amostras - 1)
+    peso = posicoes - abaixo
+    ordens = np.unique(np.concatenate([abaixo, acima]))
+
+    resultado = np.empty((len(niveis), n_colunas))
+    for fatia in _blocos(n_amostras, n_colunas, matriz.itemsize, memoria_mb):
+        bloco = np.array(matriz[:, fatia].T, order='C')
+        if len(ordens) <= _MAX_ORDENS_PARTICAO:
+            bloco.partition(ordens, axis=1)
+        else:
+            bloco.sort(axis=1)
+        inferior = bloco[:, abaixo].astype('float64')
+        superior = bloco[:, acima].astype('float64')
+        resultado[:, fatia] = (inferior + (superior - inferior) * peso).T
+    return resultado.reshape((len(niveis),) + formato)
+
+
+# =============================================================================
+# ACUMULADOR EM BLOCOS
+# =============================================================================
+
+class AcumuladorPreditiva:
+    """
+    Média, quantis, HDIs e P(Y > limiar) de amostras inteiras recebidas em blocos.
+
+    Cada série guarda um histograma de no máximo `max_classes` classes (None:
+    sem limite), a partir do menor valor visto. A largura das classes começa em `resolucao`
+    e é dobrada por série (classes vizinhas somadas) sempre que a amplitude
+    vista não cabe em max_classes; no primeiro bloco isso já fixa a largura
+    pela amplitude dele. Com largura 1 o histograma é a própria distribuição
+    empírica das amostras: quantis (interpolação de np.quantile) e HDIs
+    (critério de az.hdi) saem idênticos aos calculados com todas as amostras
+    de uma vez. Com largura > 1 as amostras são arredondadas para baixo na
+    grade: os quantis ficam a menos de `tolerancia` (por série) dos exatos e
+    o HDI é o das amostras arredondadas, com largura a menos de `tolerancia`
+    da exata (a posição pode variar mais onde a densidade é plana). Os
+    limites ficam sempre entre o menor e o maior valor visto de cada série
+    (contagens nunca dão limites negativos). Média e contagens de excedência
+    são sempre exatas.
+
+    A memória (`nbytes`) é de no máximo max_classes contadores int32 por
+    série, independente do número de amostras e da amplitude dos valores;
+    sem limite, é a amplitude de cada série em contadores int32.
+
+    limiares: (L,) comuns a todas as séries ou (séries × L), ex.: y observado
+    em y[:, None] para o p-valor preditivo P(y_rep > y).
+    """
+
+    def __init__(self, n_series, resolucao=1, limiares=None, max_classes=MAX_CLASSES):
+        if int(resolucao) != resolucao or resolucao < 1:
+            raise ValueError("resolucao deve ser um inteiro >= 1")
+        if max_classes is not None and (int(max_classes) != max_classes or max_classes < 2):
+            raise ValueError("max_classes deve ser um inteiro >= 2 ou None")
+        self.n_series = int(n_series)
+        self.resolucao = int(resolucao)
+        self.max_classes = None if max_classes is None else int(max_classes)
+        self.n_amostras = 0
+        self._soma = np.zeros(self.n_series)
+        self._origem = None
+        self._menor = None
+        self._maior = None
+        self._larguras = np.full(self.n_series, self.resolucao, dtype='int64')
+        self._contagens = np.zeros((self.n_series, 0), dtype='int32')
+        if limiares is None:
+            self._limiares = None
+        else:
+            limiares = np.asarray(limiares, dtype='float64')
+            if limiares.ndim <= 1:
+                limiares = np.broadcast_to(np.atleast_1d(limiares), (self.n_series, limiares.size))
+            if limiares.shape[0] != self.n_series:
+                raise ValueError(f"limiares para {limiares.shape[0]} séries; esperado {self.n_series}")
+            self._limiares = limiares
+            self._acima = np.zeros(self._limiares.shape, dtype='int64')
+
+    @property
+    def tolerancia(self):
+        """Erro máximo dos quantis e da largura do HDI de cada série (0: exatos)"""
+        return self._larguras - 1
+
+    @property
+    def nbytes(self):
+        """Memória dos acumuladores (histogramas, somas e contagens de excedência)"""
+        total = self._contagens.nbytes + self._soma.nbytes + self._larguras.nbytes
+        if self._origem is not None:
+            total += self._origem.nbytes + self._menor.nbytes + self._maior.nbytes
+        if self._limiares is not None:
+            total += self._acima.nbytes
+        return total
+
+    def acumular(self, amostras):
+        """Incorpora um bloco (amostras × séries) de valores inteiros"""
+        amostras = np.asarray(amostras)
+        if amostras.ndim != 2 or amostras.shape[1] != self.n_series:
+            raise ValueError(f"Bloco com formato {amostras.shape}; esperado (n, {self.n_series})")
+        if not np.issubdtype(amostras.dtype, np.integer):
+            if not np.array_equal(amostras, np.round(amostras)):
+                raise ValueError("AcumuladorPreditiva aceita apenas amostras inteiras")
+            amostras = amostras.astype('int64')
+
+        menor, maior = amostras.min(axis=0).astype('int64'), amostras.max(axis=0).astype('int64')
+        if self._origem is None:
+            self._origem, self._menor, self._maior = menor.copy(), menor, maior
+        else:
+            self._menor = np.minimum(self._menor, menor)
+            self._maior = np.maximum(self._maior, maior)
+        self._ampliar(menor, maior)
+        classes = (amostras - self._origem) // self._larguras
+
+        n_classes = self._contagens.shape[1]
+        posicoes = classes + np.arange(self.n_series) * n_classes
+        self._contagens += np.bincount(
+            posicoes.ravel(), minlength=self.n_series * n_classes
+        ).reshape(self.n_series, n_classes)
+
+        self._soma += amostras.sum(axis=0)
+        if self._limiares is not None:
+            self._acima += (amostras[:, :, None] > self._limiares).sum(axis=0)
+        self.n_amostras += len(amostras)
+
+    def _ampliar(self, menor, maior):
+        """
+        Estende os histogramas para conter os valores menor..maior de cada série.
+
+        Com limite, séries cuja amplitude passaria de max_classes têm a
+        largura dobrada (pares de classes somados) até caber; a origem não
+        muda, então a nova grade contém a anterior e as contagens continuam
+        exatas.
+        """
+        n_classes = self._contagens.shape[1]
+        # Última classe ocupada de cada série (-1 se vazia)
+        ultima = np.full(self.n_series, -1, dtype='int64')
+        if n_classes:
+            ocupadas = self._contagens > 0
+            ultima = np.where(ocupadas.any(axis=1), n_classes - 1 - np.argmax(ocupadas[:, ::-1], axis=1), -1)
+        while True:
+            inferior = (menor - self._origem) // self._larguras
+            superior = np.maximum((maior - self._origem) // self._larguras, ultima)
+            recuo = np.maximum(-inferior, 0)
+            if self.max_classes is None:
+                break
+            largas = superior + recuo + 1 > self.max_classes
+            if not largas.any():
+                break
+            if n_classes:
+                contagens = self._contagens[largas]
+                if n_classes % 2:
+                    contagens = np.pad(contagens, ((0, 0), (0, 1)))
+                metades = contagens.reshape(len(contagens), -1, 2).sum(axis=2, dtype='int32')
+                self._contagens[largas] = 0
+                self._contagens[largas, :metades.shape[1]] = metades
+            self._larguras[largas] *= 2
+            ultima[largas] = np.where(ultima[largas] >= 0, ultima[largas] // 2, -1)
+
+        novo_n = max(n_classes, int((superior + recuo).max()) + 1)
+        if novo_n == n_classes and not recuo.any():
+            return
+        contagens = np.zeros((self.n_series, novo_n), dtype='int32')
+        # Colunas que cairiam além de novo_n estão vazias (após a última ocupada)
+        colunas = np.arange(n_classes) + recuo[:, None]
+        dentro = colunas < novo_n
+        linhas = np.broadcast_to(np.arange(self.n_series)[:, None], colunas.shape)
+        contagens[linhas[dentro], colunas[dentro]] = self._contagens[dentro]
+        self._contagens = contagens
+        self._origem = self._origem - recuo * self._larguras
+
+    def _limitar(self, valores):
+        """Valores da grade (séries × k) limitados ao menor e ao maior valor visto"""
+        return np.clip(valores, self._menor[:, None], self._maior[:, None])
+
+    def _estatisticas_ordem(self, ordens, acumuladas):
+        """Valores das estatísticas de ordem (séries × k) a partir das contagens acumuladas"""
+        n = self.n_amostras
+        n_classes = acumuladas.shape[1]
+        deslocamento = np.arange(self.n_series)[:, None]
+        planas = (acumuladas + deslocamento * n).ravel()
+        classes = np.searchsorted(planas, ordens + deslocamento * n, side='right') - deslocamento * n_classes
+        return self._limitar(self._origem[:, None] + classes * self._larguras[:, None])
+
+    def media(self):
+        return self._soma / self.n_amostras
+
+    def quantis(self, niveis):
+        """Quantis (níveis × séries), com a interpolação linear de np.quantile"""
+        niveis = np.atleast_1d(np.asarray(niveis, dtype='float64'))
+        posicoes = niveis * (self.n_amostras - 1)
+        abaixo = np.floor(posicoes).astype('int64')
+        acima = np.minimum(abaixo + 1, self.n_amostras - 1)
+        acumuladas = np.cumsum(self._contagens, axis=1)
+        inferior = self._estatisticas_ordem(np.broadcast_to(abaixo, (self.n_series, len(niveis))), acumuladas)
+        superior = self._estatisticas_ordem(np.broadcast_to(acima, (self.n_series, len(niveis))), acumuladas)
+        return (inferior + (superior - inferior) * (posicoes - abaixo)).T
+
+    def hdi(self, probs=0.95):
+        """
+        HDI de cada série, como hdi(): (séries, 2) ou (níveis, séries, 2).
+
+        A janela de menor largura começa sempre na primeira amostra de alguma
+        classe; basta então avaliar uma janela por classe não vazia.
+        """
+        escalar = np.ndim(probs) == 0
+        probs = [float(probs)] if escalar else [float(p) for p in probs]
+        n = self.n_amostras
+        acumuladas = np.cumsum(self._contagens, axis=1)
+        inicios = acumuladas - self._contagens
+        linhas = np.arange(self.n_series)
+        # Primeiro valor (na grade) de cada classe
+        valores = self._limitar(self._origem[:, None] + np.arange(self._contagens.shape[1]) * self._larguras[:, None])
+
+        resultado = np.empty((len(probs), self.n_series, 2))
+        for j, prob in enumerate(probs):
+            dentro = int(np.floor(prob * n))
+            validas = (self._contagens > 0) & (inicios <= n - 1 - dentro)
+            fins = self._estatisticas_ordem(np.minimum(inicios + dentro, n - 1), acumuladas)
+            larguras = np.where(validas, fins - valores, np.inf)
+            melhor = np.argmin(larguras, axis=1)
+            resultado[j, :, 0] = valores[linhas, melhor]
+            resultado[j, :, 1] = fins[linhas, melhor]
+        return resultado[0] if escalar else resultado
+
+    def prob_exceder(self):
+        """P(Y > limiar) de cada série e limiar (séries × L)"""
+        if self._limiares is None:
+            raise ValueError("Acumulador criado sem limiares")
+        return self._acima / self.n_amostras
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def _benchmark(n_amostras, colunas, repeticoes):
+    import time
+    import arviz as az
+
+    rng = np.random.default_rng(0)
+    print(f"{'colunas':>10} {'az.hdi (s)':>12} {'hdi (s)':>10} {'speedup':>8} {'dif. máx':>10}")
+    for n_colunas in colunas:
+        amostras = rng.negative_binomial(12, 12 / (12 + 15000), size=(n_amostras, n_colunas)).astype('float64')
+        tempos = {}
+        for nome, funcao in (
+            ('arviz', lambda: az.hdi(amostras, hdi_prob=0.95)),
+            ('hdi', lambda: hdi(amostras, 0.95)),
+        ):
+            melhor = np.inf
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                saida = funcao()
+                melhor = min(melhor, time.perf_counter() - inicio)
+            tempos[nome] = (melhor, saida)
+        diferenca = np.abs(tempos['arviz'][1] - tempos['hdi'][1]).max()
+        print(f"{n_colunas:>10} {tempos['arviz'][0]:>12.3f} {tempos['hdi'][0]:>10.3f} "
+              f"{tempos['arviz'][0] / tempos['hdi'][0]:>7.1f}x {diferenca:>10.3g}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark do HDI em lote contra az.hdi")
+    parser.add_argument("--amostras", type=int, default=8000)
+    parser.add_argument("--colunas", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=1)
+    args = parser.parse_args()
+    _benchmark(args.amostras, args.colunas, args.repeticoes)
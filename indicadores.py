@@ -0,0 +1,95 @@
+"""
+Indicadores derivados da PMDF.
+
+Cada indicador é declarado uma única vez (colunas de origem, agregação e se
+NaN se propaga) e calculado por dados.preparar_dados, junto com as demais
+colunas derivadas. Assim os totais ficam no cache Parquet e nas partições e
+as páginas apenas leem as colunas prontas.
+
+Para criar um indicador novo basta acrescentá-lo a INDICADORES_DERIVADOS (ou
+chamar registrar_indicador antes do carregamento) e incrementar
+dados.VERSAO_PREPARO.
+"""
+
+import warnings
+import numpy as np
+import pandas as pd
+
+
+# nome -> colunas de origem, agregação por linha e propagação de NaN
+# propaga_nan=False: NaN é ignorado (como DataFrame.sum(axis=1))
+INDICADORES_DERIVADOS = {
+    'total_furtos': {
+        'colunas': ['furt_trans', 'furt_cel', 'furt_veic', 'furt_com', 'furt_res'],
+        'agregacao': 'sum',
+        'propaga_nan': False,
+    },
+    'total_roubos': {
+        'colunas': ['roub_trans', 'roub_veic', 'roub_col', 'roub_res'],
+        'agregacao': 'sum',
+        'propaga_nan': False,
+    },
+    'total_acidentes': {
+        'colunas': ['acid_tran_cvit', 'acid_tran_svit', 'acid_tran_vit_fat'],
+        'agregacao': 'sum',
+        'propaga_nan': False,
+    },
+}
+
+# Agregações disponíveis: (ignorando NaN, propagando NaN)
+_AGREGACOES = {
+    'sum': (np.nansum, np.sum),
+    'mean': (np.nanmean, np.mean),
+    'min': (np.nanmin, np.min),
+    'max': (np.nanmax, np.max),
+}
+
+
+def registrar_indicador(nome, colunas, agregacao='sum', propaga_nan=False):
+    """Adiciona (ou substitui) um indicador derivado no registro"""
+    if agregacao not in _AGREGACOES:
+        raise ValueError(f"Agregação '{agregacao}' não suportada. Use uma de {list(_AGREGACOES)}")
+    INDICADORES_DERIVADOS[nome] = {
+        'colunas': list(colunas),
+        'agregacao': agregacao,
+        'propaga_nan': propaga_nan,
+    }
+
+
+def _tipo_resultado(df, colunas, agregacao, valores):
+    """Contagens continuam inteiras; médias e origens em ponto flutuante viram float32"""
+    inteiras = all(pd.api.types.is_integer_dtype(df[c]) for c in colunas)
+    if agregacao == 'mean' or not inteiras:
+        return 'float32'
+    return 'Int32' if np.isnan(valores).any() else 'int32'
+
+
+def calcular_indicadores(df, indicadores=None):
+    """
+    Acrescenta a df as colunas de todos os indicadores registrados.
+
+    As colunas de origem são convertidas uma única vez para um bloco float64
+    (NaN nos faltantes) e cada indicador é uma redução vetorizada sobre ele.
+    """
+    indicadores = INDICADORES_DERIVADOS if indicadores is None else indicadores
+    if not indicadores:
+        return df
+
+    origem = list(dict.fromkeys(c for ind in indicadores.values() for c in ind['colunas']))
+    bloco = df[origem].to_numpy(dtype='float64', na_value=np.nan)
+    posicao = {col: i for i, col in enumerate(origem)}
+
+    novas = {}
+    # Linhas só com NaN geram aviso em nanmean/nanmin/nanmax; o resultado (NaN) é o esperado
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for nome, ind in indicadores.items():
+            ignora_nan, propaga = _AGREGACOES[ind['agregacao']]
+            funcao = propaga if ind['propaga_nan'] else ignora_nan
+            valores = funcao(bloco[:, [posicao[c] for c in ind['colunas']]], axis=1)
+            tipo = _tipo_resultado(df, ind['colunas'], ind['agregacao'], valores)
+            novas[nome] = pd.Series(valores, index=df.index).astype(tipo)
+
+    for nome, serie in novas.items():
+        df[nome] = serie
+    return df
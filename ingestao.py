@@ -0,0 +1,133 @@
+"""
+Ingestão incremental de novos meses da PMDF.
+
+Em vez de substituir o CSV e re-parsear todo o histórico, um mês (ou lote de
+meses) novo é validado contra o esquema e anexado como delta. Do histórico
+só são lidas as colunas-chave (uf, municipio, ano, mes) do cache Parquet,
+para rejeitar meses repetidos; então:
+
+- as linhas brutas são acrescentadas ao final do CSV;
+- o cache Parquet ganha um arquivo de delta encadeado (dados.anexar_cache);
+- o dataset particionado ganha um arquivo novo só nas partições tocadas;
+- o cubo e as estatísticas suficientes persistidos da versão anterior
+  recebem as células do delta (conjunto_dados.incorporar_agregados).
+
+O custo de um anexo é proporcional ao delta, não ao histórico (fora o
+SHA-256 do CSV, que identifica a versão nova).
+
+Uso:
+    from ingestao import anexar_meses
+    anexar_meses(pd.read_csv('novos_meses.csv'))
+"""
+
+import os
+import pandas as pd
+
+from esquema import ESQUEMA, aplicar_esquema
+from conjunto_dados import incorporar_agregados
+from dados import (
+    CSV_PATH, MES_NUM, PYARROW_AVAILABLE,
+    anexar_cache, caminho_cache, carregar_dados, fingerprint_arquivo,
+    fingerprint_cache_atual, preparar_dados
+)
+from particoes import DATASET_DIR, anexar_particoes, garantir_particoes
+
+
+CHAVES_LINHA = ['uf', 'municipio', 'ano', 'mes']
+
+# Colunas esperadas no CSV de origem
+COLUNAS_CSV = list(ESQUEMA.keys())
+
+def validar_delta(delta, existente=None):
+    """
+    Valida as linhas novas contra o esquema e o histórico.
+
+    Levanta ValueError descrevendo o primeiro problema encontrado e retorna o
+    delta já com os tipos do esquema.
+    """
+    faltando = [c for c in COLUNAS_CSV if c not in delta.columns]
+    extras = [c for c in delta.columns if c not in COLUNAS_CSV]
+    if faltando or extras:
+        raise ValueError(f"Colunas incompatíveis com o esquema. Faltando: {faltando}; extras: {extras}")
+    if delta.empty:
+        raise ValueError("O delta não contém linhas.")
+
+    try:
+        delta = aplicar_esquema(delta[COLUNAS_CSV])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Valores incompatíveis com o esquema: {e}") from e
+
+    meses_invalidos = set(delta['mes'].astype(str)) - set(MES_NUM)
+    if meses_invalidos:
+        raise ValueError(f"Meses inválidos: {sorted(meses_invalidos)}")
+
+    # mes_ano segue o padrão JAN_2023
+    esperado = delta['mes'].astype(str).str[:3] + '_' + delta['ano'].astype(str)
+    inconsistentes = delta.loc[delta['mes_ano'].astype(str) != esperado, 'mes_ano']
+    if not inconsistentes.empty:
+        raise ValueError(f"mes_ano inconsistente com mes/ano: {inconsistentes.astype(str).tolist()}")
+
+    numericas = delta.select_dtypes('number').drop(columns='ano')
+    if (numericas < 0).any().any():
+        colunas = numericas.columns[(numericas < 0).any()].tolist()
+        raise ValueError(f"Valores negativos em: {colunas}")
+
+    chaves = delta[CHAVES_LINHA].astype(str)
+    if chaves.duplicated().any():
+        raise ValueError("O delta contém meses duplicados para o mesmo município.")
+
+    if existente is not None and not existente.empty:
+        chaves_existentes = set(map(tuple, existente[CHAVES_LINHA].astype(str).values))
+        repetidas = [tuple(k) for k in chaves.values if tuple(k) in chaves_existentes]
+        if repetidas:
+            raise ValueError(f"Meses já presentes no dataset: {repetidas}")
+
+    return delta
+
+
+def _acrescentar_csv(delta, caminho_csv):
+    """Acrescenta as linhas ao final do CSV, no mesmo formato do arquivo"""
+    # Segue a ordem de colunas do cabeçalho existente
+    with open(caminho_csv, 'r', encoding='utf-8-sig') as f:
+        cabecalho = f.readline().strip().split(',')
+    delta = delta[cabecalho]
+
+    with open(caminho_csv, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        termina_com_quebra = f.tell() == 0
+        if not termina_com_quebra:
+            f.seek(-1, os.SEEK_END)
+            termina_com_quebra = f.read(1) == b'\n'
+
+    with open(caminho_csv, 'a', encoding='utf-8', newline='') as f:
+        if not termina_com_quebra:
+            f.write('\n')
+        delta.to_csv(f, header=False, index=False, float_format='%.10g', lineterminator='\n')
+
+
+def anexar_meses(delta, caminho_csv=CSV_PATH, diretorio=DATASET_DIR):
+    """
+    Anexa um ou mais meses novos ao dataset armazenado.
+
+    Retorna o delta preparado (mesmo formato de dados.carregar_dados).
+    """
+    # Só as chaves do histórico (o cache é regravado aqui se estiver desatualizado)
+    existente = carregar_dados(caminho_csv, colunas=CHAVES_LINHA)
+    anterior = fingerprint_cache_atual(caminho_csv) or fingerprint_arquivo(caminho_csv)
+    if PYARROW_AVAILABLE:
+        garantir_particoes(caminho_csv, diretorio)
+    delta = validar_delta(delta, existente)
+    delta_preparado = preparar_dados(delta.copy())
+
+    _acrescentar_csv(delta, caminho_csv)
+    fingerprint = fingerprint_arquivo(caminho_csv)
+
+    if PYARROW_AVAILABLE:
+        # Cache preparado: só o delta, encadeado ao cache da versão anterior
+        anexar_cache(delta_preparado, fingerprint, anterior, caminho_cache(caminho_csv))
+
+        # Partições: só as tocadas ganham um arquivo novo; as demais ficam intactas
+        anexar_particoes(delta_preparado, fingerprint, diretorio)
+
+    incorporar_agregados(delta_preparado, anterior, fingerprint, caminho_csv)
+    return delta_preparado
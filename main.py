@@ -8,6 +8,9 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime
 import warnings
+from esquema import ler_csv
+from dados import MESES_PT, versao_dados
+from cubo import CuboAgregado
 warnings.filterwarnings('ignore')
 
 # Configuração da página
@@ -61,13 +64,14 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Função para carregar dados
+# Função para carregar dados (chave de cache: versão do CSV)
 @st.cache_data
-def load_data():
+def _load_data(versao):
     """Carrega e processa os dados da PMDF"""
     try:
         # Tentar carregar o arquivo
-        df = pd.read_csv('data/PMDF_ocorrencias_2022-2024.csv')
+        # Tipos compactos declarados em esquema.py
+        df = ler_csv('data/PMDF_ocorrencias_2022-2024.csv')
         
         # CORREÇÃO: Criar mapeamento de mês para número
         mes_num = {
@@ -105,6 +109,18 @@ def load_data():
         st.info("Verifique se o arquivo CSV está formatado corretamente.")
         return None
 
+def load_data():
+    return _load_data(versao_dados())
+
+# Cubo de agregados (ano × mês), construído uma vez por versão dos dados
+# max_entries=1: quando o CSV muda, o cubo anterior é descartado
+@st.cache_resource(max_entries=1)
+def _carregar_cubo(versao, _df):
+    return CuboAgregado(_df)
+
+def carregar_cubo(df):
+    return _carregar_cubo(versao_dados(), df)
+
 # Navegação lateral
 def main():
     """Função principal do dashboard"""
@@ -138,6 +154,8 @@ def main():
 def pagina_eda(df):
     """Página de Análise Exploratória Completa"""
     
+    cubo = carregar_cubo(df)
+    
     # Cabeçalho
     st.markdown('<h1 class="main-header">📊 Análise Exploratória dos Dados</h1>', unsafe_allow_html=True)
     
@@ -248,9 +266,9 @@ def pagina_eda(df):
     st.markdown('<h2 class="section-header">📊 Estatísticas Descritivas por Ano</h2>', unsafe_allow_html=True)
     
     # Calcular estatísticas
-    stats_por_ano = df.groupby('ano')['ocor_atend'].agg([
+    stats_por_ano = cubo.consultar('ocor_atend', por=['ano'], estatisticas=[
         'count', 'mean', 'median', 'std', 'min', 'max'
-    ]).round(0)
+    ]).set_index('ano').round(0)
     
     # Criar gráfico de boxplot
     fig_box = px.box(
@@ -273,7 +291,8 @@ def pagina_eda(df):
     st.markdown('<h2 class="section-header">📅 Análise de Sazonalidade</h2>', unsafe_allow_html=True)
     
     # Calcular médias mensais
-    sazonalidade = df.groupby('mes_nome')['ocor_atend'].mean().reindex([
+    sazonalidade = cubo.consultar('ocor_atend', por=['mes'], estatisticas=['mean']).set_index('mes')['ocor_atend']
+    sazonalidade = sazonalidade.rename(index=MESES_PT).reindex([
         'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
         'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
     ])
@@ -372,7 +391,7 @@ def pagina_eda(df):
     st.markdown('<h2 class="section-header">📋 Resumo Executivo da Análise Exploratória</h2>', unsafe_allow_html=True)
     
     total_ocor = df['ocor_atend'].sum()
-    media_anual = df.groupby('ano')['ocor_atend'].sum()
+    media_anual = cubo.consultar('ocor_atend', por=['ano']).set_index('ano')['ocor_atend']
     reducao_2022_2024 = ((media_anual[2022] - media_anual[2024]) / media_anual[2022]) * 100
     
     st.markdown(f"""
@@ -0,0 +1,52 @@
+"""
+Memo de tamanho limitado compartilhado entre sessões.
+
+ConjuntoDados, CuboAgregado e EstatisticasSuficientes vivem o processo
+inteiro (st.cache_resource) e memoizam uma entrada por combinação de filtros
+pedida pelas páginas. Com MemoLRU só as MAX_ENTRADAS combinações usadas mais
+recentemente ficam guardadas; as demais são recalculadas quando voltarem a
+ser pedidas.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+# Entradas guardadas por memo
+MAX_ENTRADAS = 32
+
+
+class MemoLRU:
+    """Dicionário limitado a `maximo` entradas; sai a usada há mais tempo"""
+
+    def __init__(self, maximo=MAX_ENTRADAS):
+        if maximo < 1:
+            raise ValueError("maximo deve ser >= 1")
+        self.maximo = int(maximo)
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def __contains__(self, chave):
+        return chave in self._itens
+
+    def obter(self, chave, calcular):
+        """
+        Valor memoizado de `chave`, ou calcular() guardado no memo.
+
+        O cálculo roda fora do lock: duas sessões podem calcular a mesma
+        chave ao mesmo tempo, e a última a terminar fica no memo.
+        """
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                return self._itens[chave]
+        valor = calcular()
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+        return valor
@@ -7,10 +7,9 @@ from plotly.subplots import make_subplots
 import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime
-from functions import load_data
+from functions import load_data, armazem_resultados
 import warnings
 warnings.filterwarnings('ignore')
-import pickle
 
 
 # =====================================================================
@@ -29,11 +28,9 @@ colors = {'2022': '#002156', '2023': '#ffbb3c', '2024': '#ec152f'}
 # CARREGAMENTO DOS RESULTADOS
 # =====================================================================
 
-@st.cache_data
 def carregar_resultados():
-    """Carrega resultados salvos do notebook Jupyter"""
-    with open('data/bayes/resultados_bayesianos_completos.pkl', 'rb') as f:
-        return pickle.load(f)
+    """Resultados salvos do notebook Jupyter (seções lidas sob demanda)"""
+    return armazem_resultados('data/bayes/resultados_bayesianos')
 
 # Carregar dados
 resultados = carregar_resultados()
@@ -7,18 +7,18 @@ from plotly.subplots import make_subplots
 import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime
-from functions import load_data
+from functions import conjunto_dados, listar_particoes_disponiveis, visao_particionada
 from scipy import stats
 from scipy.stats import pearsonr, spearmanr
 import warnings
 warnings.filterwarnings('ignore')
 
-df = load_data()
-df['ano'] = df['ano'].astype(str)
+# Dataset compartilhado entre sessões (somente leitura), usado pelo cubo e
+# pelas estatísticas suficientes; as linhas da página vêm das partições
+dados = conjunto_dados()
 
-df = df.sort_values(['ano', 'mes']).reset_index(drop=True)
-df['tempo'] = range(len(df))
-df_filtered = df.copy() 
+# Apenas as chaves de partição (uf/municipio/ano), sem ler os dados
+particoes = listar_particoes_disponiveis()
 
 st.set_page_config(
     page_title="Análise Bayesiana dos Dados de Criminalidade no DF",
@@ -38,19 +38,34 @@ def formatar_numero_br(valor):
 # Filtros na sidebar
 
 st.sidebar.markdown("### Filtros de Análise")
-anos_disponiveis = df['ano'].unique().tolist()
+anos_disponiveis = particoes['ano'].unique().tolist()
 anos_selecionados = st.sidebar.multiselect(
     "Selecione os anos para análise:",
     options=anos_disponiveis,
     default=anos_disponiveis
 )
 
-# Filtrar o dataframe baseado nos anos selecionados
-if anos_selecionados:
-    df_filtered = df[df['ano'].isin(anos_selecionados)].copy()
-else:
-    df_filtered = df.copy()  # Se nenhum ano selecionado, usar todos os dados
+# Seletor de município só aparece quando houver mais de um no dataset
+municipios_disponiveis = particoes['municipio'].unique().tolist()
+municipios_selecionados = None
+if len(municipios_disponiveis) > 1:
+    municipios_selecionados = st.sidebar.multiselect(
+        "Selecione os municípios:",
+        options=municipios_disponiveis,
+        default=municipios_disponiveis
+    )
+
+# Os filtros são empurrados para a leitura: só as partições selecionadas são
+# carregadas, uma vez por combinação e compartilhadas entre sessões
+if not anos_selecionados:
     st.warning("Nenhum ano selecionado. Mostrando dados de todos os anos disponíveis.", icon=":material/warning:")
+df_filtered = visao_particionada(anos=anos_selecionados, municipios=municipios_selecionados)
+
+# Agregações por ano/mês saem do cubo pré-agregado e correlações das
+# estatísticas suficientes, com os mesmos filtros
+cubo = dados.cubo
+estatisticas = dados.estatisticas
+filtros = dict(anos=anos_selecionados, municipios=municipios_selecionados)
 
 # Filtrar por Tipo de Análise (Análise Exploratória, Análise de Correlações)
 tipo_analise = st.sidebar.selectbox(
@@ -59,15 +74,6 @@ tipo_analise = st.sidebar.selectbox(
 )
 
 
-# =======================================================
-# Variáveis calculadas
-
-# Cria novas colunas com total_furtos e total_roubos
-df_filtered['total_furtos'] = total_furtos = df_filtered[['furt_trans', 'furt_cel', 'furt_veic', 'furt_com', 'furt_res']].sum(axis=1)
-df_filtered['total_roubos'] = total_roubos = df_filtered[['roub_trans', 'roub_veic', 'roub_col', 'roub_res']].sum(axis=1)
-
-
-
 # =======================================================
 # CABEÇALHO DA PÁGINA
 # =======================================================
@@ -105,7 +111,7 @@ if tipo_analise == "Análise Exploratória":
         st.markdown("**Total de Ocorrências Atendidas por Ano**", unsafe_allow_html=True)
 
         if not df_filtered.empty:
-            ocor_anual = df_filtered.groupby('ano')['ocor_atend'].sum().reset_index()
+            ocor_anual = cubo.consultar('ocor_atend', por=['ano'], **filtros)
             ocor_anual['ano'] = ocor_anual['ano'].astype(int).astype(str)
 
             fig2 = px.bar(
@@ -350,7 +356,7 @@ if tipo_analise == "Análise Exploratória":
     col1, col2, col3, col4 = st.columns(4, border=True, gap="small")
     with col1:
         # Total 
-        total_acidentes = df_filtered['acid_tran_cvit'].sum() + df_filtered['acid_tran_svit'].sum() + df_filtered['acid_tran_vit_fat'].sum() if not df_filtered.empty else 0
+        total_acidentes = df_filtered['total_acidentes'].sum() if not df_filtered.empty else 0
         st.metric("💥 Acidentes de Trânsito", formatar_numero_br(total_acidentes))
     with col2:
         # Total com vítima
@@ -369,8 +375,7 @@ if tipo_analise == "Análise Exploratória":
     with st.container(border=True):
         st.markdown("**💥 Total de Acidentes de Trânsito atendidos pela PMDF**", unsafe_allow_html=True)
         # Gráfico com a soma de acid_tran_cvit, acid_tran_svit e acid_tran_vit_fat por ano 
-        df_acidentes_total = df_filtered[['ano', 'acid_tran_cvit', 'acid_tran_svit', 'acid_tran_vit_fat']].copy()
-        df_acidentes_total = df_acidentes_total.groupby('ano').sum().reset_index()
+        df_acidentes_total = cubo.consultar(['acid_tran_cvit', 'acid_tran_svit', 'acid_tran_vit_fat'], por=['ano'], **filtros)
         # Renomear colunas para "Com Vítima", "Sem Vítima" e "Com Vítima Fatal"
         df_acidentes_total = df_acidentes_total.rename(columns={
             'acid_tran_cvit': 'Com Vítima',
@@ -594,7 +599,7 @@ if tipo_analise == "Análise Exploratória":
     col1, col2, col3, col4 = st.columns(4, border=True, gap="small")
     with col1:
         # Total de furtos
-        total_furtos = df_filtered[['furt_trans', 'furt_cel', 'furt_veic', 'furt_com', 'furt_res']].sum().sum() if not df_filtered.empty else 0
+        total_furtos = df_filtered['total_furtos'].sum() if not df_filtered.empty else 0
         st.metric("🏃 Total de Furtos", formatar_numero_br(total_furtos))
     with col2:
         # Média mensal de furtos
@@ -602,7 +607,7 @@ if tipo_analise == "Análise Exploratória":
         st.metric("📅 Média Mensal de Furtos", formatar_numero_br(media_mensal_furtos))
     with col3:
         # Total de Roubos
-        total_roubos = df_filtered[['roub_trans', 'roub_veic', 'roub_col', 'roub_res']].sum().sum() if not df_filtered.empty else 0
+        total_roubos = df_filtered['total_roubos'].sum() if not df_filtered.empty else 0
         st.metric("🔫 Total de Roubos", formatar_numero_br(total_roubos))
     with col4:
         # Média mensal de roubos
@@ -613,9 +618,8 @@ if tipo_analise == "Análise Exploratória":
     col1, col2 = st.columns(2, border=True, gap="small")
     with col1:
         st.markdown("**💸 Evolução Mensal de Furtos**", unsafe_allow_html=True)
-        # SOMA FURTOS (furt_trans + furt_cel + furt_veic + furt_com + furt_res)
-        df_furtos = df_filtered[['mes', 'ano']].copy()
-        df_furtos['total_furtos'] = df_filtered[['furt_trans', 'furt_cel', 'furt_veic', 'furt_com', 'furt_res']].sum(axis=1)
+        # SOMA FURTOS (furt_trans + furt_cel + furt_veic + furt_com + furt_res), ver indicadores.py
+        df_furtos = df_filtered[['mes', 'ano', 'total_furtos']]
         df_furtos = df_furtos.sort_values(['ano', 'mes'])
         fig10 = go.Figure()
         anos_furtos = df_furtos['ano'].unique()
@@ -654,8 +658,7 @@ if tipo_analise == "Análise Exploratória":
     with col2:
         st.markdown("**🔫 Evolução Mensal de Roubos**", unsafe_allow_html=True)
         # total_roubos
-        df_roubos = df_filtered[['mes', 'ano']].copy()
-        df_roubos['total_roubos'] = df_filtered[['roub_trans', 'roub_veic', 'roub_col', 'roub_res']].sum(axis=1)
+        df_roubos = df_filtered[['mes', 'ano', 'total_roubos']]
         df_roubos = df_roubos.sort_values(['ano', 'mes'])
         fig11 = go.Figure()
         anos_roubos = df_roubos['ano'].unique()
@@ -697,9 +700,7 @@ if tipo_analise == "Análise Exploratória":
 
         # Evolução anual de Furtos
         st.markdown("**🏃 Total Anual de Furtos**", unsafe_allow_html=True)
-        df_furtos_anual = df_filtered[['ano', 'furt_trans', 'furt_cel', 'furt_veic', 'furt_com', 'furt_res']].copy()
-        df_furtos_anual = df_furtos_anual.groupby('ano').sum().reset_index()
-        df_furtos_anual['total_furtos'] = df_furtos_anual[['furt_trans', 'furt_cel', 'furt_veic', 'furt_com', 'furt_res']].sum(axis=1)
+        df_furtos_anual = cubo.consultar('total_furtos', por=['ano'], **filtros)
 
         # 🔧 Converter 'ano' para string
         df_furtos_anual['ano'] = df_furtos_anual['ano'].astype(str)
@@ -730,9 +731,7 @@ if tipo_analise == "Análise Exploratória":
     with col2:
         # Evolução anual de Roubos
         st.markdown("**🔫 Total Anual de Roubos**", unsafe_allow_html=True)
-        df_roubos_anual = df_filtered[['ano', 'roub_trans', 'roub_veic', 'roub_col', 'roub_res']].copy()
-        df_roubos_anual = df_roubos_anual.groupby('ano').sum().reset_index()
-        df_roubos_anual['total_roubos'] = df_roubos_anual[['roub_trans', 'roub_veic', 'roub_col', 'roub_res']].sum(axis=1)
+        df_roubos_anual = cubo.consultar('total_roubos', por=['ano'], **filtros)
         # 🔧 Converter 'ano' para string
         df_roubos_anual['ano'] = df_roubos_anual['ano'].astype(str)
 
@@ -804,7 +803,7 @@ if tipo_analise == "Análise Exploratória":
     # --- Evolução mensal ---
     with col_esq:
         st.markdown(f"**📅 Evolução Mensal de {tipo_var}**", unsafe_allow_html=True)
-        df_mensal = df_filtered.groupby(['ano', 'mes'])[var_col].sum().reset_index()
+        df_mensal = cubo.consultar(var_col, por=['ano', 'mes'], **filtros)
         df_mensal = df_mensal.sort_values(['ano', 'mes'])
         df_mensal['mes'] = df_mensal['mes'].astype(str)
 
@@ -836,7 +835,7 @@ if tipo_analise == "Análise Exploratória":
     # --- Evolução anual ---
     with col_dir:
         st.markdown(f"**📊 Total Anual de {tipo_var}**", unsafe_allow_html=True)
-        df_anual = df_filtered.groupby('ano')[var_col].sum().reset_index()
+        df_anual = cubo.consultar(var_col, por=['ano'], **filtros)
         df_anual['ano'] = df_anual['ano'].astype(int).astype(str)
 
         fig_anual = px.bar(
@@ -898,7 +897,7 @@ if tipo_analise == "Análise Exploratória":
     # --- Evolução mensal ---
     with col_esq:
         st.markdown(f"**📅 Evolução Mensal de {tipo_var}**", unsafe_allow_html=True)
-        df_mensal = df_filtered.groupby(['ano', 'mes'])[var_col].sum().reset_index()
+        df_mensal = cubo.consultar(var_col, por=['ano', 'mes'], **filtros)
         df_mensal = df_mensal.sort_values(['ano', 'mes'])
         df_mensal['mes'] = df_mensal['mes'].astype(str)
 
@@ -930,7 +929,7 @@ if tipo_analise == "Análise Exploratória":
     # --- Evolução anual ---
     with col_dir:
         st.markdown(f"**📊 Total Anual de {tipo_var}**", unsafe_allow_html=True)
-        df_anual = df_filtered.groupby('ano')[var_col].sum().reset_index()
+        df_anual = cubo.consultar(var_col, por=['ano'], **filtros)
         df_anual['ano'] = df_anual['ano'].astype(int).astype(str)
 
         fig_anual = px.bar(
@@ -1001,7 +1000,7 @@ if tipo_analise == "Análise Exploratória":
     # --- Evolução mensal ---
     with col_esq:
         st.markdown(f"**📅 Evolução Mensal de Apreensões de {tipo_var}**", unsafe_allow_html=True)
-        df_mensal = df_filtered.groupby(['ano', 'mes'])[var_col].sum().reset_index()
+        df_mensal = cubo.consultar(var_col, por=['ano', 'mes'], **filtros)
         df_mensal = df_mensal.sort_values(['ano', 'mes'])
         df_mensal['mes'] = df_mensal['mes'].astype(str)
 
@@ -1033,7 +1032,7 @@ if tipo_analise == "Análise Exploratória":
     # --- Evolução anual ---
     with col_dir:
         st.markdown(f"**📊 Total Anual de Apreensões de {tipo_var}**", unsafe_allow_html=True)
-        df_anual = df_filtered.groupby('ano')[var_col].sum().reset_index()
+        df_anual = cubo.consultar(var_col, por=['ano'], **filtros)
         df_anual['ano'] = df_anual['ano'].astype(int).astype(str)
 
         fig_anual = px.bar(
@@ -1112,10 +1111,10 @@ if tipo_analise == "Análise Exploratória":
     with col_esq:
         st.markdown(f"**📅 Evolução Mensal de {tipo_var}**", unsafe_allow_html=True)
         if var_col == 'tcos':
-            df_mensal = df_filtered.groupby(['ano', 'mes'])[['tco_pmdf', 'tco_outros']].sum().reset_index()
+            df_mensal = cubo.consultar(['tco_pmdf', 'tco_outros'], por=['ano', 'mes'], **filtros)
             df_mensal['tcos'] = df_mensal['tco_pmdf'] + df_mensal['tco_outros']
         else:
-            df_mensal = df_filtered.groupby(['ano', 'mes'])[var_col].sum().reset_index()
+            df_mensal = cubo.consultar(var_col, por=['ano', 'mes'], **filtros)
         df_mensal = df_mensal.sort_values(['ano', 'mes'])
         df_mensal['mes'] = df_mensal['mes'].astype(str)
 
@@ -1148,10 +1147,10 @@ if tipo_analise == "Análise Exploratória":
     with col_dir:   
         st.markdown(f"**📊 Total Anual de {tipo_var}**", unsafe_allow_html=True)
         if var_col == 'tcos':
-            df_anual = df_filtered.groupby('ano')[['tco_pmdf', 'tco_outros']].sum().reset_index()
+            df_anual = cubo.consultar(['tco_pmdf', 'tco_outros'], por=['ano'], **filtros)
             df_anual['tcos'] = df_anual['tco_pmdf'] + df_anual['tco_outros']
         else:
-            df_anual = df_filtered.groupby('ano')[var_col].sum().reset_index()
+            df_anual = cubo.consultar(var_col, por=['ano'], **filtros)
         df_anual['ano'] = df_anual['ano'].astype(int).astype(str)
 
         fig_anual = px.bar(
@@ -1183,24 +1182,6 @@ if tipo_analise == "Análise Exploratória":
 elif tipo_analise == "Análise de Correlações":
     st.markdown("#### <br>Análise de Correlações entre Variáveis", unsafe_allow_html=True)
 
-    # Criar variável temporal no df_filtered
-    df['ano'] = df['ano'].astype(str)
-    
-    # Criar variáveis agregadas
-    df['total_furtos'] = df[['furt_trans', 'furt_cel', 'furt_veic', 
-                              'furt_com', 'furt_res']].sum(axis=1)
-    df['total_roubos'] = df[['roub_trans', 'roub_veic', 
-                              'roub_col', 'roub_res']].sum(axis=1)
-    
-    # Ordenar meses
-    meses_ordem = ['JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO', 
-                   'JULHO', 'AGOSTO', 'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO']
-    df['mes'] = pd.Categorical(df['mes'], categories=meses_ordem, ordered=True)
-    
-    # Criar variável temporal
-    df_sorted = df.sort_values(['ano', 'mes']).reset_index(drop=True)
-    df_sorted['tempo'] = range(len(df_sorted))
-
     # Criar abas
     tab1, tab2, tab3 = st.tabs([
         "🔗 Correlações",
@@ -1225,10 +1206,9 @@ elif tipo_analise == "Análise de Correlações":
         }
 
         st.markdown("##### <br>Matriz de Correlação - Crimes Violentos", unsafe_allow_html=True)
-        df_crimes = df_filtered[list(crimes_violentos.keys())]
 
         with st.container(border=True):
-            corr_matrix = df_crimes.corr()
+            corr_matrix = estatisticas.correlacao(list(crimes_violentos.keys()), **filtros)
 
             # Mudar os nomes das colunas e índices para nomes amigáveis
             corr_matrix.rename(columns=crimes_violentos, index=crimes_violentos, inplace=True)
@@ -1328,13 +1308,9 @@ elif tipo_analise == "Análise de Correlações":
             st.markdown(f"**Correlação entre {nome_tipo_apre} e Crimes**", unsafe_allow_html=True)
             resultados = []
             for crime, nome in crimes_principais.items():
-                if crime in ['hom', 'fem']:
-                    dados = df_filtered[[tipo_apre, crime]].dropna()
-                    if len(dados) > 3:
-                        corr, pval = pearsonr(dados[tipo_apre], dados[crime])
-                        resultados.append({'Crime': nome, 'Correlação': corr, 'P-valor': pval})
-                else:
-                    corr, pval = pearsonr(df_filtered[tipo_apre], df_filtered[crime])
+                # Pares com NaN (hom, fem em 2022) usam só as linhas com os dois valores
+                corr, pval, n = estatisticas.pearson(tipo_apre, crime, **filtros)
+                if n > 3:
                     resultados.append({'Crime': nome, 'Correlação': corr, 'P-valor': pval})
             
             df_resultados = pd.DataFrame(resultados)
@@ -1400,7 +1376,7 @@ elif tipo_analise == "Análise de Correlações":
     
         with st.container(border=True):
             st.markdown("**Média Mensal de Ocorrências Atendidas no Triênio**", unsafe_allow_html=True)
-            ocor_por_mes = df_filtered.groupby('mes', observed=True)['ocor_atend'].mean().reset_index()
+            ocor_por_mes = cubo.consultar('ocor_atend', por=['mes'], estatisticas=['mean'], **filtros)
         
             fig50 = px.bar(ocor_por_mes, x='mes', y='ocor_atend', color_discrete_sequence=['#002156'])
             fig50.update_traces(texttemplate='%{y:,.2f}', textposition='outside')
@@ -1421,13 +1397,15 @@ elif tipo_analise == "Análise de Correlações":
         
         with st.container(border=True):
             st.markdown("**Estatísticas Descritivas por Mês**", unsafe_allow_html=True)
-            stats_mes = df_filtered.groupby('mes', observed=True)['ocor_atend'].agg([
-                ('Média', 'mean'),
-                ('Mediana', 'median'),
-                ('Desvio Padrão', 'std'),
-                ('Mínimo', 'min'),
-                ('Máximo', 'max')
-            ]).round(2)
+            stats_mes = cubo.consultar(
+                'ocor_atend', por=['mes'], estatisticas=['mean', 'median', 'std', 'min', 'max'], **filtros
+            ).set_index('mes').rename(columns={
+                'mean': 'Média',
+                'median': 'Mediana',
+                'std': 'Desvio Padrão',
+                'min': 'Mínimo',
+                'max': 'Máximo'
+            }).round(2)
             st.dataframe(stats_mes, use_container_width=True)
 
 
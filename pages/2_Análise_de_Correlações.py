@@ -7,18 +7,18 @@ from plotly.subplots import make_subplots
 import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime
-from functions import load_data
+from functions import conjunto_dados
 from scipy import stats
 from scipy.stats import pearsonr, spearmanr
 import warnings
 warnings.filterwarnings('ignore')
 
-df = load_data()
-df['ano'] = df['ano'].astype(str)
-
-df = df.sort_values(['ano', 'mes']).reset_index(drop=True)
-df['tempo'] = range(len(df))
-df_filtered = df.copy() 
+# Dataset compartilhado entre sessões (somente leitura), já ordenado por ano/mês
+# e com tempo, total_furtos e total_roubos calculados
+dados = conjunto_dados()
+df_filtered = dados.visao()
+cubo = dados.cubo
+estatisticas = dados.estatisticas
 
 st.set_page_config(
     page_title="Análise Bayesiana dos Dados de Criminalidade no DF",
@@ -33,15 +33,6 @@ colors = {'2022': '#002156', '2023': '#ffbb3c', '2024': '#ec152f'}
 def formatar_numero_br(valor):
     return f"{valor:,.0f}".replace(",", ".")
 
-# =======================================================
-# Variáveis calculadas
-
-# Cria novas colunas com total_furtos e total_roubos
-df_filtered['total_furtos'] = total_furtos = df_filtered[['furt_trans', 'furt_cel', 'furt_veic', 'furt_com', 'furt_res']].sum(axis=1)
-df_filtered['total_roubos'] = total_roubos = df_filtered[['roub_trans', 'roub_veic', 'roub_col', 'roub_res']].sum(axis=1)
-
-
-
 # =======================================================
 # CABEÇALHO DA PÁGINA
 # =======================================================
@@ -52,23 +43,6 @@ st.markdown("<small><b>Fonte dos Dados:</b> Polícia Militar do Distrito Federal
 
 st.markdown("#### <br>Análise de Correlações entre Variáveis", unsafe_allow_html=True)
 
-# Criar variável temporal no df_filtered
-df['ano'] = df['ano'].astype(str)
-
-# Criar variáveis agregadas
-df['total_furtos'] = df[['furt_trans', 'furt_cel', 'furt_veic', 
-                          'furt_com', 'furt_res']].sum(axis=1)
-df['total_roubos'] = df[['roub_trans', 'roub_veic', 
-                          'roub_col', 'roub_res']].sum(axis=1)
-
-# Ordenar meses
-meses_ordem = ['JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO', 
-               'JULHO', 'AGOSTO', 'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO']
-df['mes'] = pd.Categorical(df['mes'], categories=meses_ordem, ordered=True)
-
-# Criar variável temporal
-df_sorted = df.sort_values(['ano', 'mes']).reset_index(drop=True)
-df_sorted['tempo'] = range(len(df_sorted))
 # Criar abas
 tab1, tab2, tab3 = st.tabs([
     "🔗 Correlações",
@@ -89,9 +63,8 @@ with tab1:
         'mar_penha': 'Viol. Doméstica'
     }
     st.markdown("##### <br>Matriz de Correlação - Crimes Violentos", unsafe_allow_html=True)
-    df_crimes = df_filtered[list(crimes_violentos.keys())]
     with st.container(border=True):
-        corr_matrix = df_crimes.corr()
+        corr_matrix = estatisticas.correlacao(list(crimes_violentos.keys()))
         # Mudar os nomes das colunas e índices para nomes amigáveis
         corr_matrix.rename(columns=crimes_violentos, index=crimes_violentos, inplace=True)
         fig10 = px.imshow(corr_matrix, 
@@ -179,13 +152,9 @@ with tab2:
         st.markdown(f"**Correlação entre {nome_tipo_apre} e Crimes**", unsafe_allow_html=True)
         resultados = []
         for crime, nome in crimes_principais.items():
-            if crime in ['hom', 'fem']:
-                dados = df_filtered[[tipo_apre, crime]].dropna()
-                if len(dados) > 3:
-                    corr, pval = pearsonr(dados[tipo_apre], dados[crime])
-                    resultados.append({'Crime': nome, 'Correlação': corr, 'P-valor': pval})
-            else:
-                corr, pval = pearsonr(df_filtered[tipo_apre], df_filtered[crime])
+            # Pares com NaN (hom, fem em 2022) usam só as linhas com os dois valores
+            corr, pval, n = estatisticas.pearson(tipo_apre, crime)
+            if n > 3:
                 resultados.append({'Crime': nome, 'Correlação': corr, 'P-valor': pval})
         
         df_resultados = pd.DataFrame(resultados)
@@ -246,7 +215,7 @@ with tab3:
 
     with st.container(border=True):
         st.markdown("**Média Mensal de Ocorrências Atendidas no Triênio**", unsafe_allow_html=True)
-        ocor_por_mes = df_filtered.groupby('mes', observed=True)['ocor_atend'].mean().reset_index()
+        ocor_por_mes = cubo.consultar('ocor_atend', por=['mes'], estatisticas=['mean'])
     
         fig50 = px.bar(ocor_por_mes, x='mes', y='ocor_atend', color_discrete_sequence=['#002156'])
         fig50.update_traces(texttemplate='%{y:,.2f}', textposition='outside')
@@ -266,13 +235,15 @@ with tab3:
     
     with st.container(border=True):
         st.markdown("**Estatísticas Descritivas por Mês**", unsafe_allow_html=True)
-        stats_mes = df_filtered.groupby('mes', observed=True)['ocor_atend'].agg([
-            ('Média', 'mean'),
-            ('Mediana', 'median'),
-            ('Desvio Padrão', 'std'),
-            ('Mínimo', 'min'),
-            ('Máximo', 'max')
-        ]).round(2)
+        stats_mes = cubo.consultar(
+            'ocor_atend', por=['mes'], estatisticas=['mean', 'median', 'std', 'min', 'max']
+        ).set_index('mes').rename(columns={
+            'mean': 'Média',
+            'median': 'Mediana',
+            'std': 'Desvio Padrão',
+            'min': 'Mínimo',
+            'max': 'Máximo'
+        }).round(2)
         st.dataframe(stats_mes, use_container_width=True)
     with st.expander("Explicação dos Achados", icon=":material/info:", expanded=True):
         st.markdown(""" 
@@ -5,6 +5,13 @@ import plotly.graph_objects as go
 import plotly.express as px
 import numpy as np
 import io
+import os
+from functions import (
+    indice_excedencia, manifestos_modelo, artefato_modelo,
+    artefatos_modelo, amostras_modelo, estatisticas_cache,
+)
+from previsao import banda, niveis_banda
+from registro_modelos import REGISTRO_DIR
 
 # Reportlab para gerar PDF
 try:
@@ -31,26 +38,51 @@ st.toast("Use o menu horizontal para navegar entre os conteúdos", icon=":materi
 # CARREGAR ARQUIVOS
 # ===========================================================
 
-MODEL_CONFIG_PATH = "data/bayes/modelofinal_2/model_config.json"
-POSTERIOR_SUMMARY_PATH = "data/bayes/modelofinal_2/posterior_summary.json"
-PRED_2025_PATH = "data/bayes/modelofinal_2/predicoes_2025.json"
-PRED_IN_PATH = "data/bayes/modelofinal_2/predicoes_in_sample.json"
-
-with open(MODEL_CONFIG_PATH, "r", encoding="utf-8") as f:
-    model_config = json.load(f)
+# Versão do modelo (registro_modelos.py): a fixada por padrão, trocável na
+# barra lateral sem redeploy
+versoes_modelo, versao_fixada = manifestos_modelo()
+if not versoes_modelo:
+    st.error("Nenhuma versão do modelo registrada em data/bayes.")
+    st.stop()
+
+nomes_versoes = [m["versao"] for m in reversed(versoes_modelo)]
+versao_modelo = st.sidebar.selectbox(
+    "Versão do modelo",
+    nomes_versoes,
+    index=nomes_versoes.index(versao_fixada),
+    format_func=lambda v: f"{v} (fixada)" if v == versao_fixada else v,
+)
+manifesto = next(m for m in versoes_modelo if m["versao"] == versao_modelo)
+
+with st.sidebar.expander("Comparar versões"):
+    st.dataframe(
+        pd.DataFrame(
+            [{"versao": m["versao"], "criado_em": m["criado_em"], **m["metricas"]} for m in versoes_modelo]
+        ).set_index("versao"),
+        use_container_width=True,
+    )
 
-with open(POSTERIOR_SUMMARY_PATH, "r", encoding="utf-8") as f:
-    posterior_summary = json.load(f)
+EXCEDENCIA_2025_PATH = os.path.join(REGISTRO_DIR, versao_modelo, "excedencia_2025.npz")
 
-with open(PRED_2025_PATH, "r", encoding="utf-8") as f:
-    pred_2025 = json.load(f)
+# Artefatos lidos e preparados uma vez por versão dos arquivos e compartilhados
+# entre sessões (functions.artefatos_modelo): não alterar os DataFrames no lugar
+artefatos = artefatos_modelo(os.path.join(REGISTRO_DIR, versao_modelo))
+if artefatos is None:
+    st.error(f"A versão {versao_modelo} não tem resumo, predições in-sample ou previsão 2025 "
+             "(rode prever_2025.py para gerar a previsão).")
+    st.stop()
 
-with open(PRED_IN_PATH, "r", encoding="utf-8") as f:
-    pred_in = json.load(f)
+model_config = artefatos["model_config"]
+posterior_summary = artefatos["posterior_summary"]
+pred_2025 = artefatos["pred_2025"]
+df_2025 = artefatos["df_2025"]
+df_in = artefatos["df_in"]
+df_post = artefatos["df_post"]
 
-df_2025 = pd.DataFrame(pred_2025)
-df_in = pd.DataFrame(pred_in)
-df_post = pd.DataFrame(posterior_summary)
+# Subamostra fixa de amostras reais da posteriori (treino ou
+# `python arquivo_amostras.py <versão>`), usada por todos os gráficos da
+# posteriori; None quando a versão não a tem
+amostras_post = amostras_modelo(manifesto, "amostras_posteriori.npz")
 
 # Ordenar meses
 mes_ordem = [
@@ -58,22 +90,40 @@ mes_ordem = [
     "JULHO","AGOSTO","SETEMBRO","OUTUBRO","NOVEMBRO","DEZEMBRO"
 ]
 
-# Para df_2025
-df_2025["mes"] = pd.Categorical(df_2025["mes"], categories=mes_ordem, ordered=True)
-df_2025 = df_2025.sort_values("mes")
-
-# Para df_in - criar label ANTES de converter para Categorical
-df_in["label_mes_ano"] = df_in["mes"] + " / " + df_in["ano"].astype(str)
-df_in["mes"] = pd.Categorical(df_in["mes"], categories=mes_ordem, ordered=True)
-df_in = df_in.sort_values(["ano", "mes"])
-
 def format_num(valor):
     return f"{valor:,.0f}".replace(",", ".")
 
+def seletor_banda(grade, key):
+    """Nível de credibilidade escolhido (em %); fixo em 95% sem a grade de quantis"""
+    if grade is None:
+        st.caption("Grade de quantis não encontrada: exibindo o HDI 95% salvo nas previsões.")
+        return 95
+    # Só os níveis com HDI salvo na grade (versões antigas têm 50/80/90/95)
+    niveis = [round(p * 100) for p in niveis_banda(grade)]
+    return st.select_slider(
+        "Nível do intervalo de credibilidade (%)",
+        options=niveis,
+        value=95 if 95 in niveis else niveis[-1],
+        key=key
+    )
+
+def aplicar_banda(df, grade, nivel):
+    """Colunas banda_low/banda_high no nível escolhido, alinhadas por (ano, mes_num)"""
+    df = df.copy()
+    if grade is None:
+        df["banda_low"] = df["y_pred_hdi_low"]
+        df["banda_high"] = df["y_pred_hdi_high"]
+        return df
+    inferior, superior = banda(grade, nivel / 100)
+    limites = pd.DataFrame(grade["periodos"], columns=["ano", "mes_num"])
+    limites["banda_low"] = inferior
+    limites["banda_high"] = superior
+    return df.merge(limites, on=["ano", "mes_num"], how="left")
+
 # ===========================================================
 # FUNÇÃO PARA GERAR PDF
 # ===========================================================
-def gerar_pdf_resumo(df_in, df_2025):
+def gerar_pdf_resumo(df_in, df_2025, totais_2025=None):
     """
     Gera um PDF simples com um resumo textual das previsões.
     Requer reportlab instalado.
@@ -89,13 +139,28 @@ def gerar_pdf_resumo(df_in, df_2025):
     y = height - 90
 
     media_med = df_2025["y_pred_mediana"].mean()
-    media_low = df_2025["y_pred_hdi_low"].mean()
-    media_high = df_2025["y_pred_hdi_high"].mean()
 
     linhas = [
         f"Média das medianas mensais previstas para 2025: {media_med:,.0f} ocorrências.",
-        f"Média dos limites inferiores (IC95%): {media_low:,.0f} ocorrências.",
-        f"Média dos limites superiores (IC95%): {media_high:,.0f} ocorrências.",
+    ]
+    if totais_2025 is not None:
+        # Intervalo do total anual a partir das amostras conjuntas dos meses
+        anual = totais_2025["anual"][0]
+        linhas += [
+            f"Total anual previsto (mediana): {anual['total_mediana']:,.0f} ocorrências.",
+            f"IC95% do total anual: [{anual['total_hdi_low']:,.0f}, {anual['total_hdi_high']:,.0f}] ocorrências.",
+        ]
+        for tri in totais_2025["trimestral"]:
+            linhas.append(
+                f"{tri['trimestre']}º trimestre: mediana={tri['total_mediana']:,.0f}, "
+                f"IC95%=[{tri['total_hdi_low']:,.0f}, {tri['total_hdi_high']:,.0f}]"
+            )
+    else:
+        linhas += [
+            f"Média dos limites inferiores (IC95%): {df_2025['y_pred_hdi_low'].mean():,.0f} ocorrências.",
+            f"Média dos limites superiores (IC95%): {df_2025['y_pred_hdi_high'].mean():,.0f} ocorrências.",
+        ]
+    linhas += [
         "",
         "O modelo utilizado é um GLM Bayesiano Hierárquico com verossimilhança",
         "Negative Binomial, link log e efeitos aleatórios de mês e ano.",
@@ -141,9 +206,17 @@ Este painel apresenta os resultados de um modelo Bayesiano ajustado aos dados de
 # KPI CARDS - Usando st.metric nativo do Streamlit
 # ===========================================================
 
+totais_2025 = artefato_modelo(manifesto, "totais_2025.json")
+
 media_mediana = df_2025["y_pred_mediana"].mean()
-media_low = df_2025["y_pred_hdi_low"].mean()
-media_high = df_2025["y_pred_hdi_high"].mean()
+if totais_2025 is not None:
+    # IC95% da média mensal = IC do total anual (amostras conjuntas) / 12
+    anual = totais_2025["anual"][0]
+    media_low = anual["total_hdi_low"] / anual["n_meses"]
+    media_high = anual["total_hdi_high"] / anual["n_meses"]
+else:
+    media_low = df_2025["y_pred_hdi_low"].mean()
+    media_high = df_2025["y_pred_hdi_high"].mean()
 largura_media_ic = media_high - media_low
 mes_max_risco = df_2025.loc[df_2025["y_pred_mediana"].idxmax(), "mes"]
 max_mediana = df_2025["y_pred_mediana"].max()
@@ -373,21 +446,9 @@ with tabs[1]:
         revelando padrões temporais e tendências ao longo do período 2022-2024.
         """)
 
-        # criar heatmap ano x mes usando os dados observados
-        df_heat = df_in.copy()
-        # Usar astype(str) para evitar problemas com Categorical
-        df_heat["mes_str"] = df_heat["mes"].astype(str)
-        df_heat = df_heat.sort_values(["ano", "mes"])
-
-        pivot_heat = df_heat.pivot_table(
-            index="ano",
-            columns="mes_str",
-            values="ocor_atend",
-            aggfunc="sum"
-        )
-        
-        # Reordenar colunas
-        pivot_heat = pivot_heat[mes_ordem]
+        # heatmap ano x mes dos dados observados da versão do modelo (df_in),
+        # já na ordem dos meses (functions.artefatos_modelo)
+        pivot_heat = artefatos["heatmap"]
 
         fig_hm = px.imshow(
             pivot_heat,
@@ -414,34 +475,35 @@ with tabs[1]:
     with st.container(border=True):
         st.markdown("**Distribuição dos Parâmetros Posteriores**")
         
-        # Gráfico de violino para visualizar distribuições
-        fig_violin = go.Figure()
-        
-        params_to_plot = ['sigma_mes', 'sigma_ano', 'alpha_nb']
-        colors_violin = ['lightblue', 'lightgreen', 'lightcoral']
-        
-        for idx, param in enumerate(params_to_plot):
-            param_data = df_post[df_post['index'] == param]
-            if not param_data.empty:
-                # Simular distribuição baseada em mean e sd
-                mean_val = param_data['mean'].values[0]
-                sd_val = param_data['sd'].values[0]
-                samples = np.random.normal(mean_val, sd_val, 1000)
-                
-                fig_violin.add_trace(go.Violin(
-                    y=samples,
-                    name=param,
-                    box_visible=True,
-                    meanline_visible=True,
-                    fillcolor=colors_violin[idx],
-                    opacity=0.6
-                ))
-        
-        fig_violin.update_layout(
-            yaxis_title="Valor",
-            height=400
-        )
-        st.plotly_chart(fig_violin, use_container_width=True)
+        if amostras_post is None:
+            st.info(f"""
+            As amostras da posteriori ainda não foram exportadas para esta versão.
+            Execute `python arquivo_amostras.py {os.path.join(REGISTRO_DIR, versao_modelo)}`
+            para gerar `amostras_posteriori.npz` a partir de `idata/`.
+            """)
+        else:
+            # Gráfico de violino com as amostras reais (subamostra fixa)
+            fig_violin = go.Figure()
+
+            params_to_plot = ['sigma_mes', 'sigma_ano', 'alpha_nb']
+            colors_violin = ['lightblue', 'lightgreen', 'lightcoral']
+
+            for idx, param in enumerate(params_to_plot):
+                if param in amostras_post:
+                    fig_violin.add_trace(go.Violin(
+                        y=amostras_post[param],
+                        name=param,
+                        box_visible=True,
+                        meanline_visible=True,
+                        fillcolor=colors_violin[idx],
+                        opacity=0.6
+                    ))
+
+            fig_violin.update_layout(
+                yaxis_title="Valor",
+                height=400
+            )
+            st.plotly_chart(fig_violin, use_container_width=True)
 
         st.info(""" 
                 
@@ -477,6 +539,10 @@ with tabs[2]:
         Isso permite avaliar o quão bem o modelo reproduz o comportamento histórico.
         """)
 
+        grade_in = artefato_modelo(manifesto, "quantis_in_sample.json")
+        nivel_in = seletor_banda(grade_in, key="banda_in_sample")
+        df_in_banda = aplicar_banda(df_in, grade_in, nivel_in)
+
         fig_in = go.Figure()
 
         fig_in.add_trace(go.Scatter(
@@ -498,19 +564,19 @@ with tabs[2]:
         ))
 
         fig_in.add_trace(go.Scatter(
-            x=df_in["label_mes_ano"],
-            y=df_in["y_pred_hdi_high"],
+            x=df_in_banda["label_mes_ano"],
+            y=df_in_banda["banda_high"],
             mode="lines",
-            name="IC 95% High",
+            name=f"IC {nivel_in}% High",
             line=dict(color="lightblue", width=0),
             showlegend=False
         ))
 
         fig_in.add_trace(go.Scatter(
-            x=df_in["label_mes_ano"],
-            y=df_in["y_pred_hdi_low"],
+            x=df_in_banda["label_mes_ano"],
+            y=df_in_banda["banda_low"],
             mode="lines",
-            name="IC 95%",
+            name=f"IC {nivel_in}%",
             line=dict(color="lightblue", width=0),
             fill='tonexty',
             fillcolor='rgba(173, 216, 230, 0.3)'
@@ -541,10 +607,8 @@ Este gráfico evidencia que o **modelo Negative Binomial hierárquico é capaz d
 
     with st.container(border=True):
         st.markdown("**Análise de Resíduos**")
-        
-        df_in["residuo"] = df_in["ocor_atend"] - df_in["y_pred_mediana"]
-        df_in["residuo_padronizado"] = (df_in["residuo"] - df_in["residuo"].mean()) / df_in["residuo"].std()
 
+        # residuo e residuo_padronizado vêm prontos de artefatos_modelo
         col1, col2 = st.columns(2)
         
         with col1:
@@ -629,9 +693,13 @@ with tabs[3]:
         devido à extrapolação para um ano não observado.
         """)
 
+        grade_2025 = artefato_modelo(manifesto, "quantis_2025.json")
+        nivel_2025 = seletor_banda(grade_2025, key="banda_2025")
+
         # Converter para string para evitar problemas com Categorical
         df_2025_plot = df_2025.copy()
         df_2025_plot["mes_str"] = df_2025_plot["mes"].astype(str)
+        df_2025_banda = aplicar_banda(df_2025_plot, grade_2025, nivel_2025)
 
         fig_2025 = go.Figure()
 
@@ -645,26 +713,26 @@ with tabs[3]:
         ))
 
         fig_2025.add_trace(go.Scatter(
-            x=df_2025_plot["mes_str"],
-            y=df_2025_plot["y_pred_hdi_high"],
+            x=df_2025_banda["mes_str"],
+            y=df_2025_banda["banda_high"],
             mode="lines",
-            name="IC 95% High",
+            name=f"IC {nivel_2025}% High",
             line=dict(color="lightblue", width=0),
             showlegend=False
         ))
 
         fig_2025.add_trace(go.Scatter(
-            x=df_2025_plot["mes_str"],
-            y=df_2025_plot["y_pred_hdi_low"],
+            x=df_2025_banda["mes_str"],
+            y=df_2025_banda["banda_low"],
             mode="lines",
-            name="IC 95%",
+            name=f"IC {nivel_2025}%",
             line=dict(color="lightblue", width=0),
             fill='tonexty',
             fillcolor='rgba(173, 216, 230, 0.3)'
         ))
 
         fig_2025.update_layout(
-            title="Previsão Mensal – 2025 (Mediana + IC95%)",
+            title=f"Previsão Mensal – 2025 (Mediana + IC{nivel_2025}%)",
             xaxis_title="Mês",
             yaxis_title="Ocorrências Previstas",
             height=500,
@@ -735,12 +803,9 @@ with tabs[3]:
     with st.container(border=True):
         st.markdown("**Comparação: Histórico vs Previsão 2025**")
         
-        # Calcular médias mensais históricas
-        df_hist_mensal = df_in.groupby("mes")["ocor_atend"].mean().reset_index()
-        df_hist_mensal["mes_str"] = df_hist_mensal["mes"].astype(str)
-        # Ordenar conforme mes_ordem
-        df_hist_mensal["mes"] = pd.Categorical(df_hist_mensal["mes"], categories=mes_ordem, ordered=True)
-        df_hist_mensal = df_hist_mensal.sort_values("mes")
+        # Médias mensais históricas da série ajustada pela versão (df_in),
+        # já ordenadas por mês (functions.artefatos_modelo)
+        df_hist_mensal = artefatos["media_mensal"]
         
         fig_comp = go.Figure()
         
@@ -804,6 +869,135 @@ with tabs[3]:
         - **Total anual previsto (mediana):** ~169.440 ocorrências
         """)
 
+    st.markdown("<br><br>", unsafe_allow_html=True)
+
+    with st.container(border=True):
+        st.markdown("**Totais Anuais e Trimestrais Previstos**")
+
+        if totais_2025 is None:
+            st.info("""
+            Os totais ainda não foram gerados. Execute `python prever_2025.py` para
+            calcular os intervalos dos totais a partir das amostras conjuntas.
+            """)
+        else:
+            st.markdown("""
+            Os totais somam as amostras conjuntas dos meses, preservando a correlação
+            induzida pelo efeito de ano compartilhado. Por isso o intervalo do total
+            não é a soma (nem a média) dos intervalos mensais.
+            """)
+            anual = totais_2025["anual"][0]
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Total anual (mediana)", format_num(anual["total_mediana"]))
+            col2.metric("Limite inferior IC95%", format_num(anual["total_hdi_low"]))
+            col3.metric("Limite superior IC95%", format_num(anual["total_hdi_high"]))
+
+            df_tri = pd.DataFrame(totais_2025["trimestral"])
+            df_tri["trimestre"] = df_tri["trimestre"].astype(str) + "º"
+            st.dataframe(
+                df_tri[["trimestre", "total_mediana", "total_hdi_low", "total_hdi_high"]].style.format({
+                    "total_mediana": "{:,.0f}",
+                    "total_hdi_low": "{:,.0f}",
+                    "total_hdi_high": "{:,.0f}"
+                }),
+                use_container_width=True
+            )
+
+    st.markdown("<br><br>", unsafe_allow_html=True)
+
+    with st.container(border=True):
+        st.markdown("**Probabilidade de Exceder um Limiar Operacional**")
+
+        # Amostras ordenadas por mês: cada consulta é uma busca binária
+        indice = indice_excedencia(EXCEDENCIA_2025_PATH)
+
+        if indice is None:
+            st.info("""
+            O índice de excedência ainda não foi gerado. Execute `python prever_2025.py`
+            para salvar as amostras da preditiva e habilitar esta análise.
+            """)
+        else:
+            faixa_min, faixa_max = (int(v) for v in indice.faixa())
+            limiar = st.slider(
+                "Limiar de ocorrências mensais",
+                min_value=faixa_min,
+                max_value=faixa_max,
+                value=min(max(15000, faixa_min), faixa_max),
+                step=100
+            )
+
+            prob_mensal = indice.prob_exceder(limiar)
+            prob_algum = indice.prob_algum(limiar)
+
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                st.metric(
+                    label="Algum mês acima do limiar",
+                    value=f"{prob_algum:.1%}"
+                )
+                st.metric(
+                    label="Média mensal de P(Y > limiar)",
+                    value=f"{prob_mensal.mean():.1%}"
+                )
+            with col2:
+                fig_exc = go.Figure()
+                fig_exc.add_trace(go.Bar(
+                    x=[str(r) for r in indice.rotulos],
+                    y=prob_mensal,
+                    marker_color='indianred',
+                    text=[f"{p:.0%}" for p in prob_mensal],
+                    textposition="outside"
+                ))
+                fig_exc.update_layout(
+                    title=f"P(ocorrências > {format_num(limiar)}) por mês – 2025",
+                    xaxis_title="Mês",
+                    yaxis_title="Probabilidade",
+                    yaxis=dict(range=[0, 1.05], tickformat=".0%"),
+                    height=400
+                )
+                st.plotly_chart(fig_exc, use_container_width=True)
+
+    st.markdown("<br><br>", unsafe_allow_html=True)
+
+    with st.container(border=True):
+        st.markdown("**Distribuição Preditiva de um Mês**")
+
+        # Amostras reais da preditiva (inteiros comprimidos, prever_2025.py)
+        amostras_2025 = amostras_modelo(manifesto, "amostras_2025.npz")
+
+        if amostras_2025 is None:
+            st.info("""
+            As amostras da preditiva ainda não foram exportadas para esta versão.
+            Execute `python prever_2025.py` para gerar `amostras_2025.npz`.
+            """)
+        else:
+            y_amostras = amostras_2025["y_pred"]
+            rotulos_meses = df_2025["mes"].astype(str).tolist()
+            mes_dist = st.selectbox("Mês", rotulos_meses, key="mes_distribuicao_2025")
+            valores_mes = y_amostras[:, rotulos_meses.index(mes_dist)]
+
+            fig_dist = go.Figure()
+            fig_dist.add_trace(go.Histogram(
+                x=valores_mes,
+                nbinsx=60,
+                marker_color='steelblue',
+                opacity=0.8,
+                name=mes_dist
+            ))
+            fig_dist.add_vline(
+                x=float(np.median(valores_mes)),
+                line_dash="dash",
+                line_color="darkblue",
+                annotation_text="Mediana"
+            )
+            fig_dist.update_layout(
+                title=f"Amostras da preditiva – {mes_dist}/2025 ({len(valores_mes):,} amostras)",
+                xaxis_title="Ocorrências",
+                yaxis_title="Frequência",
+                showlegend=False,
+                height=400
+            )
+            st.plotly_chart(fig_dist, use_container_width=True)
+
 
 
 # ===========================================================
@@ -855,7 +1049,7 @@ with tabs[4]:
         if not REPORTLAB_AVAILABLE:
             st.warning("A biblioteca `reportlab` não está instalada. Para gerar o PDF, instale com: `pip install reportlab`.")
         else:
-            pdf_bytes = gerar_pdf_resumo(df_in, df_2025)
+            pdf_bytes = gerar_pdf_resumo(df_in, df_2025, totais_2025)
             st.download_button(
                 label="🧾 Baixar PDF de Resumo",
                 data=pdf_bytes,
@@ -1084,24 +1278,24 @@ with tabs[5]:
         fig_prior_post = go.Figure()
         
         # Alpha0
-        alpha0_post = df_post[df_post['index'] == 'alpha0']
-        if not alpha0_post.empty:
-            x_range = np.linspace(9, 10.5, 200)
-            # Prior: Normal(9.8, 1.0)
-            prior_alpha0 = (1 / np.sqrt(2 * np.pi * 1.0**2)) * np.exp(-0.5 * ((x_range - 9.8) / 1.0)**2)
-            # Posterior simulada
-            posterior_alpha0 = (1 / np.sqrt(2 * np.pi * alpha0_post['sd'].values[0]**2)) * \
-                               np.exp(-0.5 * ((x_range - alpha0_post['mean'].values[0]) / alpha0_post['sd'].values[0])**2)
-            
-            fig_prior_post.add_trace(go.Scatter(
-                x=x_range, y=prior_alpha0,
-                name='Prior α₀',
-                line=dict(dash='dash', color='gray')
-            ))
-            fig_prior_post.add_trace(go.Scatter(
-                x=x_range, y=posterior_alpha0,
+        x_range = np.linspace(9, 10.5, 200)
+        # Prior: Normal(9.8, 1.0)
+        prior_alpha0 = (1 / np.sqrt(2 * np.pi * 1.0**2)) * np.exp(-0.5 * ((x_range - 9.8) / 1.0)**2)
+        
+        fig_prior_post.add_trace(go.Scatter(
+            x=x_range, y=prior_alpha0,
+            name='Prior α₀',
+            line=dict(dash='dash', color='gray')
+        ))
+        if amostras_post is not None and 'alpha0' in amostras_post:
+            # Posterior: densidade das amostras reais
+            fig_prior_post.add_trace(go.Histogram(
+                x=amostras_post['alpha0'],
+                histnorm='probability density',
+                nbinsx=40,
                 name='Posterior α₀',
-                line=dict(color='darkblue')
+                marker_color='darkblue',
+                opacity=0.6
             ))
         
         fig_prior_post.update_layout(
@@ -1186,3 +1380,14 @@ with tabs[5]:
         ✅ **Requisito 7:** Avaliação do modelo e interpretação de intervalos de credibilidade  
         ✅ **Requisito 8:** Interpretação dos resultados e resposta ao problema de pesquisa  
         """)
+
+# ===========================================================
+# CACHE DE ARTEFATOS (acertos/falhas desde o início do processo)
+# ===========================================================
+
+with st.sidebar.expander("Cache de artefatos"):
+    estatisticas = estatisticas_cache()
+    if estatisticas:
+        st.dataframe(pd.DataFrame(estatisticas).T, use_container_width=True)
+    else:
+        st.caption("Nenhum artefato carregado ainda.")
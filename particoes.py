@@ -0,0 +1,238 @@
+"""
+Dataset particionado da PMDF (uf / municipio / ano).
+
+Os extratos preparados por dados.carregar_dados são gravados em Parquet com
+particionamento Hive. As leituras recebem os filtros da sidebar (anos,
+municípios, UFs) e os empurram para o pyarrow, de modo que apenas as
+partições necessárias são abertas.
+
+Cada reconstrução grava uma versão nova (DATASET_DIR/v-<ns>-<pid>/) e só
+então troca o ponteiro _atual.json com os.replace, que é atômico: leitores
+sempre encontram uma versão completa, e duas reconstruções simultâneas
+apenas disputam qual ponteiro fica por último (ambas válidas). Versões de
+um CSV anterior são removidas depois da troca, exceto a que acabou de ser
+substituída, que ainda pode estar sendo lida.
+"""
+
+import os
+import json
+import time
+import shutil
+import pandas as pd
+
+from esquema import aplicar_esquema, normalizar_categorias
+from dados import (
+    CSV_PATH, MESES_ORDEM, PYARROW_AVAILABLE,
+    carregar_dados, fingerprint_arquivo, fingerprint_confere
+)
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+
+DATASET_DIR = 'data/pmdf_dataset'
+CHAVES_PARTICAO = ['uf', 'municipio', 'ano']
+
+# Fingerprint do CSV que originou as partições (dentro de cada versão)
+_ARQUIVO_FINGERPRINT = '_fingerprint.json'
+
+# Versão em uso, na raiz do dataset
+_ARQUIVO_PONTEIRO = '_atual.json'
+
+# Gravações interrompidas (<versão>.tmp) mais antigas que isso são descartadas
+_IDADE_MAX_TMP = 3600
+
+
+def _particionamento():
+    """Esquema Hive das partições (todas as chaves como texto)"""
+    return ds.partitioning(
+        pa.schema([(chave, pa.string()) for chave in CHAVES_PARTICAO]),
+        flavor='hive'
+    )
+
+
+def _ler_fingerprint(diretorio):
+    caminho = os.path.join(diretorio, _ARQUIVO_FINGERPRINT)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _gravar_fingerprint(diretorio, fingerprint):
+    with open(os.path.join(diretorio, _ARQUIVO_FINGERPRINT), 'w', encoding='utf-8') as f:
+        json.dump(fingerprint, f)
+
+
+def _versao_atual(diretorio):
+    """Nome da versão apontada por _atual.json, ou None"""
+    caminho = os.path.join(diretorio, _ARQUIVO_PONTEIRO)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, 'r', encoding='utf-8') as f:
+        versao = json.load(f).get('versao')
+    return versao if versao and os.path.isdir(os.path.join(diretorio, versao)) else None
+
+
+def diretorio_atual(diretorio=DATASET_DIR):
+    """Diretório da versão em uso das partições, ou None se ainda não houver"""
+    versao = _versao_atual(diretorio)
+    return os.path.join(diretorio, versao) if versao else None
+
+
+def _trocar_versao(diretorio, versao):
+    """Aponta _atual.json para `versao` (os.replace: troca atômica)"""
+    tmp = os.path.join(diretorio, f'{_ARQUIVO_PONTEIRO}.{os.getpid()}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'versao': versao}, f)
+    os.replace(tmp, os.path.join(diretorio, _ARQUIVO_PONTEIRO))
+
+
+def _limpar_versoes(diretorio, manter, fingerprint):
+    """
+    Remove versões de outros CSVs e sobras do layout antigo.
+
+    Versões com o mesmo fingerprint (reconstruções concorrentes) e as de
+    `manter` ficam; gravações em andamento (.tmp) só saem depois de
+    _IDADE_MAX_TMP segundos.
+    """
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        if nome in manter or nome.startswith(_ARQUIVO_PONTEIRO):
+            continue
+        if nome.endswith('.tmp'):
+            if time.time() - os.path.getmtime(caminho) < _IDADE_MAX_TMP:
+                continue
+        elif os.path.isdir(caminho):
+            salvo = _ler_fingerprint(caminho) or {}
+            if all(salvo.get(k) == fingerprint.get(k) for k in ('tamanho', 'sha256')):
+                continue
+        if os.path.isdir(caminho):
+            shutil.rmtree(caminho, ignore_errors=True)
+        else:
+            os.remove(caminho)
+
+
+def escrever_particoes(df, diretorio=DATASET_DIR, modo='delete_matching', prefixo='part'):
+    """
+    Grava um dataframe preparado no layout particionado.
+
+    Com modo='delete_matching' as partições presentes em df são substituídas
+    e as demais são preservadas; com 'overwrite_or_ignore' e um prefixo novo
+    os arquivos são apenas acrescentados às partições.
+    """
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(
+        tabela,
+        diretorio,
+        format='parquet',
+        partitioning=_particionamento(),
+        existing_data_behavior=modo,
+        basename_template=prefixo + '-{i}.parquet',
+    )
+
+
+def garantir_particoes(caminho_csv=CSV_PATH, diretorio=DATASET_DIR):
+    """Reconstrói as partições se estiverem ausentes ou desatualizadas em relação ao CSV"""
+    anterior = _versao_atual(diretorio)
+    if anterior and fingerprint_confere(_ler_fingerprint(os.path.join(diretorio, anterior)), caminho_csv):
+        return diretorio
+
+    fingerprint = fingerprint_arquivo(caminho_csv)
+    df = carregar_dados(caminho_csv)
+
+    # Grava uma versão nova ao lado da atual e troca o ponteiro
+    versao = f'v-{time.time_ns()}-{os.getpid()}'
+    tmp = os.path.join(diretorio, f'{versao}.tmp')
+    os.makedirs(diretorio, exist_ok=True)
+    escrever_particoes(df, tmp, modo='overwrite_or_ignore')
+    # Guarda também a ordem original das colunas para as leituras
+    _gravar_fingerprint(tmp, {**fingerprint, 'colunas': list(df.columns)})
+    os.rename(tmp, os.path.join(diretorio, versao))
+    _trocar_versao(diretorio, versao)
+
+    _limpar_versoes(diretorio, {versao, anterior}, fingerprint)
+    return diretorio
+
+
+def anexar_particoes(delta, fingerprint, diretorio=DATASET_DIR):
+    """
+    Acrescenta linhas novas como arquivos extras nas partições tocadas.
+
+    `fingerprint` é o do CSV já com as linhas novas, para que as partições não
+    sejam reconstruídas na próxima leitura.
+    """
+    atual = diretorio_atual(diretorio)
+    anterior = _ler_fingerprint(atual) if atual else None
+    if anterior is None:
+        return garantir_particoes(diretorio=diretorio)
+
+    escrever_particoes(delta, atual, modo='overwrite_or_ignore',
+                       prefixo=f'delta-{time.time_ns()}')
+    _gravar_fingerprint(atual, {**anterior, **fingerprint})
+    return diretorio
+
+
+def _exigir_atual(diretorio):
+    atual = diretorio_atual(diretorio)
+    if atual is None:
+        raise FileNotFoundError(f'Nenhuma versão das partições em {diretorio}; rode garantir_particoes()')
+    return atual
+
+
+def _dataset(atual):
+    # Arquivos iniciados por '_' (como o fingerprint) são ignorados pelo pyarrow
+    return ds.dataset(atual, format='parquet', partitioning=_particionamento())
+
+
+def listar_particoes(diretorio=DATASET_DIR):
+    """Lista as combinações uf/municipio/ano disponíveis sem ler nenhum dado"""
+    fragmentos = _dataset(_exigir_atual(diretorio)).get_fragments()
+    linhas = [ds.get_partition_keys(f.partition_expression) for f in fragmentos]
+    particoes = pd.DataFrame(linhas, columns=CHAVES_PARTICAO)
+    return particoes.drop_duplicates().sort_values(CHAVES_PARTICAO).reset_index(drop=True)
+
+
+def _filtro(anos=None, municipios=None, ufs=None):
+    """Monta a expressão de filtro sobre as chaves de partição"""
+    filtro = None
+    for chave, valores in (('ano', anos), ('municipio', municipios), ('uf', ufs)):
+        if not valores:
+            continue
+        expr = ds.field(chave).isin([str(v) for v in valores])
+        filtro = expr if filtro is None else filtro & expr
+    return filtro
+
+
+def ler_particoes(anos=None, municipios=None, ufs=None, colunas=None, diretorio=DATASET_DIR):
+    """
+    Lê apenas as partições que satisfazem os filtros.
+
+    Listas vazias ou None significam "sem filtro" para aquela chave.
+    Retorna o dataframe no mesmo formato de dados.carregar_dados.
+    """
+    # Uma versão resolvida uma vez: dados e ordem das colunas vêm da mesma
+    atual = _exigir_atual(diretorio)
+    tabela = _dataset(atual).to_table(
+        columns=colunas,
+        filter=_filtro(anos, municipios, ufs)
+    )
+    df = tabela.to_pandas()
+
+    # Restaura tipos que o particionamento não preserva ('ano' segue como texto)
+    df = normalizar_categorias(aplicar_esquema(df, ignorar=('ano',)))
+    if 'ano' in df.columns:
+        df['ano'] = df['ano'].astype(str)
+    if 'mes' in df.columns:
+        df['mes'] = df['mes'].cat.set_categories(MESES_ORDEM, ordered=True)
+
+    # Reordena as colunas como no dataframe original
+    colunas_originais = (_ler_fingerprint(atual) or {}).get('colunas')
+    if colunas_originais:
+        df = df[[c for c in colunas_originais if c in df.columns]]
+
+    ordem = [c for c in ('data', 'uf', 'municipio') if c in df.columns]
+    if ordem:
+        df = df.sort_values(ordem, kind='stable').reset_index(drop=True)
+    return df
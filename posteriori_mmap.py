@@ -0,0 +1,167 @@
+"""
+InferenceData gravado por grupo e por variável, lido com memory-map.
+
+Estrutura do diretório:
+
+    index.json                   grupos, variáveis (dims, shape, dtype), coords e attrs
+    <grupo>/<variavel>.npy       um array por variável (ex.: posterior/alpha0.npy)
+
+Cada variável é um .npy independente, aberto com mmap_mode='r': ler
+alpha0 e efeito_mes para uma previsão não toca em posterior/mu.npy nem na
+preditiva, que em modelos com muitas observações são a maior parte do
+InferenceData. Fatias por cadeia/draw (ex.: posterior['mu'][0]) também só
+leem as páginas correspondentes. A leitura não usa pickle (allow_pickle=False).
+
+Zarr/NetCDF fariam o mesmo papel, mas exigiriam zarr ou netCDF4, que não
+estão nas dependências; .npy + mmap cobre o acesso por variável só com NumPy.
+
+Uso:
+    salvar_inferencedata(idata, 'data/bayes/modelofinal_2/idata')
+    posteriori = PosterioriMmap('data/bayes/modelofinal_2/idata')
+    posteriori.amostras('alpha0')              # (cadeias·draws,)
+    posteriori.para_inferencedata(variaveis={'posterior': ['alpha0', 'sigma_ano']})
+
+Conversão de um .pkl antigo:
+    python posteriori_mmap.py data/bayes/modelofinal_2/idata_modelofinal.pkl data/bayes/modelofinal_2/idata
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+VERSAO_FORMATO = 1
+INDICE = "index.json"
+
+
+def _coordenada_json(valores):
+    """Valores da coordenada em JSON, ou None quando não serializáveis"""
+    valores = np.asarray(valores)
+    if valores.dtype.kind in "iub":
+        return [int(v) for v in valores]
+    if valores.dtype.kind == "f":
+        return [float(v) for v in valores]
+    if valores.dtype.kind in "UO":
+        lista = valores.tolist()
+        if all(isinstance(v, str) for v in lista):
+            return lista
+    return None
+
+
+def _attr_json(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, (str, int, float, bool)) or valor is None:
+        return valor
+    return str(valor)
+
+
+def salvar_inferencedata(idata, diretorio, grupos=None):
+    """Grava cada variável de cada grupo (padrão: todos) em <grupo>/<variavel>.npy"""
+    indice = {"versao": VERSAO_FORMATO, "grupos": {}}
+    for grupo in grupos or idata.groups():
+        dataset = idata[grupo]
+        os.makedirs(os.path.join(diretorio, grupo), exist_ok=True)
+        variaveis = {}
+        for nome, variavel in dataset.data_vars.items():
+            valores = np.ascontiguousarray(variavel.values)
+            if valores.dtype == object:
+                raise ValueError(f"{grupo}/{nome}: arrays de objetos não são suportados")
+            arquivo = f"{grupo}/{nome}.npy"
+            np.save(os.path.join(diretorio, arquivo), valores, allow_pickle=False)
+            variaveis[nome] = {
+                "arquivo": arquivo,
+                "dims": list(variavel.dims),
+                "shape": list(valores.shape),
+                "dtype": valores.dtype.str,
+            }
+        coords = {}
+        for dim in dataset.coords:
+            valores = _coordenada_json(dataset.coords[dim].values)
+            if valores is not None:
+                coords[str(dim)] = valores
+        indice["grupos"][grupo] = {
+            "variaveis": variaveis,
+            "coords": coords,
+            "attrs": {k: _attr_json(v) for k, v in dataset.attrs.items()},
+        }
+    # Índice por último: um diretório sem índice é uma gravação incompleta
+    with open(os.path.join(diretorio, INDICE), "w", encoding="utf-8") as f:
+        json.dump(indice, f, ensure_ascii=False, indent=2)
+
+
+class PosterioriMmap:
+    """Leitura por variável de um InferenceData gravado com salvar_inferencedata"""
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, INDICE), "r", encoding="utf-8") as f:
+            indice = json.load(f)
+        if indice.get("versao") != VERSAO_FORMATO:
+            raise ValueError(f"Formato {indice.get('versao')} não suportado (esperado {VERSAO_FORMATO})")
+        self._grupos = indice["grupos"]
+
+    def grupos(self):
+        return list(self._grupos)
+
+    def variaveis(self, grupo="posterior"):
+        return list(self._grupos.get(grupo, {}).get("variaveis", {}))
+
+    def dims(self, nome, grupo="posterior"):
+        return self._info(nome, grupo)["dims"]
+
+    def _info(self, nome, grupo):
+        try:
+            return self._grupos[grupo]["variaveis"][nome]
+        except KeyError:
+            raise KeyError(f"Variável '{nome}' não encontrada no grupo '{grupo}'") from None
+
+    def array(self, nome, grupo="posterior"):
+        """Array da variável, memory-mapped (somente leitura)"""
+        caminho = os.path.join(self.diretorio, self._info(nome, grupo)["arquivo"])
+        return np.load(caminho, mmap_mode="r", allow_pickle=False)
+
+    def amostras(self, nome, grupo="posterior"):
+        """(cadeias·draws, ...) com cadeias achatadas, ainda sem ler o arquivo"""
+        valores = self.array(nome, grupo)
+        if self.dims(nome, grupo)[:2] != ["chain", "draw"]:
+            return valores
+        return valores.reshape((-1,) + valores.shape[2:])
+
+    def para_inferencedata(self, grupos=None, variaveis=None):
+        """
+        InferenceData com os grupos/variáveis pedidos (padrão: tudo).
+
+        variaveis: {grupo: [nomes]} para restringir as variáveis de cada grupo.
+        Os arrays continuam memory-mapped até serem usados.
+        """
+        import xarray as xr
+        import arviz as az
+
+        variaveis = variaveis or {}
+        grupos = grupos or list(variaveis) or self.grupos()
+        datasets = {}
+        for grupo in grupos:
+            info = self._grupos[grupo]
+            nomes = variaveis.get(grupo, list(info["variaveis"]))
+            data_vars = {nome: (self.dims(nome, grupo), self.array(nome, grupo)) for nome in nomes}
+            dims_usadas = {d for nome in nomes for d in self.dims(nome, grupo)}
+            coords = {d: v for d, v in info["coords"].items() if d in dims_usadas}
+            datasets[grupo] = xr.Dataset(data_vars, coords=coords, attrs=info["attrs"])
+        return az.InferenceData(**datasets)
+
+
+if __name__ == "__main__":
+    import argparse
+    import pickle
+
+    parser = argparse.ArgumentParser(description="Converte um InferenceData .pkl para .npy por variável")
+    parser.add_argument("origem", help="arquivo .pkl com o InferenceData")
+    parser.add_argument("destino", help="diretório de saída")
+    args = parser.parse_args()
+
+    with open(args.origem, "rb") as f:
+        idata = pickle.load(f)
+    salvar_inferencedata(idata, args.destino)
+    print(f"Grupos gravados em {args.destino}: {', '.join(idata.groups())}")
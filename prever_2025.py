@@ -0,0 +1,150 @@
+"""
+Script: prever_2025.py
+
+Previsão 2025 a partir das amostras da posteriori do modelo final.
+
+A preditiva é calculada em NumPy por previsao.PrevisorNegBin, sem reconstruir
+o modelo PyMC: cada ano futuro recebe um efeito de ano novo
+~ Normal(0, sigma_ano) e as covariáveis ficam na média do treino.
+
+Por padrão prevê os 12 meses após o treino (predicoes_2025.json). Para outros
+horizontes:
+    python prever_2025.py --inicio 2025-01 --meses 36   # predicoes_horizonte.json
+
+O modelo vem do registro (registro_modelos.py): por padrão a versão mais
+recente; --modelo aceita "pinned" ou o nome de uma versão. Os arquivos são
+gravados no diretório da versão e o manifesto é atualizado.
+
+As amostras também são salvas ordenadas em excedencia_*.npz
+(excedencia.IndiceExcedencia), usado pela página 3 para P(Y > limiar), e
+resumidas em quantis_*.json (quantis de 1% a 99% e HDIs de 50/80/90/95%).
+Os totais anuais e trimestrais (soma das amostras conjuntas dos meses) vão
+para totais_*.json. As próprias amostras, em inteiros compactos e
+comprimidas, ficam em amostras_*.npz (arquivo_amostras.py) para a página 3.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import numpy as np
+
+from arquivo_amostras import exportar_amostras, imprimir_relatorio
+from excedencia import IndiceExcedencia
+from posteriori_mmap import PosterioriMmap
+from previsao import PrevisorNegBin, grade_quantis, horizonte, resumir, totais
+from registro_modelos import RegistroModelos
+
+
+mes_nomes = [
+    "JANEIRO","FEVEREIRO","MARÇO","ABRIL","MAIO","JUNHO",
+    "JULHO","AGOSTO","SETEMBRO","OUTUBRO","NOVEMBRO","DEZEMBRO"
+]
+
+parser = argparse.ArgumentParser(description="Previsão do modelo bayesiano final")
+parser.add_argument("--inicio", help="primeiro mês previsto (AAAA-MM); padrão: janeiro após o treino")
+parser.add_argument("--meses", type=int, default=12, help="número de meses do horizonte")
+parser.add_argument("--modelo", default="latest", help='versão do registro: "latest", "pinned" ou um nome')
+args = parser.parse_args()
+
+registro = RegistroModelos()
+versao = registro.resolver(args.modelo)
+DATA_DIR = registro.diretorio(versao)
+
+# -------------------------------------------------------
+# Carregar idata e anos de treino
+# -------------------------------------------------------
+
+# Só as variáveis usadas na previsão são lidas (memory-map por variável);
+# versões antigas ainda têm o InferenceData em .pkl
+if os.path.exists(f"{DATA_DIR}/idata/index.json"):
+    idata = PosterioriMmap(f"{DATA_DIR}/idata")
+elif os.path.exists(f"{DATA_DIR}/idata_modelofinal.pkl"):
+    with open(f"{DATA_DIR}/idata_modelofinal.pkl", "rb") as f:
+        idata = pickle.load(f)
+else:
+    parser.error(f"a versão '{versao}' não tem amostras da posteriori (idata/ ou idata_modelofinal.pkl)")
+
+anos = registro.anos_treino(versao)
+if anos is None:
+    parser.error(f"a versão '{versao}' não informa os anos de treino "
+                 "(anos_treino no model_config.json ou predicoes_in_sample.json)")
+try:
+    previsor = PrevisorNegBin.de_inferencedata(idata, anos=anos)
+except ValueError as erro:
+    parser.error(f"versão '{versao}': {erro}")
+
+# -------------------------------------------------------
+# Previsão do horizonte
+# -------------------------------------------------------
+
+if args.inicio:
+    ano_inicio, mes_inicio = (int(v) for v in args.inicio.split("-"))
+else:
+    ano_inicio, mes_inicio = previsor.anos[-1] + 1, 1
+
+periodos = horizonte(ano_inicio, mes_inicio, args.meses)
+
+if previsor.n_covariaveis > 0:
+    X_pred = np.zeros((len(periodos), previsor.n_covariaveis))
+else:
+    X_pred = None
+
+y_samples = previsor.prever_periodos(periodos, X_pred, seed=123)
+
+# -------------------------------------------------------
+# Extrair resultados
+# -------------------------------------------------------
+
+estatisticas = resumir(y_samples, prob=0.95)
+
+resultados = []
+for i, (ano, mes_num) in enumerate(periodos):
+    resultados.append({
+        "ano": int(ano),
+        "mes": mes_nomes[mes_num - 1],
+        "mes_num": int(mes_num),
+        "y_pred_mediana": float(estatisticas["mediana"][i]),
+        "y_pred_hdi_low": float(estatisticas["hdi_low"][i]),
+        "y_pred_hdi_high": float(estatisticas["hdi_high"][i])
+    })
+
+padrao = args.inicio is None and args.meses == 12
+sufixo = str(ano_inicio) if padrao else "horizonte"
+saida = f"{DATA_DIR}/predicoes_{sufixo}.json"
+
+with open(saida, "w", encoding="utf-8") as f:
+    json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+# Amostras ordenadas por mês para consultas de excedência
+if padrao:
+    rotulos = [r["mes"] for r in resultados]
+else:
+    rotulos = [f"{r['mes']}/{r['ano']}" for r in resultados]
+saida_excedencia = f"{DATA_DIR}/excedencia_{sufixo}.npz"
+IndiceExcedencia.de_amostras(y_samples, rotulos).salvar(saida_excedencia)
+
+# Grade de quantis: qualquer banda de credibilidade sem reamostrar
+saida_quantis = f"{DATA_DIR}/quantis_{sufixo}.json"
+with open(saida_quantis, "w", encoding="utf-8") as f:
+    json.dump(grade_quantis(y_samples, periodos), f)
+
+# Totais anuais e trimestrais a partir das amostras conjuntas
+saida_totais = f"{DATA_DIR}/totais_{sufixo}.json"
+with open(saida_totais, "w", encoding="utf-8") as f:
+    json.dump({
+        "anual": totais(y_samples, periodos, por="ano").to_dict(orient="records"),
+        "trimestral": totais(y_samples, periodos, por="trimestre").to_dict(orient="records")
+    }, f, ensure_ascii=False, indent=2)
+
+# Amostras da preditiva (contagens) para o dashboard
+relatorio_amostras = exportar_amostras({"y_pred": y_samples}, f"{DATA_DIR}/amostras_{sufixo}.npz")
+
+registro.registrar(DATA_DIR)
+
+print(f"\nOK! Previsão ({len(periodos)} meses a partir de {ano_inicio}-{mes_inicio:02d}) salva em {saida}")
+print(f"Índice de excedência salvo em {saida_excedencia}")
+print(f"Grade de quantis salva em {saida_quantis}")
+print(f"Totais anuais e trimestrais salvos em {saida_totais}")
+imprimir_relatorio(relatorio_amostras)
+print(f"Manifesto da versão {versao} atualizado")
@@ -0,0 +1,395 @@
+"""
+Previsão do modelo final (NegBin hierárquico) direto das amostras da posteriori.
+
+O modelo de treinar_modelo_bayesiano_final.py é
+
+    log μ = alpha0 + efeito_mes[mes] + efeito_ano[ano] + X_z · beta
+    y ~ NegativeBinomial(μ, alpha_nb)
+
+Dadas as amostras (alpha0, efeito_mes, efeito_ano, sigma_ano, beta, alpha_nb),
+a preditiva de qualquer grade (mes, ano, covariáveis) é uma única operação
+vetorizada em NumPy: (amostras × pontos). Não é preciso reconstruir nem
+compilar o modelo PyMC.
+
+Anos fora do período de treino (índice >= número de anos observados) recebem
+um efeito novo ~ Normal(0, sigma_ano), sorteado uma vez por amostra e por ano
+e compartilhado pelos meses daquele ano.
+
+Para horizontes em calendário (ex.: 24 ou 36 meses à frente), prever_periodos
+recebe pares (ano, mês) e converte os anos em índices a partir dos anos de
+treino.
+
+Quando a matriz (amostras × pontos) não cabe na memória, resumir_em_blocos
+gera a preditiva por blocos de draws e só guarda os acumuladores de
+hdi.AcumuladorPreditiva.
+
+Uso:
+    previsor = PrevisorNegBin.de_inferencedata(idata, anos=[2022, 2023, 2024])
+    y = previsor.prever(mes_idx=np.arange(12), ano_idx=np.full(12, 3), seed=123)
+    previsor.prever_periodos(horizonte(2025, 1, 36), resumo=True)
+"""
+
+import numpy as np
+import pandas as pd
+
+from hdi import MAX_CLASSES, AcumuladorPreditiva, hdi, quantis
+from posteriori_mmap import PosterioriMmap
+
+
+# Variáveis da posteriori usadas na previsão
+VARIAVEIS = ['alpha0', 'efeito_mes', 'efeito_ano', 'sigma_ano', 'beta', 'alpha_nb']
+
+# Grade de quantis (1% a 99%) e níveis de HDI salvos junto com as previsões;
+# as bandas da página 3 usam só os HDIs, então todo nível oferecido lá está aqui
+NIVEIS_QUANTIS = [round(q / 100, 2) for q in range(1, 100)]
+PROBS_HDI = [0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.98]
+
+
+def horizonte(ano, mes, n_meses):
+    """n_meses pares (ano, mês) consecutivos a partir de ano/mês (mês de 1 a 12)"""
+    inicio = ano * 12 + (mes - 1)
+    return [(t // 12, t % 12 + 1) for t in range(inicio, inicio + n_meses)]
+
+
+def resumir(amostras, prob=0.95):
+    """
+    Média, mediana e HDI de cada ponto.
+
+    amostras: matriz (amostras × pontos) ou AcumuladorPreditiva (preditiva
+    acumulada em blocos, ver PrevisorNegBin.resumir_em_blocos).
+    """
+    if isinstance(amostras, AcumuladorPreditiva):
+        intervalo = amostras.hdi(prob)
+        return {
+            'media': amostras.media(),
+            'mediana': amostras.quantis(0.5)[0],
+            'hdi_low': intervalo[:, 0],
+            'hdi_high': intervalo[:, 1],
+        }
+    intervalo = hdi(amostras, prob)
+    return {
+        'media': amostras.mean(axis=0),
+        'mediana': np.median(amostras, axis=0),
+        'hdi_low': intervalo[:, 0],
+        'hdi_high': intervalo[:, 1],
+    }
+
+
+def totais(amostras, periodos, por='ano', prob=0.95):
+    """
+    Totais por ano ou trimestre somando as amostras conjuntas dos meses.
+
+    Somar amostra a amostra preserva a correlação entre os meses (efeito de
+    ano compartilhado); médias de limites mensais não dão o intervalo do total.
+    Retorna um DataFrame com a chave (ano ou ano/trimestre), n_meses, média,
+    mediana e HDI de cada total.
+    """
+    periodos = np.asarray(periodos, dtype='int64').reshape(-1, 2)
+    if por == 'ano':
+        chaves = pd.DataFrame({'ano': periodos[:, 0]})
+    elif por == 'trimestre':
+        chaves = pd.DataFrame({'ano': periodos[:, 0], 'trimestre': (periodos[:, 1] - 1) // 3 + 1})
+    else:
+        raise ValueError(f"Agregação '{por}' não suportada. Use 'ano' ou 'trimestre'")
+
+    grupos = chaves.groupby(list(chaves.columns), sort=True).indices
+    somas = np.stack([amostras[:, colunas].sum(axis=1) for colunas in grupos.values()], axis=1)
+    estatisticas = resumir(somas, prob)
+    resultado = pd.DataFrame(
+        [k if isinstance(k, tuple) else (k,) for k in grupos.keys()],
+        columns=list(chaves.columns),
+    )
+    resultado['n_meses'] = [len(colunas) for colunas in grupos.values()]
+    for nome in ('media', 'mediana', 'hdi_low', 'hdi_high'):
+        resultado[f'total_{nome}'] = estatisticas[nome]
+    return resultado
+
+
+def grade_quantis(amostras, periodos, niveis=NIVEIS_QUANTIS, probs_hdi=PROBS_HDI):
+    """
+    Resumo compacto da preditiva de cada ponto: quantis e HDIs em vários níveis.
+
+    periodos identifica cada coluna de amostras (ex.: pares (ano, mes_num)).
+    amostras também pode ser um AcumuladorPreditiva. Com a grade, as bandas
+    de credibilidade dos níveis em probs_hdi saem sem as amostras (ver banda).
+    Os HDIs são aninhados: cada nível contém o anterior (ruído de Monte Carlo
+    raramente inverte limites vizinhos; nesse caso o mais largo é estendido).
+    """
+    probs_hdi = sorted(probs_hdi)
+    if isinstance(amostras, AcumuladorPreditiva):
+        intervalos = amostras.hdi(probs_hdi)
+        grade = amostras.quantis(niveis)
+    else:
+        intervalos = hdi(amostras, probs_hdi)
+        grade = quantis(amostras, niveis)
+    intervalos[..., 0] = np.minimum.accumulate(intervalos[..., 0], axis=0)
+    intervalos[..., 1] = np.maximum.accumulate(intervalos[..., 1], axis=0)
+    return {
+        'periodos': [[int(v) for v in p] for p in periodos],
+        'niveis': list(niveis),
+        'quantis': grade.T.round(1).tolist(),
+        'hdi': {str(p): intervalos[i].tolist() for i, p in enumerate(probs_hdi)},
+    }
+
+
+def niveis_banda(grade):
+    """Níveis de HDI salvos na grade, em ordem crescente"""
+    return sorted(float(p) for p in grade['hdi'])
+
+
+def banda(grade, prob):
+    """
+    HDI (inferior, superior) de cada ponto no nível prob.
+
+    Só níveis salvos na grade (niveis_banda): misturar HDIs com intervalos
+    centrais interpolados dos quantis gera bandas não aninhadas.
+    """
+    if str(prob) not in grade['hdi']:
+        raise ValueError(f"HDI {prob} não salvo na grade; níveis disponíveis: {niveis_banda(grade)}")
+    limites = np.asarray(grade['hdi'][str(prob)], dtype='float64')
+    return limites[:, 0], limites[:, 1]
+
+
+# Efeitos guardados como Deterministic no treino; sem eles (treino sem
+# --guardar-deterministicos) saem de raw · sigma
+EFEITOS_NAO_CENTRADOS = {
+    'efeito_mes': ('mes_raw', 'sigma_mes'),
+    'efeito_ano': ('ano_raw', 'sigma_ano'),
+}
+
+
+def _variavel(idata, nome, grupo='posterior'):
+    """Array (amostras, ...) de uma variável, ou None se ela não existir"""
+    if isinstance(idata, PosterioriMmap):
+        if nome not in idata.variaveis(grupo):
+            return None
+        return idata.amostras(nome, grupo)
+    if grupo not in idata.groups() or nome not in idata[grupo]:
+        return None
+    valores = idata[grupo][nome].values
+    if idata[grupo][nome].dims[:2] != ('chain', 'draw'):
+        return valores
+    return valores.reshape((-1,) + valores.shape[2:])
+
+
+def amostras_posteriori(idata, variaveis=VARIAVEIS):
+    """
+    Arrays (amostras, ...) da posteriori, com cadeias e draws achatados.
+
+    idata pode ser um InferenceData ou um PosterioriMmap; neste caso só os
+    arquivos das variáveis pedidas são lidos. efeito_mes/efeito_ano ausentes
+    são recalculados a partir dos efeitos brutos.
+    """
+    amostras = {}
+    for nome in variaveis:
+        valores = _variavel(idata, nome)
+        if valores is None and nome in EFEITOS_NAO_CENTRADOS:
+            bruto, escala = (_variavel(idata, v) for v in EFEITOS_NAO_CENTRADOS[nome])
+            if bruto is not None and escala is not None:
+                valores = bruto * escala[:, None]
+        if valores is not None:
+            amostras[nome] = valores
+    return amostras
+
+
+def recalcular_mu(idata, cadeia=None):
+    """
+    μ in-sample (cadeias × draws × observações) recalculado da posteriori.
+
+    Substitui o Deterministic "mu" quando o treino não o guarda: usa alpha0,
+    os efeitos (ou mes_raw/ano_raw · sigma), beta e os índices/covariáveis de
+    constant_data, vetorizado sobre as amostras. Com cadeia, só aquela cadeia
+    (draws × observações), para limitar a memória.
+    """
+    previsor = PrevisorNegBin.de_inferencedata(idata)
+    mes_idx = _variavel(idata, 'mes_idx', 'constant_data')
+    ano_idx = _variavel(idata, 'ano_idx', 'constant_data')
+    X = _variavel(idata, 'X', 'constant_data')
+    if mes_idx is None or ano_idx is None:
+        raise ValueError("constant_data sem mes_idx/ano_idx")
+
+    if isinstance(idata, PosterioriMmap):
+        n_cadeias = idata.array('alpha0').shape[0]
+    else:
+        n_cadeias = idata.posterior.sizes['chain']
+    n_draws = previsor.n_amostras // n_cadeias
+    if cadeia is not None:
+        previsor = previsor.fatia(slice(cadeia * n_draws, (cadeia + 1) * n_draws))
+
+    mu = np.exp(previsor.log_mu(mes_idx, ano_idx, X))
+    return mu if cadeia is not None else mu.reshape(n_cadeias, n_draws, -1)
+
+
+class PrevisorNegBin:
+    """Preditiva posteriori vetorizada do NegBin hierárquico (mês, ano, covariáveis)"""
+
+    def __init__(self, alpha0, efeito_mes, efeito_ano, sigma_ano, alpha_nb, beta=None, anos=None):
+        self.alpha0 = np.asarray(alpha0, dtype='float64')
+        self.efeito_mes = np.asarray(efeito_mes, dtype='float64')
+        self.efeito_ano = np.asarray(efeito_ano, dtype='float64')
+        self.sigma_ano = np.asarray(sigma_ano, dtype='float64')
+        self.alpha_nb = np.asarray(alpha_nb, dtype='float64')
+        self.beta = None if beta is None else np.asarray(beta, dtype='float64')
+
+        n = len(self.alpha0)
+        for nome in ('efeito_mes', 'efeito_ano', 'sigma_ano', 'alpha_nb', 'beta'):
+            valor = getattr(self, nome)
+            if valor is not None and len(valor) != n:
+                raise ValueError(f"{nome} tem {len(valor)} amostras; alpha0 tem {n}")
+
+        # Rótulos dos anos de treino, na ordem de efeito_ano (padrão: 0, 1, 2, ...)
+        self.anos = list(range(self.n_anos_obs)) if anos is None else [int(a) for a in anos]
+        if len(self.anos) != self.n_anos_obs:
+            raise ValueError(f"{len(self.anos)} anos informados; efeito_ano tem {self.n_anos_obs}")
+
+    @classmethod
+    def de_inferencedata(cls, idata, anos=None):
+        """Previsor a partir do InferenceData (ou PosterioriMmap) salvo pelo treinamento"""
+        return cls(**amostras_posteriori(idata), anos=anos)
+
+    @property
+    def n_amostras(self):
+        return len(self.alpha0)
+
+    @property
+    def n_anos_obs(self):
+        return self.efeito_ano.shape[1]
+
+    @property
+    def n_covariaveis(self):
+        return 0 if self.beta is None else self.beta.shape[1]
+
+    def _efeitos_ano(self, ano_idx, rng):
+        """Efeito de ano (amostras × pontos); anos novos ~ Normal(0, sigma_ano)"""
+        anos_novos = np.unique(ano_idx[ano_idx >= self.n_anos_obs])
+        if len(anos_novos):
+            novos = rng.standard_normal((self.n_amostras, len(anos_novos))) * self.sigma_ano[:, None]
+            tabela = np.concatenate([self.efeito_ano, novos], axis=1)
+            # Índices dos anos novos passam a apontar para as colunas acrescentadas
+            posicao = np.searchsorted(anos_novos, ano_idx)
+            ano_idx = np.where(ano_idx >= self.n_anos_obs, self.n_anos_obs + posicao, ano_idx)
+        else:
+            tabela = self.efeito_ano
+        return tabela[:, ano_idx]
+
+    def _validar(self, mes_idx, ano_idx, X):
+        mes_idx = np.asarray(mes_idx, dtype='int64')
+        ano_idx = np.broadcast_to(np.asarray(ano_idx, dtype='int64'), mes_idx.shape)
+        if mes_idx.ndim != 1:
+            raise ValueError("mes_idx deve ser unidimensional")
+        if ((mes_idx < 0) | (mes_idx >= self.efeito_mes.shape[1])).any():
+            raise ValueError(f"mes_idx fora de 0..{self.efeito_mes.shape[1] - 1}")
+        if (ano_idx < 0).any():
+            raise ValueError("ano_idx negativo")
+        if X is not None:
+            X = np.asarray(X, dtype='float64').reshape(len(mes_idx), -1)
+            if X.shape[1] != self.n_covariaveis:
+                raise ValueError(f"X tem {X.shape[1]} covariáveis; o modelo tem {self.n_covariaveis}")
+        return mes_idx, ano_idx, X
+
+    def log_mu(self, mes_idx, ano_idx, X=None, seed=None):
+        """Preditor linear (amostras × pontos); X já padronizado (z-score)"""
+        mes_idx, ano_idx, X = self._validar(mes_idx, ano_idx, X)
+        rng = np.random.default_rng(seed)
+        log_mu = (
+            self.alpha0[:, None]
+            + self.efeito_mes[:, mes_idx]
+            + self._efeitos_ano(ano_idx, rng)
+        )
+        if X is not None and self.beta is not None:
+            log_mu += self.beta @ X.T
+        return log_mu
+
+    def prever(self, mes_idx, ano_idx, X=None, seed=None, retornar_mu=False):
+        """
+        Amostras da preditiva (amostras × pontos) para a grade (mes_idx, ano_idx, X).
+
+        Sem X, as covariáveis ficam na média do treino (z-score zero). Com
+        retornar_mu=True devolve também μ (amostras × pontos).
+        """
+        rng = np.random.default_rng(seed)
+        mu = np.exp(self.log_mu(mes_idx, ano_idx, X, seed=rng))
+        # NegBin do PyMC (média μ, dispersão α): n = α, p = α / (α + μ)
+        alpha = self.alpha_nb[:, None]
+        y = rng.negative_binomial(alpha, alpha / (alpha + mu))
+        return (y, mu) if retornar_mu else y
+
+    def fatia(self, linhas):
+        """Previsor restrito às amostras da posteriori em linhas (slice ou índices)"""
+        return PrevisorNegBin(
+            self.alpha0[linhas], self.efeito_mes[linhas], self.efeito_ano[linhas],
+            self.sigma_ano[linhas], self.alpha_nb[linhas],
+            beta=None if self.beta is None else self.beta[linhas], anos=self.anos,
+        )
+
+    def prever_em_blocos(self, mes_idx, ano_idx, X=None, tamanho_bloco=2000, seed=None):
+        """
+        Gera a preditiva em blocos (tamanho_bloco amostras × pontos).
+
+        Com tamanho_bloco igual ao número de draws por cadeia, cada bloco é
+        uma cadeia (as amostras vêm achatadas cadeia a cadeia).
+        """
+        rng = np.random.default_rng(seed)
+        for inicio in range(0, self.n_amostras, tamanho_bloco):
+            bloco = self.fatia(slice(inicio, inicio + tamanho_bloco))
+            yield bloco.prever(mes_idx, ano_idx, X, seed=rng)
+
+    def resumir_em_blocos(self, mes_idx, ano_idx, X=None, tamanho_bloco=2000, seed=None,
+                          resolucao=1, limiares=None, max_classes=MAX_CLASSES):
+        """
+        Preditiva acumulada bloco a bloco, sem guardar a matriz (amostras × pontos).
+
+        Retorna um AcumuladorPreditiva (média, quantis, HDIs e P(Y > limiares));
+        resumir e grade_quantis aceitam o acumulador no lugar das amostras.
+        O histograma tem no máximo max_classes classes int32 por ponto; com
+        max_classes=None e resolucao=1 os resumos são exatos.
+        """
+        acumulador = AcumuladorPreditiva(
+            len(np.atleast_1d(mes_idx)), resolucao, limiares, max_classes=max_classes,
+        )
+        for y in self.prever_em_blocos(mes_idx, ano_idx, X, tamanho_bloco, seed):
+            acumulador.acumular(y)
+        return acumulador
+
+    def indices_periodos(self, periodos):
+        """
+        Converte pares (ano, mês) em (mes_idx, ano_idx).
+
+        Anos de treino usam o índice do efeito estimado; anos posteriores
+        recebem índices novos (um por ano), de modo que compartilham o mesmo
+        efeito sorteado entre os seus meses.
+        """
+        periodos = np.asarray(periodos, dtype='int64').reshape(-1, 2)
+        anos, meses = periodos[:, 0], periodos[:, 1]
+        if ((meses < 1) | (meses > 12)).any():
+            raise ValueError("Meses devem estar entre 1 e 12")
+        if (anos < self.anos[0]).any():
+            raise ValueError(f"Anos anteriores ao treino ({self.anos[0]}) não são suportados")
+
+        posicao = {ano: i for i, ano in enumerate(self.anos)}
+        futuros = sorted(set(anos.tolist()) - set(self.anos))
+        posicao.update({ano: self.n_anos_obs + i for i, ano in enumerate(futuros)})
+        ano_idx = np.array([posicao[a] for a in anos.tolist()], dtype='int64')
+        return meses - 1, ano_idx
+
+    def prever_periodos(self, periodos, X=None, seed=None, resumo=False, prob=0.95):
+        """
+        Preditiva para uma lista de pares (ano, mês), ex.: horizonte(2025, 1, 36).
+
+        Retorna as amostras (amostras × períodos) ou, com resumo=True, um
+        DataFrame com ano, mes_num, média, mediana e HDI de cada período.
+        """
+        mes_idx, ano_idx = self.indices_periodos(periodos)
+        y = self.prever(mes_idx, ano_idx, X, seed=seed)
+        if not resumo:
+            return y
+        periodos = np.asarray(periodos, dtype='int64').reshape(-1, 2)
+        estatisticas = resumir(y, prob)
+        return pd.DataFrame({
+            'ano': periodos[:, 0],
+            'mes_num': periodos[:, 1],
+            'y_pred_media': estatisticas['media'],
+            'y_pred_mediana': estatisticas['mediana'],
+            'y_pred_hdi_low': estatisticas['hdi_low'],
+            'y_pred_hdi_high': estatisticas['hdi_high'],
+        })
@@ -0,0 +1,218 @@
+"""
+Registro versionado dos artefatos do modelo bayesiano.
+
+Cada execução de treinamento é um diretório em data/bayes/ com um
+manifest.json:
+
+    {
+      "versao": "modelofinal_20260301_120000",
+      "criado_em": "2026-03-01T12:00:00",
+      "dados": {"arquivo": "data/PMDF_...csv", "tamanho": ..., "sha256": ...},
+      "config": {...},                      # conteúdo de model_config.json
+      "metricas": {"rmse": ..., "cobertura_hdi95": ..., "r_hat_max": ...},
+      "artefatos": {"predicoes_2025.json": {"tamanho": ..., "sha256": ...}, ...}
+    }
+
+data/bayes/registro.json guarda a versão fixada ("pinned"). As páginas
+pedem "pinned" (a fixada ou, sem ela, a mais recente), "latest" ou um nome
+de versão; o hash de cada artefato no manifesto identifica o conteúdo, de
+modo que os caches (functions.artefato_modelo) só releem um arquivo quando
+ele de fato mudou.
+
+Uso:
+    python registro_modelos.py registrar data/bayes/modelofinal_2
+    python registro_modelos.py fixar modelofinal_2
+    python registro_modelos.py listar
+"""
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from dados import CSV_PATH, fingerprint_arquivo
+
+
+REGISTRO_DIR = "data/bayes"
+MANIFESTO = "manifest.json"
+ARQUIVO_FIXADA = "registro.json"
+
+
+def _ler_json(caminho):
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _escrever_json(caminho, conteudo):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f, ensure_ascii=False, indent=2)
+
+
+def _conteudo(caminho):
+    """Tamanho e SHA-256 de um arquivo (sem mtime, que muda a cada checkout)"""
+    fingerprint = fingerprint_arquivo(caminho)
+    return {"tamanho": fingerprint["tamanho"], "sha256": fingerprint["sha256"]}
+
+
+def calcular_metricas(diretorio):
+    """Métricas do ajuste a partir dos artefatos do diretório (as que existirem)"""
+    metricas = {}
+    caminho_pred = os.path.join(diretorio, "predicoes_in_sample.json")
+    if os.path.exists(caminho_pred):
+        pred = _ler_json(caminho_pred)
+        y = np.array([p["ocor_atend"] for p in pred], dtype="float64")
+        mediana = np.array([p["y_pred_mediana"] for p in pred], dtype="float64")
+        low = np.array([p["y_pred_hdi_low"] for p in pred], dtype="float64")
+        high = np.array([p["y_pred_hdi_high"] for p in pred], dtype="float64")
+        metricas["rmse"] = float(np.sqrt(np.mean((y - mediana) ** 2)))
+        metricas["mae"] = float(np.mean(np.abs(y - mediana)))
+        metricas["cobertura_hdi95"] = float(np.mean((y >= low) & (y <= high)))
+        metricas["largura_media_hdi95"] = float(np.mean(high - low))
+    caminho_resumo = os.path.join(diretorio, "posterior_summary.json")
+    if os.path.exists(caminho_resumo):
+        resumo = _ler_json(caminho_resumo)
+        metricas["r_hat_max"] = float(max(linha["r_hat"] for linha in resumo))
+        metricas["ess_bulk_min"] = float(min(linha["ess_bulk"] for linha in resumo))
+    return metricas
+
+
+class RegistroModelos:
+    """Versões de modelo em REGISTRO_DIR, cada uma descrita por um manifest.json"""
+
+    def __init__(self, raiz=REGISTRO_DIR):
+        self.raiz = raiz
+
+    def diretorio(self, versao):
+        return os.path.join(self.raiz, versao)
+
+    def caminho(self, versao, artefato):
+        return os.path.join(self.raiz, versao, artefato)
+
+    def caminhos_manifestos(self):
+        """Manifestos existentes e o arquivo da versão fixada (para chaves de cache)"""
+        caminhos = [
+            os.path.join(self.raiz, nome, MANIFESTO)
+            for nome in sorted(os.listdir(self.raiz))
+            if os.path.isfile(os.path.join(self.raiz, nome, MANIFESTO))
+        ]
+        return caminhos + [os.path.join(self.raiz, ARQUIVO_FIXADA)]
+
+    def manifesto(self, versao):
+        caminho = self.caminho(versao, MANIFESTO)
+        if not os.path.exists(caminho):
+            raise KeyError(f"Versão '{versao}' não registrada em {self.raiz}")
+        return _ler_json(caminho)
+
+    def versoes(self):
+        """Manifestos de todas as versões, da mais antiga para a mais recente"""
+        manifestos = [_ler_json(c) for c in self.caminhos_manifestos()[:-1]]
+        return sorted(manifestos, key=lambda m: (m["criado_em"], m["versao"]))
+
+    def fixada(self):
+        caminho = os.path.join(self.raiz, ARQUIVO_FIXADA)
+        if not os.path.exists(caminho):
+            return None
+        return _ler_json(caminho).get("fixada")
+
+    def fixar(self, versao):
+        self.manifesto(versao)
+        _escrever_json(os.path.join(self.raiz, ARQUIVO_FIXADA), {"fixada": versao})
+
+    def resolver(self, versao="pinned"):
+        """Nome da versão para "latest", "pinned" (fixada ou mais recente) ou um nome"""
+        if versao == "pinned":
+            versao = self.fixada() or "latest"
+        if versao == "latest":
+            versoes = self.versoes()
+            if not versoes:
+                raise KeyError(f"Nenhuma versão registrada em {self.raiz}")
+            return versoes[-1]["versao"]
+        self.manifesto(versao)
+        return versao
+
+    def anos_treino(self, versao):
+        """
+        Anos de treino da versão, na ordem de efeito_ano, ou None.
+
+        Versões antigas não gravam anos_treino no model_config.json, e as
+        coordenadas "ano" do InferenceData são só índices (0, 1, 2, ...): os
+        anos saem então de predicoes_in_sample.json.
+        """
+        config = _ler_json(self.caminho(versao, "model_config.json"))
+        if "anos_treino" in config:
+            return [int(a) for a in config["anos_treino"]]
+        caminho_pred = self.caminho(versao, "predicoes_in_sample.json")
+        if os.path.exists(caminho_pred):
+            return sorted({int(p["ano"]) for p in _ler_json(caminho_pred)})
+        return None
+
+    def registrar(self, diretorio, dados=CSV_PATH, metricas=None):
+        """
+        Cria ou atualiza o manifesto de um diretório de artefatos.
+
+        Em uma atualização (ex.: prever_2025.py acrescentou arquivos), a data de
+        criação e o fingerprint dos dados originais são preservados; hashes,
+        config e métricas são recalculados.
+        """
+        if os.path.abspath(os.path.dirname(os.path.normpath(diretorio))) != os.path.abspath(self.raiz):
+            raise ValueError(f"{diretorio} não está em {self.raiz}")
+        caminho = os.path.join(diretorio, MANIFESTO)
+        anterior = _ler_json(caminho) if os.path.exists(caminho) else {}
+
+        # Inclui subdiretórios (ex.: idata/posterior/alpha0.npy), com "/" no nome
+        artefatos = {}
+        for atual, subdirs, arquivos in os.walk(diretorio):
+            subdirs.sort()
+            for nome in sorted(arquivos):
+                relativo = os.path.relpath(os.path.join(atual, nome), diretorio).replace(os.sep, "/")
+                if relativo != MANIFESTO:
+                    artefatos[relativo] = _conteudo(os.path.join(atual, nome))
+        caminho_config = os.path.join(diretorio, "model_config.json")
+        manifesto = {
+            "versao": os.path.basename(os.path.normpath(diretorio)),
+            "criado_em": anterior.get("criado_em") or datetime.now().isoformat(timespec="seconds"),
+            "dados": anterior.get("dados") or {"arquivo": dados, **_conteudo(dados)},
+            "config": _ler_json(caminho_config) if os.path.exists(caminho_config) else None,
+            "metricas": {**calcular_metricas(diretorio), **(metricas or {})},
+            "artefatos": artefatos,
+        }
+        _escrever_json(caminho, manifesto)
+        return manifesto
+
+    def verificar(self, versao):
+        """Artefatos cujo conteúdo difere do manifesto (alterados ou removidos)"""
+        divergentes = []
+        for nome, esperado in self.manifesto(versao)["artefatos"].items():
+            caminho = self.caminho(versao, nome)
+            if not os.path.exists(caminho) or _conteudo(caminho) != esperado:
+                divergentes.append(nome)
+        return divergentes
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Registro de versões do modelo bayesiano")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    registrar = comandos.add_parser("registrar", help="cria/atualiza o manifesto de um diretório")
+    registrar.add_argument("diretorio")
+    registrar.add_argument("--dados", default=CSV_PATH)
+    fixar = comandos.add_parser("fixar", help="fixa a versão usada pelo dashboard")
+    fixar.add_argument("versao")
+    comandos.add_parser("listar", help="lista as versões e suas métricas")
+    args = parser.parse_args()
+
+    registro = RegistroModelos()
+    if args.comando == "registrar":
+        manifesto = registro.registrar(args.diretorio, dados=args.dados)
+        print(f"Versão {manifesto['versao']} registrada ({len(manifesto['artefatos'])} artefatos)")
+    elif args.comando == "fixar":
+        registro.fixar(args.versao)
+        print(f"Versão fixada: {args.versao}")
+    else:
+        fixada = registro.fixada()
+        for m in registro.versoes():
+            marca = "*" if m["versao"] == fixada else " "
+            metricas = ", ".join(f"{k}={v:.4g}" for k, v in m["metricas"].items())
+            print(f"{marca} {m['versao']:<30} {m['criado_em']}  {metricas}")
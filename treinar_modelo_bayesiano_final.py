@@ -0,0 +1,385 @@
+"""
+Script: treinar_modelo_bayesiano_final.py
+
+Modelo bayesiano NEGATIVE BINOMIAL hierárquico para previsão de
+ocorrências atendidas pela PMDF (2022–2024).
+
+Cada execução grava uma nova versão em data/bayes/modelofinal_<data_hora>/
+e a registra (registro_modelos.py, manifest.json):
+    idata/                  (InferenceData, um .npy por variável; posteriori_mmap.py)
+    posterior_summary.json
+    predicoes_in_sample.json
+    quantis_in_sample.json
+    model_config.json
+
+A versão exibida no dashboard continua a fixada até
+`python registro_modelos.py fixar <versao>`.
+
+O NUTS padrão é o do PyMC; --amostrador escolhe outro backend instalado
+(amostradores.py):
+    python treinar_modelo_bayesiano_final.py --amostrador nutpie
+    python amostradores.py                  # benchmark entre os backends
+"""
+
+import argparse
+import os
+import json
+import sys
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pymc as pm
+import arviz as az
+
+from amostradores import AMOSTRADORES, PACOTES, amostrador_disponivel, argumentos_amostragem, metricas_amostragem
+from arquivo_amostras import desbastar, ess_desbaste, exportar_amostras, imprimir_relatorio
+from esquema import ler_csv
+from posteriori_mmap import salvar_inferencedata
+from previsao import VARIAVEIS, PrevisorNegBin, amostras_posteriori, grade_quantis, resumir
+from registro_modelos import REGISTRO_DIR, RegistroModelos
+
+
+parser = argparse.ArgumentParser(description="Treino do modelo bayesiano final")
+parser.add_argument("--amostrador", choices=AMOSTRADORES, default="pymc", help="backend do NUTS")
+parser.add_argument("--draws", type=int, default=2000)
+parser.add_argument("--tune", type=int, default=2000)
+parser.add_argument("--chains", type=int, default=4)
+parser.add_argument(
+    "--metricas-amostragem",
+    metavar="ARQUIVO",
+    help="só amostra: grava tempo, ESS e divergências em ARQUIVO (JSON) e termina sem salvar a versão",
+)
+# Sem a flag, a posteriori cresce com o número de parâmetros, não com
+# observações × draws; previsao.recalcular_mu e previsao.amostras_posteriori
+# reconstroem mu e os efeitos quando preciso
+parser.add_argument(
+    "--guardar-deterministicos",
+    action="store_true",
+    help="guarda na posteriori os Deterministic mu (um valor por observação e draw) e efeito_mes/efeito_ano",
+)
+args = parser.parse_args()
+if not amostrador_disponivel(args.amostrador):
+    parser.error(f"amostrador '{args.amostrador}' requer {', '.join(PACOTES[args.amostrador])}")
+
+# -----------------------------------------------------------------------------
+# 1. Carregamento e preparação dos dados
+# -----------------------------------------------------------------------------
+
+CSV_PATH = "data/PMDF_ocorrencias_2022-2024.csv"
+OUTPUT_DIR = os.path.join(REGISTRO_DIR, datetime.now().strftime("modelofinal_%Y%m%d_%H%M%S"))
+
+# Preditiva in-sample gerada e resumida em blocos (uma cadeia por vez), sem
+# materializar (chain, draw, obs). Enquanto o tensor int64 (chain, draw, obs)
+# couber em MEMORIA_PPC_MB, cada observação guarda um histograma com classes
+# de largura 1 e os resumos são exatos. Acima disso, os histogramas dividem
+# MEMORIA_PPC_MB entre as observações e classes mais largas arredondam os
+# quantis em até largura - 1 ocorrências (y_pred.tolerancia)
+PPC_EM_BLOCOS = True
+MEMORIA_PPC_MB = 256
+
+# Variáveis exportadas em float32 (e y_obs em inteiros, quando a preditiva é
+# materializada) para o dashboard, em amostras_posteriori.npz, desbastadas
+# para N_AMOSTRAS_DASHBOARD amostras (mesmo passo em cada cadeia)
+VARIAVEIS_DASHBOARD = VARIAVEIS + ["sigma_mes"]
+N_AMOSTRAS_DASHBOARD = 1000
+
+# Tipos compactos declarados em esquema.py
+df = ler_csv(CSV_PATH)
+
+# Mapeia mês em número
+map_mes = {
+    "JANEIRO": 1,
+    "FEVEREIRO": 2,
+    "MARÇO": 3,
+    "MARCO": 3,
+    "ABRIL": 4,
+    "MAIO": 5,
+    "JUNHO": 6,
+    "JULHO": 7,
+    "AGOSTO": 8,
+    "SETEMBRO": 9,
+    "OUTUBRO": 10,
+    "NOVEMBRO": 11,
+    "DEZEMBRO": 12,
+}
+df["mes_num"] = df["mes"].map(map_mes).astype(int)
+
+# Ordena temporalmente
+df = df.sort_values(["ano", "mes_num"]).reset_index(drop=True)
+
+# Índices hierárquicos
+df["mes_idx"] = df["mes_num"] - 1
+df["ano_idx"] = df["ano"].astype("category").cat.codes
+
+y = df["ocor_atend"].astype("int64").values
+n_obs = len(df)
+n_mes = df["mes_idx"].nunique()
+n_ano = df["ano_idx"].nunique()
+
+mes_idx = df["mes_idx"].values
+ano_idx = df["ano_idx"].values
+
+# -----------------------------------------------------------------------------
+# 2. Covariáveis (opcionais)
+# -----------------------------------------------------------------------------
+
+COVARIATE_CANDIDATES = [
+    "arm_fogo_apr",
+    "arm_branc_apr"
+]
+
+covariate_cols = [c for c in COVARIATE_CANDIDATES if c in df.columns]
+
+if covariate_cols:
+    X = df[covariate_cols].astype(float).copy()
+    X_mean = X.mean()
+    X_std = X.std().replace(0, 1.0)
+    X_z = (X - X_mean) / X_std
+    X_matrix = X_z.values
+    n_cov = X_matrix.shape[1]
+else:
+    X_matrix = None
+    n_cov = 0
+    X_mean = pd.Series(dtype=float)
+    X_std = pd.Series(dtype=float)
+
+covariate_metadata = {
+    "covariate_cols": covariate_cols,
+    "means": X_mean.to_dict(),
+    "stds": X_std.to_dict(),
+}
+
+# -----------------------------------------------------------------------------
+# 3. Modelo Bayesiano final (NegBin hierárquico sem RW)
+# -----------------------------------------------------------------------------
+
+coords = {
+    "obs_id": np.arange(n_obs),
+    "mes": np.arange(n_mes),
+    "ano": np.arange(n_ano),
+}
+if n_cov > 0:
+    coords["covariate"] = np.arange(n_cov)
+
+with pm.Model(coords=coords) as modelo_final:
+
+    # Dados (pm.Data é mutável no PyMC 5.25.1)
+    mes_idx_data = pm.Data("mes_idx", mes_idx, dims="obs_id")
+    ano_idx_data = pm.Data("ano_idx", ano_idx, dims="obs_id")
+    if n_cov > 0:
+        X_data = pm.Data("X", X_matrix, dims=("obs_id", "covariate"))
+
+    # Intercepto global (no log da média)
+    # 9.5–10 é da ordem de grandeza das ocorrências (exp(9.5) ~ 13k, exp(10) ~ 22k)
+    alpha0 = pm.Normal("alpha0", mu=9.8, sigma=1.0)
+
+    # Efeito aleatório de mês (sazonalidade)
+    sigma_mes = pm.Exponential("sigma_mes", 2.0)
+    mes_raw = pm.Normal("mes_raw", 0.0, 1.0, dims="mes")
+    efeito_mes = mes_raw * sigma_mes
+    if args.guardar_deterministicos:
+        efeito_mes = pm.Deterministic("efeito_mes", efeito_mes, dims="mes")
+
+    # Efeito aleatório de ano
+    sigma_ano = pm.Exponential("sigma_ano", 2.0)
+    ano_raw = pm.Normal("ano_raw", 0.0, 1.0, dims="ano")
+    efeito_ano = ano_raw * sigma_ano
+    if args.guardar_deterministicos:
+        efeito_ano = pm.Deterministic("efeito_ano", efeito_ano, dims="ano")
+
+    # Covariáveis padronizadas
+    if n_cov > 0:
+        beta = pm.Normal("beta", mu=0.0, sigma=0.5, dims="covariate")
+        cov_effect = pm.math.dot(X_data, beta)
+    else:
+        beta = None
+        cov_effect = 0.0
+
+    # Preditor linear
+    log_mu = alpha0 + efeito_mes[mes_idx_data] + efeito_ano[ano_idx_data] + cov_effect
+    mu = pm.math.exp(log_mu)
+    if args.guardar_deterministicos:
+        mu = pm.Deterministic("mu", mu, dims="obs_id")
+
+    # Overdispersion da NegBin
+    alpha_nb = pm.Exponential("alpha_nb", 1.0)
+
+    # Likelihood
+    y_obs = pm.NegativeBinomial(
+        "y_obs",
+        mu=mu,
+        alpha=alpha_nb,
+        observed=y,
+        dims="obs_id",
+    )
+
+    # Amostragem – target_accept alto para reduzir divergências
+    inicio_amostragem = time.perf_counter()
+    idata = pm.sample(
+        draws=args.draws,
+        tune=args.tune,
+        chains=args.chains,
+        target_accept=0.98,
+        random_seed=123,
+        **argumentos_amostragem(args.amostrador, max_treedepth=12, chains=args.chains),
+    )
+    tempo_amostragem = time.perf_counter() - inicio_amostragem
+
+    # Benchmark (amostradores.py): métricas da amostragem e nada mais
+    if args.metricas_amostragem:
+        with open(args.metricas_amostragem, "w", encoding="utf-8") as f:
+            json.dump({"amostrador": args.amostrador, **metricas_amostragem(idata, tempo_amostragem)}, f, indent=2)
+        sys.exit(0)
+
+    # Posterior preditiva in-sample completa (chain, draw, obs) no idata.
+    # Desligada por padrão: os resumos abaixo são acumulados em blocos.
+    if not PPC_EM_BLOCOS:
+        ppc = pm.sample_posterior_predictive(
+            idata,
+            var_names=["y_obs", "mu"] if args.guardar_deterministicos else ["y_obs"],
+            random_seed=123,
+        )
+        idata.extend(ppc)
+
+# -----------------------------------------------------------------------------
+# 4. Resumos e objetos para o Dashboard
+# -----------------------------------------------------------------------------
+
+var_names_summary = ["alpha0", "sigma_mes", "sigma_ano", "alpha_nb"]
+if n_cov > 0:
+    var_names_summary.append("beta")
+
+summary_df = az.summary(idata, var_names=var_names_summary)
+summary_json = summary_df.reset_index().to_dict(orient="records")
+
+# Predições in-sample (mediana + IC 95%)
+if PPC_EM_BLOCOS:
+    # Uma cadeia por bloco; cada bloco é resumido e descartado. Dentro do
+    # orçamento, sem limite de classes (largura 1, tolerância 0)
+    previsor = PrevisorNegBin.de_inferencedata(idata)
+    orcamento_ppc = MEMORIA_PPC_MB * 2**20
+    bytes_tensor = previsor.n_amostras * n_obs * 8
+    ppc_exata = bytes_tensor <= orcamento_ppc
+    y_pred = previsor.resumir_em_blocos(
+        mes_idx,
+        ano_idx,
+        X_matrix,
+        tamanho_bloco=idata.posterior.sizes["draw"],
+        seed=123,
+        limiares=y[:, None],
+        max_classes=None if ppc_exata else max(2, orcamento_ppc // (4 * n_obs)),
+    )
+    if y_pred.nbytes > orcamento_ppc:
+        raise RuntimeError(
+            f"Acumuladores da PPC ocupam {y_pred.nbytes:,} bytes, mais que "
+            f"MEMORIA_PPC_MB ({orcamento_ppc:,}); aumente MEMORIA_PPC_MB"
+        )
+    p_valor_ppc = y_pred.prob_exceder()[:, 0]
+else:
+    y_pred_samples = idata.posterior_predictive["y_obs"].values  # (chain, draw, obs)
+    y_pred = y_pred_samples.reshape(-1, n_obs)
+    p_valor_ppc = (y_pred > y).mean(axis=0)
+
+estatisticas = resumir(y_pred, prob=0.95)
+
+pred_df = df[["ano", "mes", "mes_num", "ocor_atend"]].copy()
+pred_df["y_pred_mediana"] = estatisticas["mediana"]
+pred_df["y_pred_hdi_low"] = estatisticas["hdi_low"]
+pred_df["y_pred_hdi_high"] = estatisticas["hdi_high"]
+# P(y_rep > y observado): valores perto de 0 ou 1 indicam meses mal ajustados
+pred_df["ppc_p_valor"] = p_valor_ppc
+
+predicoes_json = pred_df.to_dict(orient="records")
+
+# Grade de quantis e HDIs em vários níveis (bandas escolhidas na página 3)
+quantis_json = grade_quantis(y_pred, df[["ano", "mes_num"]].to_numpy())
+
+model_config = {
+    "family": "NegativeBinomial",
+    "link": "log",
+    "formula": (
+        "ocor_atend ~ 1 + (1 | mes) + (1 | ano)"
+        + (" + covariaveis_padronizadas" if n_cov > 0 else "")
+    ),
+    "priors": {
+        "alpha0": "Normal(9.8, 1.0)",
+        "sigma_mes": "Exponential(2.0)",
+        "sigma_ano": "Exponential(2.0)",
+        "alpha_nb": "Exponential(1.0)",
+        "beta": "Normal(0, 0.5) em covariáveis z-score" if n_cov > 0 else None,
+    },
+    "covariate_metadata": covariate_metadata,
+    "amostragem": {
+        "amostrador": args.amostrador,
+        "draws": args.draws,
+        "tune": args.tune,
+        "chains": args.chains,
+        "tempo_s": round(tempo_amostragem, 1),
+    },
+    # Rótulos dos índices de ano (efeito_ano[i] é o ano anos_treino[i])
+    "anos_treino": [int(a) for a in df["ano"].astype("category").cat.categories],
+    "descricao": (
+        "Modelo bayesiano hierárquico NegBin com efeitos aleatórios de mês "
+        "e ano, e covariáveis de apreensões padronizadas (quando presentes)."
+    ),
+}
+
+# -----------------------------------------------------------------------------
+# 5. Salvando posteriori e .json
+# -----------------------------------------------------------------------------
+
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Um .npy por grupo/variável: a previsão lê só os parâmetros que usa
+idata_path = os.path.join(OUTPUT_DIR, "idata")
+salvar_inferencedata(idata, idata_path)
+
+# Subamostra fixa e compacta para o dashboard (float32 / contagens inteiras)
+n_cadeias = idata.posterior.sizes["chain"]
+amostras_completas = amostras_posteriori(idata, VARIAVEIS_DASHBOARD)
+if not PPC_EM_BLOCOS:
+    amostras_completas["y_obs"] = y_pred
+amostras_dashboard = {
+    nome: desbastar(valores, n_cadeias, N_AMOSTRAS_DASHBOARD)
+    for nome, valores in amostras_completas.items()
+}
+amostras_path = os.path.join(OUTPUT_DIR, "amostras_posteriori.npz")
+relatorio_amostras = exportar_amostras(amostras_dashboard, amostras_path)
+ess_amostras = ess_desbaste(amostras_completas, amostras_dashboard, n_cadeias)
+
+summary_path = os.path.join(OUTPUT_DIR, "posterior_summary.json")
+with open(summary_path, "w", encoding="utf-8") as f:
+    json.dump(summary_json, f, ensure_ascii=False, indent=2)
+
+pred_path = os.path.join(OUTPUT_DIR, "predicoes_in_sample.json")
+with open(pred_path, "w", encoding="utf-8") as f:
+    json.dump(predicoes_json, f, ensure_ascii=False, indent=2)
+
+quantis_path = os.path.join(OUTPUT_DIR, "quantis_in_sample.json")
+with open(quantis_path, "w", encoding="utf-8") as f:
+    json.dump(quantis_json, f)
+
+config_path = os.path.join(OUTPUT_DIR, "model_config.json")
+with open(config_path, "w", encoding="utf-8") as f:
+    json.dump(model_config, f, ensure_ascii=False, indent=2)
+
+manifesto = RegistroModelos().registrar(OUTPUT_DIR, dados=CSV_PATH)
+
+print("Treinamento concluído.")
+print(f"Versão registrada: {manifesto['versao']}")
+print(f"InferenceData salvo em: {idata_path}")
+print(f"Resumo posterior salvo em: {summary_path}")
+print(f"Amostras para o dashboard salvas em: {amostras_path}")
+imprimir_relatorio(relatorio_amostras)
+for nome, (ess_total, ess_desbastado) in ess_amostras.items():
+    print(f"  {nome:<14} ESS {ess_total:,.0f} -> {ess_desbastado:,.0f}")
+print(f"Predições in-sample salvas em: {pred_path}")
+if PPC_EM_BLOCOS:
+    print(
+        f"  PPC em blocos: {y_pred.nbytes / 2**20:.2f} MB de acumuladores "
+        f"({bytes_tensor / 2**20:.2f} MB no tensor), "
+        f"{'exata' if ppc_exata else 'aproximada'}, tolerância máx. {y_pred.tolerancia.max()}"
+    )
+print(f"Grade de quantis salva em: {quantis_path}")
+print(f"Configuração do modelo salva em: {config_path}")